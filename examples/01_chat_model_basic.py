@@ -1,23 +1,8 @@
+import asyncio
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+import time
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
-
-_ = load_dotenv(dotenv_path=env_path)
-
-api_key = os.getenv("OPENAI_API_KEY")
-
-if not api_key: 
-	raise ValueError("API key missing")
-
-llm = ChatOpenAI(
-    model="gpt-4.1-mini",
-    temperature=0.3,
-    top_p=0.9,
-)
-
 prompts = {"zero_shot_prompt": "What are the key components of a neural network?",
 		   "few_shot_prompt": """
 Extract the animal and its color from each sentence.
@@ -47,15 +32,52 @@ When I was 6, my sister was half of my age. Now I am 70, what age is my sister?
 
 Break down each step of your calculation.
 """,
-		"self_consistancy_prompt": """
-Lily has 4 times as many apples as Tom. Together, they have 50 apples. How many apples does Tom have?
-
-Provide three independent calculations and explanations, then determine the most consistent result.
-"""
 }
 
-for name, prompt in prompts.items():
-	response = llm.invoke(prompt)
-	name = " ".join(name.split("_")).title()
-	print(f"\nType: {name}\n")
-	print(f"AI Response:\n\n{response.content}\n\n")
\ No newline at end of file
+
+def main():
+	# LangChain and OpenAI are imported once the script runs, not when it is imported.
+	from dotenv import load_dotenv
+	from langchain_openai import ChatOpenAI
+	from prompt_suite import rate_limiter_for, run_prompt_suite, print_suite_summary
+	from self_consistency import self_consistency
+
+	env_path = os.path.join(os.getcwd(), "config", ".env")
+
+	_ = load_dotenv(dotenv_path=env_path)
+
+	api_key = os.getenv("OPENAI_API_KEY")
+
+	if not api_key:
+		raise ValueError("API key missing")
+
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+		# Shared by every OpenAI model in this process, keeps us under the rate limit.
+		rate_limiter=rate_limiter_for("openai", requests_per_second=5),
+	)
+
+	# All prompts run concurrently (at most 8 at a time), results keep the original order.
+	start = time.perf_counter()
+	results = run_prompt_suite(llm, prompts, max_concurrency=8)
+	wall_time = time.perf_counter() - start
+
+	for result in results:
+		name = " ".join(result.name.split("_")).title()
+		print(f"\nType: {name} ({result.latency:.2f}s, {result.usage.get('total_tokens', '?')} tokens)\n")
+		print(f"AI Response:\n\n{result.content}\n\n")
+
+	print_suite_summary(results, wall_time)
+
+	# Self-consistency: instead of one long completion with "three independent calculations",
+	# sample five short answers in parallel and take the majority vote.
+	question = "Lily has 4 times as many apples as Tom. Together, they have 50 apples. How many apples does Tom have?"
+	vote = asyncio.run(self_consistency(llm, question, n_samples=5, temperature=0.7))
+	print(f"\nType: Self Consistency ({vote.latency:.2f}s, {vote.usage.get('total_tokens', '?')} tokens)\n")
+	print(f"AI Response: {vote.answer} (votes: {dict(vote.votes)}, {vote.cancelled} samples cancelled)\n")
+
+
+if __name__ == "__main__":
+	main()
@@ -1,25 +1,7 @@
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
 import random
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
-
-_ = load_dotenv(dotenv_path=env_path)
-
-api_key = os.getenv("OPENAI_API_KEY")
-
-if not api_key: 
-	raise ValueError("API key missing")
-
-llm = ChatOpenAI(
-    model="gpt-4.1-mini",
-    temperature=0.3,
-    top_p=0.9,
-)
-
 scientists = [
     "Albert Einstein",       # Professor at ETH Zurich and Princeton
     "Richard Feynman",       # Professor at Caltech, known for legendary lectures
@@ -38,24 +20,68 @@ scientists = [
     "David Hilbert",         # Professor at Göttingen, foundational in mathematics
 ]
 
+# Static instructions first, then what changes least often: the conversation
+# grows turn by turn, the role and the query are new on every call. Everything
+# before the first variable can be served from the provider's prompt cache.
 template = """
-Take on the role of {role} and answer the User's queries succinctly in a few sentences.
+Take on the role of the scientist named under ROLE and answer the User's queries succinctly in a few sentences.
+
+{history}
+
+ROLE: {role}
 
 QUERY: {usr_query}
 """
 
-# Prompt templates help translate user input and parameters into instructions for a language model.
-# Prompt templates are generally used for simpler inputs, like format a single string. 
-prompt = PromptTemplate.from_template(template)
-
-# Create a chain with explicit formatting
-chain = prompt | llm
-
-while True:
-	user_message = input("Human: ")
-	if user_message.lower() == "exit":
-		break
-	role = random.choice(scientists)
-	print(f"\nScientist: {role}\n")
-	res = chain.invoke({"role": role, "usr_query": user_message})
-	print(f"\nAI: {res.content}\n")
\ No newline at end of file
+def main():
+	# LangChain and OpenAI are imported once the script runs, not when it is imported.
+	from dotenv import load_dotenv
+	from langchain_openai import ChatOpenAI
+	from langchain_core.prompts import PromptTemplate
+	from conversation_memory import ConversationMemory, llm_summarizer
+	from prompt_layout import PrefixStablePrompt, prefix_stats
+
+	env_path = os.path.join(os.getcwd(), "config", ".env")
+
+	_ = load_dotenv(dotenv_path=env_path)
+
+	api_key = os.getenv("OPENAI_API_KEY")
+
+	if not api_key: 
+		raise ValueError("API key missing")
+
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+	)
+
+	# Prompt templates help translate user input and parameters into instructions for a language model.
+	# Prompt templates are generally used for simpler inputs, like format a single string. 
+	# The static head of the template is rendered once, not on every call.
+	prompt = PrefixStablePrompt(PromptTemplate.from_template(template), name="scientist")
+
+	# Create a chain with explicit formatting
+	chain = prompt | llm
+
+	# The last 4 turns verbatim, older ones summarized in the background while
+	# you type, so the prompt stays small however long you keep chatting.
+	memory = ConversationMemory(summarizer=llm_summarizer(llm), window_turns=4, max_tokens=1500)
+
+	while True:
+		user_message = input("Human: ")
+		if user_message.lower() == "exit":
+			break
+		role = random.choice(scientists)
+		print(f"\nScientist: {role}\n")
+		history = memory.history_text("cli")
+		res = chain.invoke({"role": role, "history": f"Conversation so far:\n{history}" if history else "", "usr_query": user_message})
+		memory.add_turn("cli", user_message, res.content)
+		print(f"\nAI: {res.content}\n")
+
+	memory.close()
+	print(f"Prompt prefix: {prefix_stats()}")
+
+
+if __name__ == "__main__":
+	main()
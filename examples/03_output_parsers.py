@@ -1,55 +1,87 @@
+"""
+Structured output: movie facts as JSON, parsed while the model streams them.
+
+python 03_output_parsers.py                          # "The Matrix", fields printed as they arrive
+python 03_output_parsers.py "Alien" "Heat" "Up"      # concurrent batch, reports objects/sec
+python 03_output_parsers.py --file titles.txt --concurrency 32
+python 03_output_parsers.py --invoke                 # the old invoke + JsonOutputParser path
+"""
+import argparse
+import asyncio
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+import time
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("titles", nargs="*", default=["The Matrix"])
+	parser.add_argument("--file", help="one movie title per line")
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--invoke", action="store_true", help="wait for the full response, then parse it")
+	args = parser.parse_args()
 
-_ = load_dotenv(dotenv_path=env_path)
+	from dotenv import load_dotenv
+	from langchain_openai import ChatOpenAI
+	from langchain_core.prompts import PromptTemplate
+	from langchain_core.output_parsers import JsonOutputParser
+	from streaming_json import MOVIE_TEMPLATE, StreamingJsonError, aextract_many, stream_fields
 
-api_key = os.getenv("OPENAI_API_KEY")
+	env_path = os.path.join(os.getcwd(), "config", ".env")
 
-if not api_key: 
-	raise ValueError("API key missing")
+	_ = load_dotenv(dotenv_path=env_path)
 
-llm = ChatOpenAI(
-    model="gpt-4.1-mini",
-    temperature=0.3,
-    top_p=0.9,
-)
+	api_key = os.getenv("OPENAI_API_KEY")
 
-template = """
-You are a film scholar and expert in movies. 
+	if not api_key:
+		raise ValueError("API key missing")
 
-Generate information about "{movie_name}" in JSON format.
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+	)
 
-Return ONLY a JSON object with no text before or after. The JSON must have these keys:
+	prompt = PromptTemplate.from_template(MOVIE_TEMPLATE)
 
-Output valid JSON in exactly this format:
-{{
-	"title": "movie title",
-  	"director": "director name",
-  	"year": year as number,
-  	"genre": "movie genre"
-}}
+	titles = args.titles
+	if args.file:
+		with open(args.file, encoding="utf-8") as f:
+			titles = [line.strip() for line in f if line.strip()]
 
-If any field doesn't apply or lacks sufficient information, use "N/A"
+	if args.invoke:
+		# combined chain using LangChain Expression Language (LCEL)
+		chain = prompt | llm | JsonOutputParser()
 
-Your entire response must be valid JSON. Do not include any text outside the JSON object in your response.
-"""
+		result = chain.invoke({
+			"movie_name": titles[0],
+		})
+
+		print(f"Type: {type(result)}")
+		print(f"Title: {result['title']}")
+		print(f"Genre: {result['genre']}")
+		return
+
+	# Raw message chunks: the streaming parser validates them against the
+	# title/director/year/genre schema and stops the generation when done.
+	chain = prompt | llm
+
+	if len(titles) == 1:
+		try:
+			for key, value in stream_fields(chain, {"movie_name": titles[0]}):
+				print(f"{key.title()}: {value}")
+		except StreamingJsonError as e:
+			print(f"Invalid output: {e}")
+		return
 
-prompt = PromptTemplate.from_template(template)
+	start = time.perf_counter()
+	results = asyncio.run(aextract_many(chain, [{"movie_name": title} for title in titles], max_concurrency=args.concurrency))
+	elapsed = time.perf_counter() - start
 
-# combined chain using LangChain Expression Language (LCEL)
-chain = prompt | llm | JsonOutputParser()
+	for result in results:
+		print(result.data if result.ok else f"{result.inputs['movie_name']}: {result.error}")
+	valid = sum(result.ok for result in results)
+	print(f"\n{valid}/{len(results)} valid objects in {elapsed:.2f}s ({valid / elapsed:.1f} objects/sec, concurrency {args.concurrency})")
 
-movie_name = "The Matrix"
-result = chain.invoke({
-    "movie_name": movie_name,
-})
 
-print(f"Type: {type(result)}")
-print(f"Title: {result['title']}")
-print(f"Genre: {result['genre']}")
\ No newline at end of file
+if __name__ == "__main__":
+	main()
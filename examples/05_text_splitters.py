@@ -1,72 +1,51 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
+from tokenizer import count_tokens
 from datetime import datetime as dt
-import re
 
 
 pdf_file_path = os.path.join(os.getcwd(), "data", "cognitive_architectures.pdf")
 
 def document_loader(file_path, title, authors, published):
+    from parallel_pdf_loader import ParallelPDFLoader
+
     if published:
         date_format = '%Y-%m-%d'
         date_obj = dt.strptime(published, date_format)
         published_date = date_obj.date().isoformat()
 
-    pdf_loader = PyPDFLoader(file_path)
-
-    documents = pdf_loader.load()
+    # Pages are parsed in parallel worker processes and arrive lazily, in order,
+    # so splitting can start before the last page is parsed.
+    pdf_loader = ParallelPDFLoader(file_path)
 
-    for doc in documents:
+    for doc in pdf_loader.lazy_load():
         doc.metadata.update({'title': title, 'authors': authors, 'published': published_date})
         doc.metadata = {k: v for k, v in doc.metadata.items() if k in ["page", "title", "authors", "published"]}
-        
-    return documents
-
-raw_pdf_docs = document_loader(pdf_file_path, "Machine Minds: The Blueprint of Artificial Consciousness", "Sidharta Chatterjee", "2024-06-21")
-
-def web_loader(web_url):
-    web_loader = WebBaseLoader(
-        web_path=web_url,
-        default_parser="lxml",
-        requests_kwargs = {"headers": {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}}
-    )
-
-    data = web_loader.load()
-
-    def sanitize_web_text(raw_text: str) -> str:
-        """
-        Remove repeated newlines
-        Remove leading/trailing whitespace from each line
-        """
-        raw_text = re.sub(r'\n{2,}', '\n\n', raw_text)
-        lines =  [line.strip() for line in raw_text.splitlines()]
-        text = "\n".join(lines)
-        return text
+        yield doc
 
-    # Split by natural sections (e.g., double newlines)
-    text = sanitize_web_text(data[0].page_content)
-    sections = [s.strip() for s in text.split("\n\n") if s.strip()]
+def web_loader(*web_urls):
+    from concurrent_web_loader import ConcurrentWebLoader
 
-    # Convert to Documents and apply recursive splitting
-    web_docs = [Document(page_content=s, metadata=data[0].metadata) for s in sections]
+    # Fetched concurrently, parsed with lxml in worker processes and already cut
+    # into the natural (double newline) sections, one Document per section.
+    web_loader = ConcurrentWebLoader(web_urls)
 
-    return web_docs
+    return web_loader.load()
 
-web_docs = web_loader("https://www.uu.se/en/centre/crb/news/archive/2024-09-23-exploring-artificial-consciousness-drawing-inspiration-from-the-human-brain")
+def make_text_splitter():
+    from streaming_splitter import StreamingRecursiveSplitter
 
-# Create a CharacterTextSplitter with specific configuration:
-text_splitter = RecursiveCharacterTextSplitter(
-	chunk_size=800,  # Reduced for better embedding quality
-	chunk_overlap=100,  # Added overlap for context continuity
-	length_function=len,
-	separators=["\n\n\n", "\n\n", ".", "!", "?", " ", ""],  # Prioritize sentence breaks
-	is_separator_regex=False
-)
+    # SPLIT_BY=tokens measures chunks in model tokens instead of characters,
+    # 200 tokens is roughly the same amount of English text as 800 characters.
+    split_by_tokens = os.getenv("SPLIT_BY", "chars") == "tokens"
 
-pdf_chunks = text_splitter.split_documents(raw_pdf_docs)
-web_chunks = text_splitter.split_documents(web_docs)
+    # Create a CharacterTextSplitter with specific configuration:
+    return StreamingRecursiveSplitter(
+        chunk_size=200 if split_by_tokens else 800,  # Reduced for better embedding quality
+        chunk_overlap=25 if split_by_tokens else 100,  # Added overlap for context continuity
+        length_function=count_tokens if split_by_tokens else len,  # token counts are cached per fragment
+        separators=["\n\n\n", "\n\n", ".", "!", "?", " ", ""],  # Prioritize sentence breaks
+        is_separator_regex=False
+    )
 
 # Define a function to display document statistics
 def display_document_stats(docs, name):
@@ -99,6 +78,29 @@ def display_document_stats(docs, name):
         print(f"Min chunk size: {min_len} characters")
         print(f"Max chunk size: {max_len} characters")
 
-# Display stats for both chunk sets
-display_document_stats(pdf_chunks, "PDF File")
-display_document_stats(web_chunks, "HTML File")
\ No newline at end of file
+        # Token distribution, which is what embedding and chat models actually see
+        tokens = sorted(count_tokens(doc.page_content) for doc in docs)
+        print(f"Chunk tokens: min {tokens[0]}, median {tokens[len(tokens) // 2]}, "
+              f"p95 {tokens[int(0.95 * (len(tokens) - 1))]}, max {tokens[-1]}, "
+              f"average {sum(tokens) / len(tokens):.1f}")
+
+
+def main():
+    from tracing import get_tracer
+
+    raw_pdf_docs = document_loader(pdf_file_path, "Machine Minds: The Blueprint of Artificial Consciousness", "Sidharta Chatterjee", "2024-06-21")
+    web_docs = web_loader("https://www.uu.se/en/centre/crb/news/archive/2024-09-23-exploring-artificial-consciousness-drawing-inspiration-from-the-human-brain")
+    text_splitter = make_text_splitter()
+
+    # TRACE_EXPORT=jsonl records how long splitting takes (see tracing.py).
+    tracer = get_tracer()
+    pdf_chunks = list(tracer.iterate(text_splitter.lazy_split_documents(raw_pdf_docs), "split_pdf", kind="splitter"))
+    web_chunks = list(tracer.iterate(text_splitter.lazy_split_documents(web_docs), "split_web", kind="splitter"))
+
+    # Display stats for both chunk sets
+    display_document_stats(pdf_chunks, "PDF File")
+    display_document_stats(web_chunks, "HTML File")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,57 @@
 import os
-from langchain_community.document_loaders import UnstructuredPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from tokenizer import count_tokens
 from datetime import datetime as dt
-from langchain.schema import Document
-from collections import defaultdict
 
 
 pdf_file_path = os.path.join(os.getcwd(), "data", "cognitive_architectures.pdf")
 
 def adv_pdf_loader(file_path, title, authors, published):
+	from parallel_pdf_loader import ParallelPDFLoader
+
 	if published:
 		date_format = '%Y-%m-%d'
 		date_obj = dt.strptime(published, date_format)
 		published_date = date_obj.date().isoformat()
 
-	pdf_loader = UnstructuredPDFLoader(
+	# Unstructured (with table inference) runs on a few pages per worker process,
+	# pages come back lazily and in order, and parsed pages are cached on disk.
+	pdf_loader = ParallelPDFLoader(
 		file_path=file_path,
-		mode="elements",
-		infer_table_structure=True,
-	  )
-
-	elements = pdf_loader.load()
+		mode="unstructured",
+		pages_per_task=2,
+	)
 
-	pages = defaultdict(list)
-	for el in elements:
-		page = el.metadata.get("page_number", 0)
-		pages[page].append(el.page_content.strip())
+	for doc in pdf_loader.lazy_load():
+		# Pages without any elements were skipped by the element-based loader too.
+		if not doc.page_content:
+			continue
+		doc.metadata.update({"source": "CoALA_Paper.pdf", 'title': title, 'authors': authors, 'published': published_date})
+		doc.metadata = {k: v for k, v in doc.metadata.items() if k in ["source", "page", "title", "authors", "published"]}
+		yield doc
 
-	documents = []
-	for page_num, texts in pages.items():
-		full_text = "\n\n".join(texts)
-		doc = Document(
-			page_content=full_text,
-			metadata={"source": "CoALA_Paper.pdf", "page": page_num}
-		)
-		documents.append(doc)
+def make_text_splitter():
+	from streaming_splitter import StreamingRecursiveSplitter
 
+	# SPLIT_BY=tokens measures chunks in model tokens instead of characters,
+	# 200 tokens is roughly the same amount of English text as 800 characters.
+	split_by_tokens = os.getenv("SPLIT_BY", "chars") == "tokens"
 
-	for doc in documents:
-		doc.metadata.update({'title': title, 'authors': authors, 'published': published_date})
-		doc.metadata = {k: v for k, v in doc.metadata.items() if k in ["source", "page", "title", "authors", "published"]}
-		
-	return documents
-
-raw_pdf_docs = adv_pdf_loader(pdf_file_path, "Cognitive Architectures for Language Agents", "Theodore R. Sumers, Shunyu Yao, Karthik Narasimhan, Thomas L. Griffiths", "2024-04-21")
-
-# Create a CharacterTextSplitter with specific configuration:
-text_splitter = RecursiveCharacterTextSplitter(
-	chunk_size=800,
-	chunk_overlap=100,
-	separators=[
-		r"(?<=[.?!])\s+(?=[A-Z])",
-		"\n\n",
-		"\n",
-		" ",
-		""
-	],
-	is_separator_regex=True,
-	keep_separator=True,
-	strip_whitespace=True
-)
-
-pdf_chunks = text_splitter.split_documents(raw_pdf_docs)
+	# Create a CharacterTextSplitter with specific configuration:
+	return StreamingRecursiveSplitter(
+		chunk_size=200 if split_by_tokens else 800,
+		chunk_overlap=25 if split_by_tokens else 100,
+		length_function=count_tokens if split_by_tokens else len,  # token counts are cached per fragment
+		separators=[
+			r"(?<=[.?!])\s+(?=[A-Z])",
+			"\n\n",
+			"\n",
+			" ",
+			""
+		],
+		is_separator_regex=True,
+		keep_separator=True,
+		strip_whitespace=True
+	)
 
 # Define a function to display document statistics
 def display_document_stats(docs, name):
@@ -82,10 +72,32 @@ def display_document_stats(docs, name):
 	print(f"Metadata keys preserved: {', '.join(all_metadata_keys)}")
 	
 	if docs:
+		# Token distribution, which is what embedding and chat models actually see
+		tokens = sorted(count_tokens(doc.page_content) for doc in docs)
+		print(f"Chunk tokens: min {tokens[0]}, median {tokens[len(tokens) // 2]}, "
+			  f"p95 {tokens[int(0.95 * (len(tokens) - 1))]}, max {tokens[-1]}, "
+			  f"average {sum(tokens) / len(tokens):.1f}")
+
 		for i in range(2):
 			print(f"\nDocument: {i+1}\n")
 			print(f"Metadata: {docs[i].metadata}\n")
 			print(f"Content: {docs[i].page_content}\n\n")
 
-# Display stats for chunks
-display_document_stats(pdf_chunks, "Chunks Split With Improved PDF Loader")
+
+def main():
+	from tracing import get_tracer
+
+	raw_pdf_docs = adv_pdf_loader(pdf_file_path, "Cognitive Architectures for Language Agents", "Theodore R. Sumers, Shunyu Yao, Karthik Narasimhan, Thomas L. Griffiths", "2024-04-21")
+	text_splitter = make_text_splitter()
+
+	# TRACE_EXPORT=jsonl records how long splitting takes (see tracing.py).
+	tracer = get_tracer()
+	pdf_chunks = list(tracer.iterate(text_splitter.lazy_split_documents(raw_pdf_docs), "split_pdf", kind="splitter"))
+
+	# Display stats for chunks
+	display_document_stats(pdf_chunks, "Chunks Split With Improved PDF Loader")
+
+
+if __name__ == "__main__":
+	main()
+
@@ -1,26 +1,34 @@
 import os
-from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
+def main():
+	# The embedding client (OpenAI) is imported once the script runs.
+	from dotenv import load_dotenv
+	from embedding_cache import get_embeddings
 
-_ = load_dotenv(dotenv_path=env_path)
+	env_path = os.path.join(os.getcwd(), "config", ".env")
 
-api_key = os.getenv("OPENAI_API_KEY")
+	_ = load_dotenv(dotenv_path=env_path)
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-)
+	api_key = os.getenv("OPENAI_API_KEY")
 
-apple_vector = embeddings.embed_query("I love apples.")
-fruit_vector = embeddings.embed_query("I enjoy eating fruit.")
+	# Vectors for texts we have already embedded come from the local cache.
+	embeddings = get_embeddings(model="text-embedding-3-small")
 
-print(f"The {embeddings.model} outputs a vector of a fixed dimension:\n")
-print(f"Apple vector: {len(apple_vector)} dimensions")
-print(f"Fruit vector: {len(apple_vector)} dimensions\n")
+	apple_vector = embeddings.embed_query("I love apples.")
+	fruit_vector = embeddings.embed_query("I enjoy eating fruit.")
 
-for i in range(5):
-	print(f"Dimension: {i+1}")
-	print(f"Apple vector: {apple_vector[i]}")
-	print(f"Fruit vector: {fruit_vector[i]}\n")
\ No newline at end of file
+	print(f"The {embeddings.model} outputs a vector of a fixed dimension:\n")
+	print(f"Apple vector: {len(apple_vector)} dimensions")
+	print(f"Fruit vector: {len(apple_vector)} dimensions\n")
+
+	for i in range(5):
+		print(f"Dimension: {i+1}")
+		print(f"Apple vector: {apple_vector[i]}")
+		print(f"Fruit vector: {fruit_vector[i]}\n")
+
+	print(f"Embedding cache: {embeddings.stats()}")
+
+
+if __name__ == "__main__":
+	main()
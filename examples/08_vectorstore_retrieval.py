@@ -2,63 +2,78 @@
 pip install chromadb
 """
 import os
-from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-import chromadb
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
+def main():
+    # Chroma and the embedding client are imported once the script runs.
+    from dotenv import load_dotenv
+    from embedding_cache import get_embeddings
+    from numpy_index import NumpyVectorIndex
+    import chromadb
 
-_ = load_dotenv(dotenv_path=env_path)
+    env_path = os.path.join(os.getcwd(), "config", ".env")
 
-api_key = os.getenv("OPENAI_API_KEY")
+    _ = load_dotenv(dotenv_path=env_path)
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-)
+    api_key = os.getenv("OPENAI_API_KEY")
 
-# Connect to ChromaDB, our vector database, where we store and search embeddings.
-# We're using persistent storage so data is saved between runs.
-vector_db = chromadb.PersistentClient(path="./chroma_test_storage")
+    # Vectors for texts we have already embedded come from the local cache.
+    embeddings = get_embeddings(model="text-embedding-3-small")
 
-# A collection is like a table in a traditional database—it holds related data.
-collection = vector_db.get_or_create_collection(name="test_collection")
+    # Connect to ChromaDB, our vector database, where we store and search embeddings.
+    # We're using persistent storage so data is saved between runs.
+    vector_db = chromadb.PersistentClient(path="./chroma_test_storage")
 
-# These sentences will be stored in our vector database for future searches.
-documents = [
-    "LangChain is the best framework!", # A fact? An opinion?
-    "The sky is blue.",                 # A simple, objective statement.
-    "Fedora is just awesome."           # Biased? Maybe, but it's in our dataset!
-]
+    # A collection is like a table in a traditional database—it holds related data.
+    collection = vector_db.get_or_create_collection(name="test_collection")
 
-# Each document is transformed into a vector that represents its meaning.
-document_vectors = embeddings.embed_documents(documents)
+    # These sentences will be stored in our vector database for future searches.
+    documents = [
+        "LangChain is the best framework!", # A fact? An opinion?
+        "The sky is blue.",                 # A simple, objective statement.
+        "Fedora is just awesome."           # Biased? Maybe, but it's in our dataset!
+    ]
 
-# Unique IDs for each document
-document_ids = ["1", "2", "3"]
+    # Each document is transformed into a vector that represents its meaning.
+    document_vectors = embeddings.embed_documents(documents)
 
-# Store documents and their embeddings in ChromaDB
-collection.upsert(
-    documents=documents,
-    embeddings=document_vectors,
-    ids=document_ids
-)
+    # Unique IDs for each document
+    document_ids = ["1", "2", "3"]
 
-usr_query = "What's Fedora?"
+    # Store documents and their embeddings in ChromaDB
+    collection.upsert(
+        documents=documents,
+        embeddings=document_vectors,
+        ids=document_ids
+    )
 
-# Convert the query into an embedding
-query_vector = embeddings.embed_query(usr_query)
+    usr_query = "What's Fedora?"
 
-# Retrieve the collection (ensuring we're querying the right dataset)
-collection = vector_db.get_collection("test_collection")
+    # Convert the query into an embedding
+    query_vector = embeddings.embed_query(usr_query)
 
-# Search for the closest match using vector similarity
-results = collection.query(
-    query_embeddings=[query_vector],
-    n_results=1,  # We only want the single best match
-    include=["documents"]  # Return the matching document, not just the ID
-)
+    # Retrieve the collection (ensuring we're querying the right dataset)
+    collection = vector_db.get_collection("test_collection")
 
-# Since our database understands meaning, it should return "Fedora is just awesome."
-print("User query:", usr_query)
-print("Search result:", results['documents'][0][0])
\ No newline at end of file
+    # RETRIEVER_BACKEND=numpy answers queries from an in-process copy of the
+    # collection, which skips the Chroma client overhead for small collections.
+    if os.getenv("RETRIEVER_BACKEND", "chroma") == "numpy":
+        vector_index = NumpyVectorIndex.from_chroma(collection)
+    else:
+        vector_index = collection
+
+    # Search for the closest match using vector similarity
+    results = vector_index.query(
+        query_embeddings=[query_vector],
+        n_results=1,  # We only want the single best match
+        include=["documents"]  # Return the matching document, not just the ID
+    )
+
+    # Since our database understands meaning, it should return "Fedora is just awesome."
+    print("User query:", usr_query)
+    print("Search result:", results['documents'][0][0])
+    print(f"Embedding cache: {embeddings.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,100 @@
-import gradio as gr
+import asyncio
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
+def build_demo():
+	"""The Gradio app; the heavy imports happen here, when the app is built."""
+	import gradio as gr
+	from langchain_openai import ChatOpenAI
+	from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+	from langchain_core.output_parsers import StrOutputParser
+	from conversation_memory import ConversationMemory, llm_summarizer
+	from embedding_cache import get_embeddings
+	from semantic_cache import SemanticCache
+	from streaming import astream_text
+	from tracing import get_tracer
 
-_ = load_dotenv(dotenv_path=env_path)
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+	)
 
-api_key = os.getenv("OPENAI_API_KEY")
-
-if not api_key: 
-	raise ValueError("API key missing")
-
-llm = ChatOpenAI(
-	model="gpt-4.1-mini",
-	temperature=0.3,
-	top_p=0.9,
-)
-
-def get_response(query):
+	# The prompt and chain are built once and shared by every request.
 	prompt = ChatPromptTemplate([
 		("system", "You are a helpful AI Assistant. Answer the User's queries succinctly in one sentence."),
+		MessagesPlaceholder("history"),
 		("human", "{usr_query}")
 	])
 
 	chain = prompt | llm | StrOutputParser()
 
-	response = chain.invoke({"usr_query": query})
-	
-	return response
+	# TRACE_EXPORT=jsonl (or otlp) records a span per request and chain step, see tracing.py.
+	tracer = get_tracer()
+
+	# Near-identical questions are answered from here without calling the LLM.
+	answer_cache = SemanticCache(tracer.wrap_embeddings(get_embeddings(model="text-embedding-3-small")), threshold=0.92, ttl_seconds=3600, max_entries=1000)
+
+	# The last 4 turns of each browser session go into the prompt verbatim, older
+	# turns as a summary written in the background: the prompt stays under ~1500
+	# tokens however long the conversation runs.
+	memory = ConversationMemory(summarizer=llm_summarizer(llm), window_turns=4, max_tokens=1500, max_sessions=1000, idle_seconds=3600)
+
+	@tracer.traced("gradio.get_response", kind="handler")
+	async def get_response(query, request: gr.Request):
+		session_id = request.session_hash
+		history = memory.history(session_id)
+
+		# Only a conversation's first question stands on its own, later ones
+		# ("and on weekends?") depend on the history and can't be shared.
+		if not history:
+			# Embedding the question is a blocking call, keep it off the event loop.
+			cached = await asyncio.to_thread(answer_cache.lookup, query)
+			if cached is not None:
+				memory.add_turn(session_id, query, cached)
+				yield cached
+				return
+
+		# Yield partial text so the Textbox fills in while the answer is generated.
+		# Being async, waiting on OpenAI doesn't block a worker thread.
+		partial = ""
+		async for partial in astream_text(chain, {"usr_query": query, "history": history}, config={"callbacks": tracer.callbacks()}):
+			yield partial
+
+		memory.add_turn(session_id, query, partial)
+		if not history:
+			await asyncio.to_thread(answer_cache.store, query, partial)
+		print(f"Answer cache: {answer_cache.stats()}")
+		print(f"Conversation memory: {memory.stats()}")
+
+	return gr.Interface(
+		fn=get_response,
+		flagging_mode="never",
+		inputs=gr.Textbox(label="Human", lines=2, placeholder="Type your question here..."),
+		outputs=gr.Textbox(label="AI"),
+		title="ChatBot"
+	)
+
+
+def main():
+	from dotenv import load_dotenv
+
+	env_path = os.path.join(os.getcwd(), "config", ".env")
+
+	_ = load_dotenv(dotenv_path=env_path)
+
+	api_key = os.getenv("OPENAI_API_KEY")
+
+	if not api_key: 
+		raise ValueError("API key missing")
+
+	demo = build_demo()
+
+	# Requests are I/O bound, so one process can serve many users at once.
+	demo.queue(default_concurrency_limit=32)
+
+	demo.launch(server_name="0.0.0.0", server_port= 7860)
 
-demo = gr.Interface(
-	fn=get_response,
-	flagging_mode="never",
-	inputs=gr.Textbox(label="Human", lines=2, placeholder="Type your question here..."),
-	outputs=gr.Textbox(label="AI"),
-	title="ChatBot"
-)
 
-demo.launch(server_name="0.0.0.0", server_port= 7860)
\ No newline at end of file
+if __name__ == "__main__":
+	main()
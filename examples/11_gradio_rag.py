@@ -1,44 +1,126 @@
-import gradio as gr
+import asyncio
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from operator import itemgetter
 
 
-env_path = os.path.join(os.getcwd(), "config", ".env")
+def build_demo():
+	"""The Gradio app over the ingested collection; the heavy imports happen here."""
+	import gradio as gr
+	from langchain_openai import ChatOpenAI
+	from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+	from langchain_core.output_parsers import StrOutputParser
+	from conversation_memory import ConversationMemory, llm_summarizer
+	from prompt_layout import PrefixStablePrompt, prefix_stats
+	from retrieval_service import RetrievalService
+	from embedding_cache import get_embeddings
+	from semantic_cache import SemanticCache
+	from streaming import astream_text
+	from tracing import get_tracer
 
-_ = load_dotenv(dotenv_path=env_path)
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+	)
 
-api_key = os.getenv("OPENAI_API_KEY")
+	# TRACE_EXPORT=jsonl (or otlp) records a span per request and chain step, see tracing.py.
+	tracer = get_tracer()
 
-if not api_key: 
-	raise ValueError("API key missing")
+	# Opens the collection ingested by 09_summarization_rag.py --ingest, no ingest work here.
+	retriever = RetrievalService(
+		storage_path="./chroma_test_storage",
+		collection_name="company_policies",
+		embeddings=tracer.wrap_embeddings(get_embeddings(model="text-embedding-3-small"))
+	)
+	print(f"Retrieval service ready in {retriever.cold_start_seconds:.2f}s")
 
-llm = ChatOpenAI(
-	model="gpt-4.1-mini",
-	temperature=0.3,
-	top_p=0.9,
-)
+	template = """You are an AI Assistant. Answer the User's queries succinctly in one sentence.
 
+Use the context to factually answer the question. Let the user know if you do not have enough information or context to answer a specific question.
+"""
 
+	# The prompt and chain are built once and shared by every request. Static
+	# instructions first, then the history (which only grows within a session),
+	# then the per-question context: the longest possible cacheable prefix.
+	prompt = PrefixStablePrompt(ChatPromptTemplate([
+		("system", template),
+		MessagesPlaceholder("history"),
+		("system", "Context: {context}"),
+		("human", "{usr_query}")
+	]), name="gradio_rag")
 
-with gr.Blocks() as demo:
-	response = gr.Textbox(label="AI")
-	query = gr.Textbox(label="Human", lines=2, placeholder="Ask anything...")
-	send_btn = gr.Button("Send")
+	chain = (
+		{"context": itemgetter("usr_query") | retriever.context, "usr_query": itemgetter("usr_query"), "history": itemgetter("history")}
+		| prompt
+		| llm
+		| StrOutputParser()
+	)
 
-	@send_btn.click(inputs=query, outputs=response)
-	def get_response(query):
-		prompt = ChatPromptTemplate([
-			 ("system", "You are an AI Assistant. Answer the User's queries succinctly in one sentence."),
-			 ("human", "{usr_query}")
-		])
-		
-		chain = prompt | llm | StrOutputParser()
-		
-		response = chain.invoke({"usr_query": query})
+	# Near-identical questions are answered from here without retrieval or the LLM.
+	# Answers are tied to the indexed content and dropped when it is re-indexed.
+	answer_cache = SemanticCache(retriever.embeddings, threshold=0.92, ttl_seconds=3600, max_entries=1000, version=retriever.fingerprint())
 
-		return response
+	# Recent turns verbatim, older ones summarized in the background, per browser
+	# session: the prompt stays bounded however long the conversation runs.
+	memory = ConversationMemory(summarizer=llm_summarizer(llm), window_turns=4, max_tokens=1500, max_sessions=1000, idle_seconds=3600)
 
-demo.launch()
\ No newline at end of file
+	with gr.Blocks() as demo:
+		response = gr.Textbox(label="AI")
+		query = gr.Textbox(label="Human", lines=2, placeholder="Ask anything...")
+		send_btn = gr.Button("Send")
+
+		@send_btn.click(inputs=query, outputs=response)
+		@tracer.traced("gradio.get_response", kind="handler")
+		async def get_response(query, request: gr.Request):
+			session_id = request.session_hash
+			history = memory.history(session_id)
+
+			# Follow-up questions depend on the history, only first questions are cached.
+			answer_cache.set_version(retriever.fingerprint())
+			if not history:
+				# Embedding the question is a blocking call, keep it off the event loop.
+				cached = await asyncio.to_thread(answer_cache.lookup, query)
+				if cached is not None:
+					memory.add_turn(session_id, query, cached)
+					yield cached
+					return
+
+			# Yield partial text so the Textbox fills in while the answer is generated.
+			# Being async, waiting on OpenAI doesn't block a worker thread.
+			partial = ""
+			async for partial in astream_text(chain, {"usr_query": query, "history": history}, config={"callbacks": tracer.callbacks()}):
+				yield partial
+
+			memory.add_turn(session_id, query, partial)
+			if not history:
+				await asyncio.to_thread(answer_cache.store, query, partial)
+			print(f"Retrieval latency: {retriever.latency_stats()}")
+			print(f"Answer cache: {answer_cache.stats()}")
+			print(f"Conversation memory: {memory.stats()}")
+			print(f"Prompt prefix: {prefix_stats()['gradio_rag']}")
+
+	return demo
+
+
+def main():
+	from dotenv import load_dotenv
+
+	env_path = os.path.join(os.getcwd(), "config", ".env")
+
+	_ = load_dotenv(dotenv_path=env_path)
+
+	api_key = os.getenv("OPENAI_API_KEY")
+
+	if not api_key: 
+		raise ValueError("API key missing")
+
+	demo = build_demo()
+
+	# Requests are I/O bound, so one process can serve many users at once.
+	demo.queue(default_concurrency_limit=32)
+
+	demo.launch()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,47 @@
+"""
+Time to first token vs. total latency, measured offline.
+
+Runs the same prompt | llm | StrOutputParser chain the Gradio demos use, but
+with a fake chat model that simulates network latency, once with `invoke` and
+once with `stream`. With `invoke` the user waits for the whole answer; with
+`stream` they see the first words after the TTFT.
+"""
+import time
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from fakes import FakeStreamingChatModel
+from streaming import stream_text
+
+
+llm = FakeStreamingChatModel(
+	responses=["An apple a day keeps the doctor away, because apples are rich in fiber, vitamins and antioxidants that support a healthy body."],
+	first_token_latency=0.3,  # request overhead + prompt processing
+	token_latency=0.03,       # generation speed
+)
+
+prompt = ChatPromptTemplate([
+	("system", "You are a helpful AI Assistant. Answer the User's queries succinctly in one sentence."),
+	("human", "{usr_query}")
+])
+
+chain = prompt | llm | StrOutputParser()
+
+inputs = {"usr_query": "Why are apples healthy?"}
+
+# Blocking call: nothing to show until the full completion is done.
+start = time.perf_counter()
+response = chain.invoke(inputs)
+invoke_latency = time.perf_counter() - start
+print(f"invoke: {invoke_latency:.3f}s until anything is shown\n")
+
+# Streaming call: the Textbox starts filling in after the first token.
+timings = []
+for partial in stream_text(chain, inputs, on_complete=timings.append):
+	pass
+
+stream_timings = timings[0]
+print(f"stream: TTFT {stream_timings.ttft:.3f}s, total {stream_timings.total:.3f}s")
+print(f"Perceived latency is {invoke_latency / stream_timings.ttft:.1f}x lower with streaming")
+
+assert partial == response, "streamed text should match the invoked text"
+assert stream_timings.ttft < stream_timings.total
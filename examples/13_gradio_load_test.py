@@ -0,0 +1,100 @@
+"""
+Load test for the Gradio chat handlers, without OpenAI and without a browser.
+
+A fake chat model injects realistic latency so we can compare two versions of
+the `get_response` handler from 10_gradio_chatbot_demo.py:
+
+- before: the chain is rebuilt on every request and called with a blocking
+  `invoke`. Gradio runs sync handlers on worker threads (at most 40).
+- after: the chain is built once and the handler is async (`astream`).
+
+Both run at the same concurrency limit, so the difference is the handler
+alone. (Gradio's default concurrency_limit of 1 per event would cap either
+handler at one request at a time; the demos raise it.) Up to about 40
+concurrent requests, the size of the thread pool, both are about as fast;
+past that, sync requests wait for a thread while the async handler keeps
+scaling. The defaults (256 requests, 128 at a time) are past that crossover.
+
+Usage: python examples/13_gradio_load_test.py [n_requests=256] [concurrency=128]
+       (concurrency 40 or less: both handlers are about as fast)
+"""
+import asyncio
+import inspect
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from fakes import FakeStreamingChatModel
+from streaming import astream_text
+
+
+llm = FakeStreamingChatModel(
+	responses=["Apples are healthy because they are full of fiber and vitamins."],
+	first_token_latency=0.4,
+	token_latency=0.02,
+)
+
+system_prompt = "You are a helpful AI Assistant. Answer the User's queries succinctly in one sentence."
+
+
+def get_response_before(query):
+	prompt = ChatPromptTemplate([
+		("system", system_prompt),
+		("human", "{usr_query}")
+	])
+	chain = prompt | llm | StrOutputParser()
+	return chain.invoke({"usr_query": query})
+
+
+prompt = ChatPromptTemplate([
+	("system", system_prompt),
+	("human", "{usr_query}")
+])
+
+chain = prompt | llm | StrOutputParser()
+
+async def get_response_after(query):
+	async for partial in astream_text(chain, {"usr_query": query}, on_complete=None):
+		yield partial
+
+
+async def run_load(handler, n_requests: int, limit: int) -> float:
+	"""Fire n_requests at the handler with at most `limit` in flight, return requests/sec."""
+	semaphore = asyncio.Semaphore(limit)
+
+	async def one_request(i):
+		async with semaphore:
+			query = f"Why are apples healthy? ({i})"
+			if inspect.isasyncgenfunction(handler):
+				async for partial in handler(query):
+					pass
+				return partial
+			# Gradio runs sync handlers in a thread pool.
+			return await asyncio.to_thread(handler, query)
+
+	start = time.perf_counter()
+	await asyncio.gather(*(one_request(i) for i in range(n_requests)))
+	return n_requests / (time.perf_counter() - start)
+
+
+async def main(n_requests: int, concurrency: int):
+	print(f"{n_requests} requests, {llm.first_token_latency}s to first token, concurrency {concurrency}\n")
+
+	# Like Gradio (anyio), sync handlers get a pool of 40 threads.
+	asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=40))
+
+	before = await run_load(get_response_before, n_requests, limit=concurrency)
+	print(f"before (sync invoke, chain rebuilt, concurrency {concurrency}): {before:.1f} requests/sec")
+
+	after = await run_load(get_response_after, n_requests, limit=concurrency)
+	print(f"after  (async astream, shared chain, concurrency {concurrency}): {after:.1f} requests/sec")
+
+	print(f"\nSpeedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+	# Parsed here, not at import time: pytest collects this file by its name.
+	n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+	concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+	asyncio.run(main(n_requests, concurrency))
@@ -0,0 +1,89 @@
+"""
+Prompt tokens per query: the raw Chroma result dict vs. the context builder.
+
+Before, `rag_chain` stringified the whole `collection.query` result into the
+prompt. Now `build_context` deduplicates, merges neighbouring chunks and formats
+them compactly under a token budget. This script indexes the company policies
+(or a synthetic stand-in if data/company_policies.txt is missing) into a
+temporary collection and counts the context tokens for a few questions.
+
+Run offline with: FAKE_EMBEDDINGS=1 python examples/14_context_tokens_benchmark.py
+"""
+import os
+import shutil
+import tempfile
+import chromadb
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from context_builder import build_context
+from embedding_cache import get_embeddings
+from incremental_index import IncrementalIndexer, manifest_path_for
+from synthetic_data import synthetic_policies
+from tokenizer import count_tokens
+
+
+file_path = os.path.join(os.getcwd(), "data", "company_policies.txt")
+if os.path.isfile(file_path):
+	with open(file_path, "r", encoding="utf-8") as fh:
+		text = fh.read()
+else:
+	text = synthetic_policies()
+
+docs = [Document(page_content=text, metadata={"source": "company_policies.txt", "title": "Company Policies"})]
+
+text_splitter = RecursiveCharacterTextSplitter(
+	chunk_size=800,
+	chunk_overlap=100,
+	separators=[
+		r"(?<=[.?!])\s+(?=[A-Z])",
+		"\n\n",
+		"\n",
+		" ",
+		""
+	],
+	is_separator_regex=True,
+	keep_separator=True,
+	strip_whitespace=True,
+	add_start_index=True
+)
+
+text_chunks = text_splitter.split_documents(docs)
+
+storage_path = tempfile.mkdtemp(prefix="context_bench_")
+embeddings = get_embeddings(model="text-embedding-3-small")
+
+try:
+	collection = chromadb.PersistentClient(path=storage_path).get_or_create_collection(name="company_policies")
+	IncrementalIndexer(collection, embeddings, manifest_path_for(storage_path, collection.name)).index(text_chunks)
+
+	questions = [
+		"Can I eat in the company car?",
+		"How do I report a security incident?",
+		"How much notice do I need to give before taking vacation?",
+		"Do I need receipts for my expenses?",
+		"What is the remote work policy?",
+	]
+
+	total_before = 0
+	total_after = 0
+	print(f"{len(text_chunks)} chunks indexed, k=10\n")
+	print(f"{'question':<60} {'before':>8} {'after':>8}")
+
+	for question in questions:
+		results = collection.query(
+			query_embeddings=[embeddings.embed_query(question)],
+			n_results=min(10, len(text_chunks)),
+			include=["documents", "metadatas"]
+		)
+		# This is what ended up in {context} before: the whole dict as a string.
+		before = count_tokens(str(results))
+		after = count_tokens(build_context(results))
+		total_before += before
+		total_after += after
+		print(f"{question:<60} {before:>8} {after:>8}")
+
+	n = len(questions)
+	print(f"\nAverage prompt context tokens per query: {total_before / n:.0f} -> {total_after / n:.0f}"
+		  f" ({100 * (1 - total_after / total_before):.0f}% fewer)")
+finally:
+	shutil.rmtree(storage_path, ignore_errors=True)
@@ -0,0 +1,86 @@
+"""
+Query latency: Chroma vs. the in-process NumPy index.
+
+Fills a temporary Chroma collection and a memory-mapped NumpyVectorIndex with
+the same random unit vectors, then times single queries against both and
+prints p50/p99 latency for every collection size.
+
+Usage:
+	python examples/15_vector_index_benchmark.py --sizes 1000,100000,1000000 --dim 384
+
+Filling Chroma with a million vectors takes a while; use --chroma-max to skip
+Chroma above a given size and only time the NumPy index there.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import chromadb
+import numpy as np
+from numpy_index import NumpyVectorIndex
+from percentiles import percentile
+
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--sizes", default="1000,100000,1000000", help="comma separated collection sizes")
+parser.add_argument("--dim", type=int, default=384, help="vector dimension")
+parser.add_argument("--queries", type=int, default=200, help="queries per backend and size")
+parser.add_argument("--k", type=int, default=10)
+parser.add_argument("--chroma-max", type=int, default=1_000_000, help="largest size to load into Chroma")
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+
+
+def random_unit_vectors(n: int) -> np.ndarray:
+	vectors = rng.standard_normal((n, args.dim), dtype=np.float32)
+	return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def time_queries(query_fn, queries: np.ndarray) -> list:
+	latencies = []
+	for query in queries:
+		start = time.perf_counter()
+		query_fn(query)
+		latencies.append(time.perf_counter() - start)
+	return latencies
+
+
+def report(name: str, size: int, latencies: list):
+	p50 = percentile(latencies, 50) * 1000
+	p99 = percentile(latencies, 99) * 1000
+	print(f"{name:<8} {size:>9,} vectors   p50 {p50:8.2f} ms   p99 {p99:8.2f} ms")
+
+
+for size in (int(s) for s in args.sizes.split(",")):
+	workdir = tempfile.mkdtemp(prefix="vector_bench_")
+	try:
+		vectors = random_unit_vectors(size)
+		ids = [str(i) for i in range(size)]
+		documents = [f"document {i}" for i in range(size)]
+		metadatas = [{"source": f"file_{i % 10}.txt"} for i in range(size)]
+		queries = random_unit_vectors(args.queries)
+
+		# Save and reopen memory-mapped, the way a long-running service would.
+		NumpyVectorIndex(ids, documents, metadatas, vectors, normalized=True).save(f"{workdir}/numpy")
+		index = NumpyVectorIndex.load(f"{workdir}/numpy", mmap=True)
+		latencies = time_queries(lambda q: index.query([q], n_results=args.k, include=["documents", "metadatas"]), queries)
+		report("numpy", size, latencies)
+
+		if size <= args.chroma_max:
+			collection = chromadb.PersistentClient(path=f"{workdir}/chroma").create_collection(
+				name="bench", metadata={"hnsw:space": "cosine"}
+			)
+			batch = 5000
+			for start in range(0, size, batch):
+				collection.add(
+					ids=ids[start:start + batch],
+					documents=documents[start:start + batch],
+					metadatas=metadatas[start:start + batch],
+					embeddings=vectors[start:start + batch]
+				)
+			latencies = time_queries(lambda q: collection.query(query_embeddings=[q.tolist()], n_results=args.k, include=["documents", "metadatas"]), queries)
+			report("chroma", size, latencies)
+		print()
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,111 @@
+"""
+Wall-clock time and peak memory: PyPDFLoader vs. ParallelPDFLoader.
+
+Generates a text PDF with a few hundred pages (or uses the one you pass in),
+then loads it three ways, each in a fresh subprocess so peak RSS is measured
+per run:
+
+- pypdf:    PyPDFLoader(...).load(), everything in one process
+- parallel: ParallelPDFLoader, pages parsed across a process pool (cold cache)
+- cached:   ParallelPDFLoader again, pages served from the disk cache
+
+Usage: python examples/16_pdf_loader_benchmark.py [--pages 400] [--pdf path/to/file.pdf]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def make_test_pdf(path: str, pages: int, lines_per_page: int = 45):
+	"""Write a plain PDF with `pages` pages of text, no extra dependencies needed."""
+	objects = [
+		b"<< /Type /Catalog /Pages 2 0 R >>",
+		None,  # the page tree, filled in once we know the page ids
+		b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+	]
+	page_ids = []
+	for p in range(pages):
+		lines = [f"Page {p + 1}, line {i + 1}: employees must keep receipts for all business expenses." for i in range(lines_per_page)]
+		text_ops = " ".join(f"({line}) Tj T*" for line in lines)
+		stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text_ops} ET".encode("latin-1")
+		objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+		content_id = len(objects)
+		objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+		page_ids.append(len(objects))
+	kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+	objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+	with open(path, "wb") as fh:
+		fh.write(b"%PDF-1.4\n")
+		offsets = []
+		for i, body in enumerate(objects, start=1):
+			offsets.append(fh.tell())
+			fh.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+		xref = fh.tell()
+		fh.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+		for offset in offsets:
+			fh.write(b"%010d 00000 n \n" % offset)
+		fh.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def run_variant(variant: str, pdf_path: str, cache_dir: str) -> dict:
+	"""Load the PDF one way and report time, pages and peak RSS of this process tree."""
+	start = time.perf_counter()
+	first_page = None
+	pages = 0
+
+	if variant == "pypdf":
+		from langchain_community.document_loaders import PyPDFLoader
+		docs = PyPDFLoader(pdf_path).load()
+		first_page = time.perf_counter() - start
+		pages = len(docs)
+	else:
+		from parallel_pdf_loader import ParallelPDFLoader
+		for _ in ParallelPDFLoader(pdf_path, cache_dir=cache_dir).lazy_load():
+			if first_page is None:
+				first_page = time.perf_counter() - start
+			pages += 1
+
+	seconds = time.perf_counter() - start
+	# ru_maxrss is in kilobytes on Linux; children covers the worker processes.
+	self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+	children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+	return {"variant": variant, "pages": pages, "seconds": seconds, "first_page_seconds": first_page,
+			"peak_rss_mb": self_rss, "peak_worker_rss_mb": children_rss}
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--pages", type=int, default=400)
+	parser.add_argument("--pdf", help="benchmark this PDF instead of a generated one")
+	parser.add_argument("--variant", help=argparse.SUPPRESS)
+	parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.variant:
+		print(json.dumps(run_variant(args.variant, args.pdf, args.cache_dir)))
+		sys.exit(0)
+
+	workdir = tempfile.mkdtemp(prefix="pdf_bench_")
+	try:
+		pdf_path = args.pdf or os.path.join(workdir, "bench.pdf")
+		if not args.pdf:
+			make_test_pdf(pdf_path, args.pages)
+		cache_dir = os.path.join(workdir, "cache")
+
+		print(f"{'variant':<10} {'pages':>6} {'wall (s)':>9} {'1st page (s)':>13} {'peak RSS (MB)':>14} {'workers (MB)':>13}")
+		for variant in ["pypdf", "parallel", "cached"]:
+			output = subprocess.run(
+				[sys.executable, __file__, "--variant", variant, "--pdf", pdf_path, "--cache-dir", cache_dir],
+				check=True, capture_output=True, text=True
+			).stdout
+			r = json.loads(output.strip().splitlines()[-1])
+			print(f"{variant:<10} {r['pages']:>6} {r['seconds']:>9.2f} {r['first_page_seconds']:>13.2f} {r['peak_rss_mb']:>14.1f} {r['peak_worker_rss_mb']:>13.1f}")
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
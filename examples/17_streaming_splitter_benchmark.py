@@ -0,0 +1,107 @@
+"""
+Golden check and throughput: RecursiveCharacterTextSplitter vs. the streaming splitter.
+
+First checks that StreamingRecursiveSplitter produces exactly the same chunks
+and start_index offsets as RecursiveCharacterTextSplitter for the splitter
+configs used in 05 (plain separators) and 06/09 (sentence regex), on a few
+tricky texts and on a synthetic policy corpus. Then measures throughput in MB/s.
+
+Usage: python examples/17_streaming_splitter_benchmark.py [corpus_mb]
+"""
+import sys
+import time
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from streaming_splitter import StreamingRecursiveSplitter
+from synthetic_data import synthetic_policies
+
+
+corpus_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+configs = {
+	"05 (plain separators)": dict(
+		chunk_size=800,
+		chunk_overlap=100,
+		length_function=len,
+		separators=["\n\n\n", "\n\n", ".", "!", "?", " ", ""],
+		is_separator_regex=False
+	),
+	"06/09 (sentence regex)": dict(
+		chunk_size=800,
+		chunk_overlap=100,
+		separators=[
+			r"(?<=[.?!])\s+(?=[A-Z])",
+			"\n\n",
+			"\n",
+			" ",
+			""
+		],
+		is_separator_regex=True,
+		keep_separator=True,
+		strip_whitespace=True
+	),
+	"small chunks, no kept separator": dict(
+		chunk_size=60,
+		chunk_overlap=15,
+		separators=["\n\n", "\n", " ", ""],
+		keep_separator=False
+	),
+	"separator at end": dict(
+		chunk_size=120,
+		chunk_overlap=30,
+		separators=[r"[.!?]\s+", r"\s+", ""],
+		is_separator_regex=True,
+		keep_separator="end"
+	),
+}
+
+golden_texts = [
+	"",
+	"   ",
+	"Short text.",
+	"A" * 2500,
+	"Sentence one. Sentence two! Is this three? Yes.\n\nNew paragraph here.\nAnd a line.\n\n\nTriple break " * 40,
+	"word " * 1000,
+	synthetic_policies(n_sections=60, seed=1),
+]
+
+# Golden check: identical chunks and offsets.
+for name, config in configs.items():
+	reference = RecursiveCharacterTextSplitter(add_start_index=True, **config)
+	streaming = StreamingRecursiveSplitter(add_start_index=True, **config)
+	docs = [Document(page_content=text, metadata={"source": f"text_{i}"}) for i, text in enumerate(golden_texts)]
+
+	expected = [(d.page_content, d.metadata) for d in reference.split_documents(docs)]
+	actual = [(d.page_content, d.metadata) for d in streaming.lazy_split_documents(iter(docs))]
+	assert actual == expected, f"streaming splitter output differs for config {name}"
+	print(f"golden check passed: {name} ({len(expected)} chunks)")
+
+# Throughput on a larger synthetic corpus.
+corpus = []
+size = 0
+seed = 0
+while size < corpus_mb * 1024 * 1024:
+	text = synthetic_policies(n_sections=200, seed=seed)
+	corpus.append(Document(page_content=text, metadata={"source": f"policies_{seed}.txt"}))
+	size += len(text.encode("utf-8"))
+	seed += 1
+
+print(f"\nThroughput on {size / 1024 / 1024:.1f} MB of synthetic policies")
+for name, config in configs.items():
+	if name not in ("05 (plain separators)", "06/09 (sentence regex)"):
+		continue
+	for label, splitter in [
+		("RecursiveCharacterTextSplitter", RecursiveCharacterTextSplitter(add_start_index=True, **config)),
+		("StreamingRecursiveSplitter", StreamingRecursiveSplitter(add_start_index=True, **config)),
+	]:
+		start = time.perf_counter()
+		first_chunk = None
+		n_chunks = 0
+		# The reference splitter only hands out chunks once the whole list is built.
+		chunks = splitter.lazy_split_documents(corpus) if isinstance(splitter, StreamingRecursiveSplitter) else splitter.split_documents(corpus)
+		for _ in chunks:
+			if first_chunk is None:
+				first_chunk = time.perf_counter() - start
+			n_chunks += 1
+		seconds = time.perf_counter() - start
+		print(f"{name:<24} {label:<32} {size / 1024 / 1024 / seconds:6.2f} MB/s  first chunk after {first_chunk * 1000:8.1f} ms  ({n_chunks} chunks)")
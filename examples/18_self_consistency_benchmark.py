@@ -0,0 +1,71 @@
+"""
+Self-consistency as parallel short samples vs. one long-form completion.
+
+The long-form prompt from 01_chat_model_basic.py asks a single completion for
+three calculations and a verdict. The self-consistency runner sends short
+samples concurrently and stops once the vote is decided. Both run against the
+deterministic fake chat model, so the numbers only depend on the simulated
+latency and the length of the outputs.
+"""
+import asyncio
+import time
+from fakes import FakeStreamingChatModel
+from self_consistency import self_consistency
+
+
+QUESTION = "Lily has 4 times as many apples as Tom. Together, they have 50 apples. How many apples does Tom have?"
+
+LONG_FORM_PROMPT = f"""
+{QUESTION}
+
+Provide three independent calculations and explanations, then determine the most consistent result.
+"""
+
+LONG_FORM_ANSWER = """Calculation 1: Let Tom have x apples. Lily has 4x apples. Together x + 4x = 5x = 50, so x = 10.
+Tom has 10 apples and Lily has 40 apples.
+
+Calculation 2: Split the apples into equal parts. Tom has one part and Lily has four parts, five parts in total.
+Each part is 50 / 5 = 10 apples, so Tom has 10 apples.
+
+Calculation 3: Check by substitution. If Tom has 10 apples, Lily has 4 * 10 = 40 apples, and 10 + 40 = 50,
+which matches the total given in the problem, so the answer is consistent.
+
+Most consistent result: all three calculations agree that Tom has 10 apples.
+Answer: 10"""
+
+# Short samples of different lengths (so they finish at different times), one of them wrong.
+SAMPLE_ANSWERS = [
+	"Tom has x, Lily 4x, so 5x = 50 and x = 10.\nAnswer: 10",
+	"Five equal parts of 50 apples.\nAnswer: 10",
+	"Lily has 4 times as many, so Tom has 50 / 4 = 12.5, rounded.\nAnswer: 12",
+	"x + 4x = 50, so Tom has 10 apples and Lily has 40 apples, which adds up to 50.\nAnswer: 10",
+	"5x = 50 gives x = 10, so Tom has ten apples, which we can check since 10 + 40 = 50 as required.\nAnswer: 10",
+]
+
+FIRST_TOKEN_LATENCY = 0.3
+TOKEN_LATENCY = 0.02
+
+
+async def main():
+	long_form_llm = FakeStreamingChatModel(responses=[LONG_FORM_ANSWER], first_token_latency=FIRST_TOKEN_LATENCY, token_latency=TOKEN_LATENCY)
+	start = time.perf_counter()
+	long_form = await long_form_llm.ainvoke(LONG_FORM_PROMPT)
+	long_form_latency = time.perf_counter() - start
+	long_form_usage = long_form.usage_metadata
+	print(f"Long-form: {long_form_latency:.2f}s, {long_form_usage['output_tokens']} output / {long_form_usage['total_tokens']} total tokens")
+
+	sample_llm = FakeStreamingChatModel(responses=SAMPLE_ANSWERS, first_token_latency=FIRST_TOKEN_LATENCY, token_latency=TOKEN_LATENCY)
+	for threshold in (len(SAMPLE_ANSWERS), None):
+		sample_llm.calls = 0
+		result = await self_consistency(sample_llm, QUESTION, n_samples=len(SAMPLE_ANSWERS), threshold=threshold)
+		label = "wait for all" if threshold else "early stop"
+		print(f"\nSelf-consistency ({label}): {result.latency:.2f}s, answer {result.answer!r}, votes {dict(result.votes)}, "
+			  f"{result.completed} completed, {result.cancelled} cancelled")
+		print(f"  latency saved: {long_form_latency - result.latency:.2f}s ({1 - result.latency / long_form_latency:.0%})")
+		# Output tokens drive latency and cost the most; every sample repeats the (short) prompt though.
+		print(f"  output tokens: {result.usage['output_tokens']} vs {long_form_usage['output_tokens']}, "
+			  f"total tokens: {result.usage['total_tokens']} vs {long_form_usage['total_tokens']}")
+		assert result.answer == "10"
+
+
+asyncio.run(main())
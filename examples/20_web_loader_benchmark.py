@@ -0,0 +1,108 @@
+"""
+Pages/sec of the ConcurrentWebLoader against a local HTTP server.
+
+A few hundred saved-looking pages (navigation, scripts, styles, indented
+markup and lots of blank lines) are served by local_server.py with a small
+delay per request. We compare:
+
+- one page at a time: a fresh requests.get, lxml parsing and the multi-pass
+  sanitize + split from 04/05,
+- the ConcurrentWebLoader with an empty HTML cache,
+- the ConcurrentWebLoader again, when every page is answered with a 304.
+
+The sections must be identical in all three cases.
+
+python 20_web_loader_benchmark.py [n_pages] [latency_seconds]
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import lxml.html
+import requests
+from concurrent_web_loader import ConcurrentWebLoader
+from local_server import serve_directory
+from synthetic_data import synthetic_policies
+
+
+N_PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+
+def make_pages(directory: str) -> list:
+	text = synthetic_policies(n_sections=6)
+	paragraphs = [p for p in text.split("\n\n") if p.strip()]
+	names = []
+	for i in range(N_PAGES):
+		body = "\n".join(f"    <div class='para'>\n      <p>  {p}  </p>\n\n\n    </div>" for p in paragraphs[i % 3:])
+		html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <title>Policy page {i}</title>
+  <meta name="description" content="Company policy page {i}">
+  <style>.para {{ margin: 0; }}</style>
+  <script>var page = {i};</script>
+</head>
+<body>
+  <nav>
+    <a href="/">Home</a>
+    <a href="/policies">Policies</a>
+  </nav>
+
+
+  <main>
+{body}
+  </main>
+  <footer>   Page {i} &copy; Company   </footer>
+</body>
+</html>"""
+		name = f"page_{i}.html"
+		with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+			f.write(html)
+		names.append(name)
+	return names
+
+
+def sequential_sections(url: str) -> list:
+	"""What 04/05 do for one URL, with lxml instead of BeautifulSoup for the text."""
+	tree = lxml.html.document_fromstring(requests.get(url, timeout=30).content)
+	for element in list(tree.iter("script", "style", "template")):
+		element.drop_tree()
+	raw_text = re.sub(r'\n{2,}', '\n\n', tree.text_content())
+	lines = [line.strip() for line in raw_text.splitlines()]
+	text = "\n".join(lines)
+	return [s.strip() for s in text.split("\n\n") if s.strip()]
+
+
+def main():
+	root = tempfile.mkdtemp()
+	served = os.path.join(root, "served")
+	os.makedirs(served)
+	names = make_pages(served)
+	server, base = serve_directory(served, latency=LATENCY)
+	urls = [f"{base}/{name}" for name in names]
+
+	try:
+		start = time.perf_counter()
+		expected = [section for url in urls for section in sequential_sections(url)]
+		seconds = time.perf_counter() - start
+		print(f"One page at a time:        {N_PAGES / seconds:7.1f} pages/sec ({seconds:.2f}s)")
+
+		loader = ConcurrentWebLoader(urls, max_connections=16, cache_dir=os.path.join(root, "cache"))
+		for label in ("Concurrent, cold cache:", "Concurrent, 304s:"):
+			start = time.perf_counter()
+			docs = loader.load()
+			seconds = time.perf_counter() - start
+			print(f"{label:26} {N_PAGES / seconds:7.1f} pages/sec ({seconds:.2f}s)")
+			assert [doc.page_content for doc in docs] == expected, "sections differ from the sequential loader"
+
+		print(f"\n{len(docs)} sections, first page metadata: {docs[0].metadata}")
+	finally:
+		server.shutdown()
+		shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,148 @@
+"""
+Offline recall@k and latency: dense vs. BM25 vs. hybrid retrieval.
+
+Builds a synthetic policy corpus in which every section refers to its own form
+number (e.g. "form EXP-0412"), indexes it into a temporary Chroma collection
+plus a BM25 index with the IncrementalIndexer, and asks one question per
+sampled form. The relevant chunks are the ones that contain that form number.
+
+Offline, the embeddings are a hashed bag of words. They are deterministic but
+purely lexical: they know nothing about meaning or paraphrase, and the
+questions share most of their words with the relevant chunk. The offline run
+therefore only measures BM25 and exact-term matching, and says nothing about
+how much the dense side adds. Pass --real-embeddings to use get_embeddings()
+(OpenAI) for a real comparison.
+
+Hybrid runs are labelled "candidates per side / rrf_k"; "k" means each side
+contributes as many results as the final k. k/60 is the HybridRetriever
+default; with 20 candidates per side, fusion only keeps BM25's exact hits at
+rrf_k=1.
+
+python 21_hybrid_retrieval_eval.py [--sections 300] [--queries 100]
+"""
+import argparse
+import hashlib
+import random
+import re
+import shutil
+import tempfile
+import time
+import chromadb
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from bm25_index import BM25Index, bm25_path_for
+from embedding_cache import get_embeddings
+from hybrid_retriever import HybridRetriever
+from incremental_index import IncrementalIndexer, manifest_path_for
+from percentiles import percentile
+from streaming_splitter import StreamingRecursiveSplitter
+
+
+class HashingEmbeddings(Embeddings):
+	"""Bag-of-words vectors with the hashing trick, L2-normalized."""
+
+	def __init__(self, size: int = 256):
+		self.size = size
+
+	def _embed(self, text: str) -> list:
+		vector = np.zeros(self.size, dtype=np.float32)
+		for token in re.findall(r"\w+", text.lower()):
+			digest = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
+			vector[digest % self.size] += 1.0 if digest & 1 << 64 else -1.0
+		norm = np.linalg.norm(vector)
+		return (vector / norm if norm else vector).tolist()
+
+	def embed_documents(self, texts: list) -> list:
+		return [self._embed(text) for text in texts]
+
+	def embed_query(self, text: str) -> list:
+		return self._embed(text)
+
+
+TOPICS = {
+	"EXP": "expenses", "CAR": "company car", "REM": "remote work", "VAC": "vacation",
+	"SEC": "security", "TRV": "travel", "EQP": "equipment", "OVT": "overtime",
+}
+ACTIONS = ["report incidents to their manager", "keep receipts for all purchases", "eat or drink in the vehicle",
+		   "share passwords with colleagues", "book travel through the portal", "take leave with two weeks notice"]
+
+
+def make_corpus(n_sections: int, seed: int = 0) -> tuple:
+	"""Policy text where every section has its own form number, and the list of form numbers."""
+	rng = random.Random(seed)
+	sections, forms = [], []
+	codes = rng.sample(range(10000), n_sections)
+	for i, code in enumerate(codes):
+		prefix = rng.choice(list(TOPICS))
+		topic = TOPICS[prefix]
+		form = f"{prefix}-{code:04d}"
+		sentences = [f"Employees {rng.choice(['must', 'should', 'may'])} {rng.choice(ACTIONS)} under the {topic} policy."
+					 for _ in range(rng.randint(6, 12))]
+		sentences.insert(rng.randrange(len(sentences)), f"Requests are filed with form {form} and approved by the {topic} team.")
+		sections.append(f"{i + 1}. {topic.title()} Policy\n\n" + " ".join(sentences))
+		forms.append((form, topic))
+	return "\n\n".join(sections), forms
+
+
+def evaluate(name: str, search, questions: list, k: int):
+	"""Mean recall@k (relevant chunks found / relevant chunks) and latency percentiles."""
+	recalls, latencies = [], []
+	for question, form, relevant in questions:
+		start = time.perf_counter()
+		results = search(question, k)
+		latencies.append((time.perf_counter() - start) * 1000)
+		found = {doc_id for doc_id, text in zip(results["ids"][0], results["documents"][0]) if form in text}
+		recalls.append(len(found) / len(relevant))
+	print(f"{name:16} recall@{k:<3} {sum(recalls) / len(recalls):6.1%}   "
+		  f"p50 {percentile(latencies, 50):6.2f} ms   p95 {percentile(latencies, 95):6.2f} ms")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sections", type=int, default=300)
+	parser.add_argument("--queries", type=int, default=100)
+	parser.add_argument("--real-embeddings", action="store_true")
+	args = parser.parse_args()
+
+	text, forms = make_corpus(args.sections)
+	splitter = StreamingRecursiveSplitter(chunk_size=800, chunk_overlap=100)
+	chunks = splitter.split_documents([Document(page_content=text, metadata={"source": "policies.txt"})])
+	embeddings = get_embeddings() if args.real_embeddings else HashingEmbeddings()
+
+	storage_path = tempfile.mkdtemp(prefix="hybrid_eval_")
+	try:
+		collection = chromadb.PersistentClient(path=storage_path).get_or_create_collection(name="policies")
+		keyword_index = BM25Index(bm25_path_for(storage_path, collection.name))
+		indexer = IncrementalIndexer(collection, embeddings, manifest_path_for(storage_path, collection.name), keyword_index=keyword_index)
+		stats = indexer.index(chunks)
+		assert len(BM25Index(keyword_index.path)) == len(keyword_index) == collection.count()
+		print(f"{stats['added']} chunks indexed in Chroma and BM25 ({len(keyword_index.postings)} terms)\n")
+
+		def dense_search(query: str, k: int) -> dict:
+			return collection.query(query_embeddings=[embeddings.embed_query(query)], n_results=k, include=["documents", "metadatas"])
+
+		def keyword_search(query: str, k: int) -> dict:
+			return keyword_index.query([query], n_results=k)
+
+		rng = random.Random(1)
+		questions = []
+		for form, topic in rng.sample(forms, min(args.queries, len(forms))):
+			relevant = {chunk.page_content for chunk in chunks if form in chunk.page_content}
+			questions.append((f"Who approves {topic} requests filed with form {form}?", form, relevant))
+
+		if not args.real_embeddings:
+			print("Dense side: lexical stand-in embeddings, the results below only reflect keyword matching.\n")
+		evaluate("dense", dense_search, questions, k=10)
+		evaluate("dense", dense_search, questions, k=4)
+		evaluate("bm25", keyword_search, questions, k=4)
+		for candidates, rrf_k in ((None, 60), (20, 60), (20, 1)):
+			hybrid = HybridRetriever(dense_search, keyword_index, candidates=candidates, rrf_k=rrf_k)
+			evaluate(f"hybrid {candidates or 'k'}/{rrf_k}", hybrid.query, questions, k=4)
+			hybrid.close()
+	finally:
+		shutil.rmtree(storage_path)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,274 @@
+"""
+Offline benchmark of every stage of the 09 RAG pipeline.
+
+load -> split -> index -> retrieve -> prompt -> llm -> parse
+
+No API key or network needed: the embeddings and the chat model are the
+deterministic fakes from fakes.py, with configurable latency. The corpus is
+synthetic policy text of any size (1 MB to 1 GB), written as files of a few MB
+that go through load, split and index one file at a time, so even the largest
+corpus never has to fit in memory at once. Splitting uses 09's splitter
+(policy_rag.make_splitter) and indexing is the IncrementalIndexer with
+stream_ingest, with the same settings as policy_rag.ingest: embedding and
+upserting overlap there, so they are timed together as one stage. Then a set
+of questions runs through hybrid retrieval, the prompt, the fake LLM and the
+output parser.
+
+For every stage we report wall time, throughput, and (with tracemalloc, on by
+default) the peak memory allocated while the stage ran and the number of
+memory blocks it left allocated. tracemalloc slows Python down a lot, so
+compare runs with the same setting; --no-trace-memory gives clean timings.
+
+Results are written as JSON, one file per commit and size, so a regression
+shows up when comparing runs:
+
+python 22_rag_pipeline_benchmark.py --size-mb 10
+python 22_rag_pipeline_benchmark.py --size-mb 10 --compare benchmarks/rag_pipeline_<commit>_10mb.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+import chromadb
+from langchain_community.document_loaders import TextLoader
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from bm25_index import BM25Index
+from context_builder import build_context
+from fakes import FakeEmbeddings, FakeStreamingChatModel
+from hybrid_retriever import HybridRetriever
+from incremental_index import IncrementalIndexer, manifest_path_for
+from percentiles import percentile
+from policy_rag import TEMPLATE, make_splitter
+from synthetic_data import synthetic_policies
+
+
+STAGES = ["load", "split", "index", "retrieve", "prompt", "llm", "parse"]
+
+QUESTIONS = [
+	"Can I eat in the company car?",
+	"How do I report a security incident?",
+	"Do I need to keep receipts for expenses?",
+	"How much notice do I need to give for vacation?",
+	"Can I share my password with a colleague?",
+]
+
+ANSWER = "According to the company policies [1], employees must not eat or drink in the company car."
+
+
+class StageMeter:
+	"""Accumulates wall time, item counts and memory per pipeline stage."""
+
+	def __init__(self, trace_memory: bool = True):
+		self.trace_memory = trace_memory
+		self.stages = {name: {"seconds": 0.0, "items": 0, "bytes": 0, "peak_bytes": 0, "allocated_blocks": 0, "calls": []}
+					   for name in STAGES}
+
+	@contextmanager
+	def measure(self, name: str):
+		stage = self.stages[name]
+		if self.trace_memory:
+			tracemalloc.reset_peak()
+			baseline = tracemalloc.get_traced_memory()[0]
+		blocks = sys.getallocatedblocks()
+		start = time.perf_counter()
+		yield stage
+		elapsed = time.perf_counter() - start
+		stage["seconds"] += elapsed
+		stage["calls"].append(elapsed)
+		stage["allocated_blocks"] += sys.getallocatedblocks() - blocks
+		if self.trace_memory:
+			stage["peak_bytes"] = max(stage["peak_bytes"], tracemalloc.get_traced_memory()[1] - baseline)
+
+	def results(self) -> dict:
+		results = {}
+		for name, stage in self.stages.items():
+			seconds = stage["seconds"]
+			calls = [c * 1000 for c in stage["calls"]]
+			results[name] = {
+				"seconds": round(seconds, 4),
+				"items": stage["items"],
+				"items_per_sec": round(stage["items"] / seconds, 2) if seconds else None,
+				"mb_per_sec": round(stage["bytes"] / 1e6 / seconds, 2) if seconds and stage["bytes"] else None,
+				"p50_ms": round(percentile(calls, 50), 3),
+				"p95_ms": round(percentile(calls, 95), 3),
+				"peak_mb": round(stage["peak_bytes"] / 1e6, 2) if self.trace_memory else None,
+				"allocated_blocks": stage["allocated_blocks"],
+			}
+		return results
+
+
+def write_corpus(directory: str, size_mb: float, file_mb: float) -> list:
+	"""Synthetic policy files adding up to `size_mb`, returns their paths."""
+	os.makedirs(directory, exist_ok=True)
+	blocks = {}
+	paths = []
+	n_blocks = 0
+	remaining = int(size_mb * 1e6)
+	while remaining > 0:
+		path = os.path.join(directory, f"company_policies_{len(paths):05d}.txt")
+		file_bytes = min(remaining, int(file_mb * 1e6))
+		written = 0
+		with open(path, "w", encoding="utf-8") as fh:
+			while written < file_bytes:
+				# A handful of distinct blocks is enough, generating 1 GB of random text is slow.
+				seed = n_blocks % 64
+				n_blocks += 1
+				if seed not in blocks:
+					blocks[seed] = synthetic_policies(n_sections=200, seed=seed) + "\n\n"
+				block = blocks[seed][:file_bytes - written]
+				fh.write(block)
+				written += len(block.encode("utf-8"))
+		paths.append(path)
+		remaining -= written
+	return paths
+
+
+def git_commit() -> str:
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return "unknown"
+
+
+def run(args) -> dict:
+	meter = StageMeter(trace_memory=args.trace_memory)
+	embeddings = FakeEmbeddings(size=args.dim, latency=args.embed_latency)
+	llm = FakeStreamingChatModel(responses=[ANSWER], first_token_latency=args.llm_latency, token_latency=args.token_latency)
+	splitter = make_splitter()
+	prompt = ChatPromptTemplate.from_messages([("system", TEMPLATE), ("system", "Context: {context}"), ("human", "{question}")])
+	parser = StrOutputParser()
+
+	workdir = tempfile.mkdtemp(prefix="rag_bench_")
+	try:
+		paths = write_corpus(os.path.join(workdir, "data"), args.size_mb, args.file_mb)
+		collection = chromadb.PersistentClient(path=os.path.join(workdir, "chroma")).get_or_create_collection(name="company_policies")
+		keyword_index = BM25Index()  # in memory, saving a 1 GB index as JSON would dominate the run
+		indexer = IncrementalIndexer(
+			collection,
+			embeddings,
+			manifest_path=manifest_path_for(os.path.join(workdir, "chroma"), collection.name),
+			ingest_options={"max_tokens": 8000, "max_workers": args.embed_workers, "max_in_flight": 8},
+			keyword_index=keyword_index,
+		)
+
+		if args.trace_memory:
+			tracemalloc.start()
+
+		for path in paths:
+			with meter.measure("load") as stage:
+				docs = TextLoader(path, encoding="utf-8").load()
+				for doc in docs:
+					doc.metadata = {"source": os.path.basename(path), "title": "Company Policies"}
+				stage["items"] += len(docs)
+				stage["bytes"] += os.path.getsize(path)
+
+			with meter.measure("split") as stage:
+				chunks = splitter.split_documents(docs)
+				stage["items"] += len(chunks)
+				stage["bytes"] += sum(len(doc.page_content.encode("utf-8")) for doc in docs)
+			del docs
+
+			with meter.measure("index") as stage:
+				# One file at a time: the other files' chunks are not in this call.
+				index_stats = indexer.index(chunks, remove_missing_sources=False)
+				stage["items"] += index_stats["added"]
+				stage["bytes"] += sum(len(chunk.page_content.encode("utf-8")) for chunk in chunks)
+			del chunks
+
+		def vector_search(query: str, k: int) -> dict:
+			return collection.query(query_embeddings=[embeddings.embed_query(query)], n_results=k, include=["documents", "metadatas"])
+
+		hybrid = HybridRetriever(vector_search, keyword_index)
+		for i in range(args.queries):
+			question = QUESTIONS[i % len(QUESTIONS)]
+			with meter.measure("retrieve") as stage:
+				results = hybrid.query(question, k=4)
+				stage["items"] += 1
+			with meter.measure("prompt") as stage:
+				messages = prompt.invoke({"context": build_context(results), "question": question})
+				stage["items"] += 1
+			with meter.measure("llm") as stage:
+				message = llm.invoke(messages)
+				stage["items"] += 1
+			with meter.measure("parse") as stage:
+				answer = parser.invoke(message)
+				stage["items"] += 1
+		assert answer == ANSWER
+	finally:
+		if tracemalloc.is_tracing():
+			tracemalloc.stop()
+		shutil.rmtree(workdir, ignore_errors=True)
+
+	stages = meter.results()
+	return {
+		"commit": git_commit(),
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"python": platform.python_version(),
+		"params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+		"chunks": stages["split"]["items"],
+		"total_seconds": round(sum(stage["seconds"] for stage in stages.values()), 4),
+		"stages": stages,
+	}
+
+
+def print_report(report: dict, baseline: dict = None):
+	print(f"commit {report['commit']}, {report['params']['size_mb']} MB, {report['chunks']} chunks, "
+		  f"{report['params']['queries']} queries, total {report['total_seconds']:.2f}s\n")
+	header = f"{'stage':9} {'seconds':>9} {'items/s':>10} {'MB/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>9} {'blocks':>9}"
+	if baseline:
+		header += f" {'vs base':>8}"
+	print(header)
+	def cell(value, width: int, digits: int) -> str:
+		return f"{value:{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+	for name, stage in report["stages"].items():
+		line = (f"{name:9} {stage['seconds']:9.3f} {cell(stage['items_per_sec'], 10, 1)} {cell(stage['mb_per_sec'], 8, 2)} "
+				f"{stage['p50_ms']:9.2f} {stage['p95_ms']:9.2f} {cell(stage['peak_mb'], 9, 2)} {stage['allocated_blocks']:9d}")
+		if baseline:
+			# Runs from before a stage was renamed have nothing to compare it with.
+			base_seconds = baseline["stages"].get(name, {}).get("seconds")
+			line += f" {stage['seconds'] / base_seconds:7.2f}x" if base_seconds else f" {'-':>8}"
+		print(line)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--size-mb", type=float, default=1, help="corpus size, 1 to 1000")
+	parser.add_argument("--file-mb", type=float, default=4, help="size of each corpus file")
+	parser.add_argument("--dim", type=int, default=1536, help="embedding dimensions")
+	parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embedding request")
+	parser.add_argument("--embed-workers", type=int, default=4)
+	parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to the first token")
+	parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per generated token")
+	parser.add_argument("--queries", type=int, default=20)
+	parser.add_argument("--trace-memory", action=argparse.BooleanOptionalAction, default=True)
+	parser.add_argument("--output", help="JSON results path (default: benchmarks/rag_pipeline_<commit>_<size>mb.json)")
+	parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+	args = parser.parse_args()
+	if not 0 < args.size_mb <= 1000:
+		parser.error("--size-mb must be between 0 and 1000")
+
+	report = run(args)
+	baseline = None
+	if args.compare:
+		with open(args.compare, "r", encoding="utf-8") as fh:
+			baseline = json.load(fh)
+	print_report(report, baseline)
+
+	output = args.output or os.path.join("benchmarks", f"rag_pipeline_{report['commit']}_{args.size_mb:g}mb.json")
+	os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+	with open(output, "w", encoding="utf-8") as fh:
+		json.dump(report, fh, indent=1)
+	print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,137 @@
+"""
+Cold start of the RAG entry points, measured with python -X importtime.
+
+Each command is run in a fresh interpreter a few times; the table shows the
+median wall time and the median total import time (the cumulative time of
+every top-level import, as reported by -X importtime).
+
+  before        the module-level imports 09_summarization_rag.py had before it
+                got a main(); the old script then also downloaded and ingested
+  09 --help     argument parsing only, nothing heavy is imported
+  09 pipeline   what 09 does before its first LLM call: open the ingested
+                collection and BM25 index, build the chain and the caches
+  client        rag_client.py asking a running worker (a stand-in pipeline
+                that echoes the question, so only start-up and the socket count)
+
+Runs offline: FAKE_EMBEDDINGS=1 and a generated policy file in a temp directory.
+
+python 23_cold_start_benchmark.py [--runs 5]
+"""
+import argparse
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from rag_worker import TcpRagServer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BEFORE_IMPORTS = """
+import logging, os, chromadb
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_community.document_loaders import TextLoader
+from streaming_splitter import StreamingRecursiveSplitter
+from tokenizer import count_tokens
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.documents import Document
+from dotenv import load_dotenv
+from downloader import Downloader, DownloadError
+from context_builder import build_context
+from embedding_cache import get_embeddings
+from incremental_index import IncrementalIndexer, manifest_path_for
+from bm25_index import BM25Index, bm25_path_for
+from hybrid_retriever import HybridRetriever
+from numpy_index import NumpyVectorIndex
+from semantic_cache import SemanticCache
+from tracing import get_tracer
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+
+class EchoRag:
+	def ask(self, question: str) -> str:
+		return question
+
+	def stats(self) -> dict:
+		return {}
+
+
+def top_level_import_ms(stderr: str) -> float:
+	"""Sum of the cumulative times of the top-level (unindented) imports."""
+	total_us = 0
+	for line in stderr.splitlines():
+		match = IMPORT_LINE.match(line)
+		if match and not match.group(2).startswith(" "):
+			total_us += int(match.group(1))
+	return total_us / 1000
+
+
+def measure(command: list, env: dict, cwd: str, runs: int) -> tuple:
+	walls, imports = [], []
+	for _ in range(runs):
+		start = time.perf_counter()
+		completed = subprocess.run([sys.executable, "-X", "importtime", *command], env=env, cwd=cwd, capture_output=True, text=True)
+		walls.append((time.perf_counter() - start) * 1000)
+		imports.append(top_level_import_ms(completed.stderr))
+	return statistics.median(walls), statistics.median(imports)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--runs", type=int, default=5)
+	args = parser.parse_args()
+
+	workdir = tempfile.mkdtemp(prefix="cold_start_")
+	env = {
+		**os.environ,
+		"PYTHONPATH": HERE,
+		"FAKE_EMBEDDINGS": "1",
+		"OPENAI_API_KEY": "sk-benchmark",
+	}
+	script = os.path.join(HERE, "09_summarization_rag.py")
+	client = os.path.join(HERE, "rag_client.py")
+	try:
+		os.makedirs(os.path.join(workdir, "data"))
+		with open(os.path.join(workdir, "data", "company_policies.txt"), "w", encoding="utf-8") as f:
+			f.write("\n\n".join(f"{i}. Policy {i}\n\nEmployees must keep receipts for section {i}." for i in range(200)))
+		# The download fails (no network is assumed) and the local copy is ingested.
+		subprocess.run([sys.executable, script, "--ingest-only"], env=env, cwd=workdir, capture_output=True, check=True)
+
+		if hasattr(socket, "AF_UNIX"):
+			# Only defined where Unix sockets exist (not on Windows).
+			from rag_worker import UnixRagServer
+			address = os.path.join(workdir, "worker.sock")
+			worker = UnixRagServer(address, make_rag=EchoRag, ingest=None)
+		else:
+			worker = TcpRagServer(("127.0.0.1", 0), make_rag=EchoRag, ingest=None)
+			address = f"127.0.0.1:{worker.server_address[1]}"
+		threading.Thread(target=worker.serve_forever, daemon=True).start()
+
+		commands = {
+			"before": ["-c", BEFORE_IMPORTS],
+			"09 --help": [script, "--help"],
+			"09 pipeline": ["-c", "from policy_rag import PolicyRag; PolicyRag()"],
+			"client": [client, "--address", address, "Can I eat in the company car?"],
+		}
+		print(f"{'':14} {'wall ms':>9} {'imports ms':>11}   (median of {args.runs})")
+		for name, command in commands.items():
+			wall, imports = measure(command, env, workdir, args.runs)
+			print(f"{name:14} {wall:9.0f} {imports:11.0f}")
+		worker.shutdown()
+		worker.server_close()
+	finally:
+		shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+"""
+Prompt size per turn: full history vs. ConversationMemory, measured offline.
+
+Plays a long conversation against the 10_gradio_chatbot_demo.py prompt with
+fake chat models: one answers the questions (0.05s per answer), one writes
+the rolling summaries (0.15s each, on a background thread, so several turns
+are folded into each summary). Prints the prompt tokens at a few turns for
+both strategies, the time the memory adds to each request, and how many
+summaries were written.
+
+python 24_conversation_memory_benchmark.py [--turns 100]
+"""
+import argparse
+import time
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.output_parsers import StrOutputParser
+from conversation_memory import ConversationMemory, llm_summarizer
+from fakes import FakeStreamingChatModel
+from percentiles import percentile
+from tokenizer import count_tokens
+
+
+prompt = ChatPromptTemplate([
+	("system", "You are a helpful AI Assistant. Answer the User's queries succinctly in one sentence."),
+	MessagesPlaceholder("history"),
+	("human", "{usr_query}")
+])
+
+
+def prompt_tokens(history: list, question: str) -> int:
+	messages = prompt.format_messages(history=history, usr_query=question)
+	return sum(count_tokens(message.content) for message in messages)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--turns", type=int, default=100)
+	args = parser.parse_args()
+
+	answer = "Apples are rich in fiber, vitamins and antioxidants, which support digestion and a healthy heart."
+	summary = " ".join(["The user asked about the health benefits of fruit and the AI answered briefly."] * 6)
+	chain = prompt | FakeStreamingChatModel(responses=[answer], first_token_latency=0.05) | StrOutputParser()
+	summarizer_llm = FakeStreamingChatModel(responses=[summary], first_token_latency=0.15)
+	memory = ConversationMemory(summarizer=llm_summarizer(summarizer_llm), window_turns=4, max_tokens=1500)
+
+	naive_history = []
+	overheads, bounded_sizes = [], []
+	report_at = {1, 5, 10, 25, 50, 100, args.turns}
+	print(f"{'turn':>5} {'full history':>13} {'memory':>8}   prompt tokens")
+	for turn in range(1, args.turns + 1):
+		question = f"Question {turn}: why are apples healthy, and how many should I eat per day?"
+
+		start = time.perf_counter()
+		history = memory.history("user")
+		overheads.append((time.perf_counter() - start) * 1000)
+		full, bounded = prompt_tokens(naive_history, question), prompt_tokens(history, question)
+		bounded_sizes.append(bounded)
+		response = chain.invoke({"usr_query": question, "history": history})
+
+		start = time.perf_counter()
+		memory.add_turn("user", question, response)
+		overheads[-1] += (time.perf_counter() - start) * 1000
+		naive_history.extend([("human", question), ("ai", answer)])
+
+		if turn in report_at:
+			print(f"{turn:5} {full:13} {bounded:8}")
+
+	memory.wait()
+	print(f"\nMemory prompt tokens over all turns: p50 {percentile(bounded_sizes, 50)}, max {max(bounded_sizes)}")
+	print(f"Memory on the request path: p50 {percentile(overheads, 50):.3f} ms, p99 {percentile(overheads, 99):.3f} ms per turn")
+	print(f"Summarizer calls: {summarizer_llm.calls} (0.15s each, in the background)")
+	print(f"Memory: {memory.stats()}")
+	memory.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,139 @@
+"""
+Check the prefix-stable prompt layouts against the old ones, offline.
+
+For the prompts of 02_prompt_templates.py, 09_summarization_rag.py
+(policy_rag.py) and 11_gradio_rag.py this renders the old layout (variables in
+or before the instructions) and the new one (static text first) with the same
+inputs. It asserts that:
+
+1. PrefixStablePrompt renders exactly the text of the prompt it wraps (split
+   messages are joined again before comparing);
+2. every input value appears exactly once in both layouts;
+3. for the chat prompts, both layouts contain the same lines, only in a
+   different order and in different messages.
+
+Then it prints the static (cacheable) prefix and its share of the prompt for
+each layout, and the render time with and without the cached static part.
+Exits with an error if a check fails.
+
+python 25_prompt_layout_check.py
+"""
+import sys
+import time
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from policy_rag import TEMPLATE as POLICY_TEMPLATE
+from prompt_layout import PrefixStablePrompt, prefix_stats
+
+
+OLD_02 = """
+Take on the role of {role} and answer the User's queries succinctly in a few sentences.
+
+{history}
+
+QUERY: {usr_query}
+"""
+
+NEW_02 = """
+Take on the role of the scientist named under ROLE and answer the User's queries succinctly in a few sentences.
+
+{history}
+
+ROLE: {role}
+
+QUERY: {usr_query}
+"""
+
+OLD_09 = POLICY_TEMPLATE + "\nContext: {context}\n"
+
+RAG_11 = """You are an AI Assistant. Answer the User's queries succinctly in one sentence.
+
+Use the context to factually answer the question. Let the user know if you do not have enough information or context to answer a specific question.
+"""
+
+CONTEXT = "\n\n".join(
+	f"[{i}] company_policies.txt\nEmployees must keep receipts for all purchases under the expenses policy, section {i}. "
+	"Requests are filed with the expense form and approved by the finance team within ten working days."
+	for i in range(1, 5)
+)
+HISTORY = [("human", "Do I need receipts for taxis?"), ("ai", "Yes, keep receipts for all purchases, taxis included.")]
+
+CASES = {
+	"02": (
+		PromptTemplate.from_template(OLD_02),
+		PromptTemplate.from_template(NEW_02),
+		{"role": "Marie Curie", "usr_query": "Why is radium dangerous?", "history": "Conversation so far:\nHuman: Hi\nAI: Hello"},
+	),
+	"09": (
+		ChatPromptTemplate.from_messages([("system", OLD_09), ("human", "{question}")]),
+		ChatPromptTemplate.from_messages([("system", POLICY_TEMPLATE), ("system", "Context: {context}"), ("human", "{question}")]),
+		{"context": CONTEXT, "question": "Can I eat in the company car?"},
+	),
+	"11": (
+		ChatPromptTemplate([("system", RAG_11 + "\nContext: {context}\n"), MessagesPlaceholder("history"), ("human", "{usr_query}")]),
+		ChatPromptTemplate([("system", RAG_11), MessagesPlaceholder("history"), ("system", "Context: {context}"), ("human", "{usr_query}")]),
+		{"context": CONTEXT, "usr_query": "And for the train?", "history": HISTORY},
+	),
+}
+
+
+def segments(prompt_value) -> list:
+	"""(role, text) per message, consecutive messages of one role joined; one segment for a string prompt."""
+	if not hasattr(prompt_value, "messages"):
+		return [("text", prompt_value.text)]
+	joined = []
+	for message in prompt_value.messages:
+		if joined and joined[-1][0] == message.type:
+			joined[-1] = (message.type, joined[-1][1] + message.content)
+		else:
+			joined.append((message.type, message.content))
+	return joined
+
+
+def lines(prompt_value) -> list:
+	return sorted(line.strip() for _, text in segments(prompt_value) for line in text.splitlines() if line.strip())
+
+
+def values(inputs: dict) -> list:
+	found = []
+	for value in inputs.values():
+		found.extend(text for _, text in value) if isinstance(value, list) else found.append(value)
+	return found
+
+
+def render_us(prompt, inputs: dict, repeat: int = 2000) -> float:
+	start = time.perf_counter()
+	for _ in range(repeat):
+		prompt.invoke(inputs)
+	return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+	failures = []
+	print(f"{'prompt':8} {'layout':6} {'static tokens':>13} {'prompt tokens':>13} {'ratio':>6} {'render us':>10} {'plain us':>9}")
+	for name, (old, new, inputs) in CASES.items():
+		rendered = {}
+		for layout, prompt in (("old", old), ("new", new)):
+			stable = PrefixStablePrompt(prompt, name=f"{name}_{layout}")
+			plain_value, stable_value = prompt.invoke(inputs), stable.invoke(inputs)
+			if segments(plain_value) != segments(stable_value):
+				failures.append(f"{name} {layout}: PrefixStablePrompt output differs from the wrapped prompt")
+			text = "\n".join(text for _, text in segments(plain_value))
+			for value in values(inputs):
+				if text.count(value) != 1:
+					failures.append(f"{name} {layout}: {value[:30]!r} appears {text.count(value)} times")
+			rendered[layout] = plain_value
+
+			stats = prefix_stats()[f"{name}_{layout}"]
+			print(f"{name:8} {layout:6} {stats['static_prefix_tokens']:13} {stats['mean_prompt_tokens']:13.0f} "
+				  f"{stats['cacheable_prefix_ratio']:6.1%} {render_us(stable, inputs):10.1f} {render_us(prompt, inputs):9.1f}")
+
+		if isinstance(old, ChatPromptTemplate) and lines(rendered["old"]) != lines(rendered["new"]):
+			failures.append(f"{name}: the old and new layouts don't contain the same lines")
+
+	if failures:
+		sys.exit("\n".join(["FAILED:"] + failures))
+	print("\nAll layouts render the same content; static text comes first in the new ones.")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,92 @@
+"""
+Bulk movie extraction: invoke + JsonOutputParser vs. streaming validation, offline.
+
+A fake chat model answers the 03_output_parsers.py prompt for many titles,
+token by token with simulated latency. Most answers are the JSON object
+followed by a polite sentence; some start with prose instead of JSON, and
+some give the year as words. Both strategies run with the same concurrency:
+
+  invoke     abatch(prompt | llm | JsonOutputParser()), every completion runs to the end
+  streaming  aextract_many(): fields are validated as they arrive and the
+             stream is closed when the object is complete or invalid
+
+python 26_streaming_json_benchmark.py [--titles 200] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+from fakes import FakeStreamingChatModel, _split_tokens
+from percentiles import percentile
+from streaming_json import aextract_many
+
+
+PROMPT = """Generate information about "{movie_name}" in JSON format with the keys title, director, year and genre."""
+
+GENRES = ["Drama", "Comedy", "Sci-Fi", "Thriller", "Animation", "Western"]
+CHATTER = " I hope this helps! Let me know if you would like to know more about the cast, the soundtrack or the making of this film."
+PROSE = ("Sure! Here is some information about {title}. It was directed by {director} and released in {year}. "
+		 "It is widely considered one of the most influential films of its genre, and its story, score and visual "
+		 "style have been discussed by critics and audiences for decades.")
+
+
+def make_answer(title: str, rng: random.Random) -> str:
+	director, year = f"Director {rng.randint(1, 500)}", rng.randint(1930, 2024)
+	roll = rng.random()
+	if roll < 0.1:
+		return PROSE.format(title=title, director=director, year=year)
+	obj = {"title": title, "director": director, "year": year, "genre": rng.choice(GENRES)}
+	if roll < 0.2:
+		obj["year"] = "nineteen ninety-nine"
+	return json.dumps(obj, indent=2) + "\n" + CHATTER
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--titles", type=int, default=200)
+	parser.add_argument("--concurrency", type=int, default=16)
+	args = parser.parse_args()
+
+	rng = random.Random(0)
+	titles = [f"Movie {i}" for i in range(args.titles)]
+	answers = {title: make_answer(title, rng) for title in titles}
+
+	def respond(prompt_text: str) -> str:
+		return answers[re.search(r'"(Movie \d+)"', prompt_text).group(1)]
+
+	llm = FakeStreamingChatModel(respond=respond, first_token_latency=0.2, token_latency=0.01)
+	prompt = PromptTemplate.from_template(PROMPT)
+	inputs = [{"movie_name": title} for title in titles]
+	full_tokens = sum(len(_split_tokens(answer)) for answer in answers.values())
+
+	print(f"{'':10} {'valid':>6} {'invalid':>8} {'seconds':>8} {'objects/s':>10} {'tokens':>7} {'p50 first field':>16}")
+
+	start = time.perf_counter()
+	results = asyncio.run((prompt | llm | JsonOutputParser()).abatch(inputs, config={"max_concurrency": args.concurrency}, return_exceptions=True))
+	elapsed = time.perf_counter() - start
+	# JsonOutputParser only checks the syntax; the schema check comes afterwards.
+	valid = sum(isinstance(r, dict) and isinstance(r.get("year"), int) for r in results)
+	print(f"{'invoke':10} {valid:6} {len(results) - valid:8} {elapsed:8.2f} {valid / elapsed:10.1f} {full_tokens:7} {'(whole answer)':>16}")
+
+	start = time.perf_counter()
+	results = asyncio.run(aextract_many(prompt | llm, inputs, max_concurrency=args.concurrency))
+	elapsed = time.perf_counter() - start
+	valid = sum(r.ok for r in results)
+	tokens = sum(r.chunks for r in results)
+	first_field = percentile([r.first_field_seconds for r in results if r.first_field_seconds is not None], 50)
+	print(f"{'streaming':10} {valid:6} {len(results) - valid:8} {elapsed:8.2f} {valid / elapsed:10.1f} {tokens:7} {first_field * 1000:13.0f} ms")
+
+	errors = sorted({re.sub(r" at character \d+|, got .*", "", r.error) for r in results if not r.ok})
+	print(f"\nStreaming errors: {errors}")
+	# closed_early is also set when the answer ended with the object, so compare against the full answers.
+	cut_off = sum(r.chunks < len(_split_tokens(answers[r.inputs["movie_name"]])) for r in results)
+	print(f"Streams cut off with tokens still to come: {cut_off}/{len(results)}, "
+		  f"{full_tokens - tokens} of {full_tokens} answer tokens never generated")
+
+
+if __name__ == "__main__":
+	main()
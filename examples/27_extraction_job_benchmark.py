@@ -0,0 +1,125 @@
+"""
+Crash, resume and retry check for extraction_jobs.py, with a fake model.
+
+Writes a JSONL file of movie titles, starts the job in a child process and
+kills it with SIGKILL part-way (no clean shutdown, the output may end in a
+torn line), then resumes it in this process. The fake model answers through
+the real movie_extractor(): some first answers are prose instead of JSON,
+some calls fail like an overloaded API, a few titles never get a valid
+answer. The model has a rate limiter, as in extraction_jobs.main().
+
+Checks that every input row is in the output exactly once and that no row was
+extracted twice, and prints throughput, retries and failures.
+
+python 27_extraction_job_benchmark.py [--rows 3000] [--concurrency 64] [--kill-after 3]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from extraction_jobs import ExtractionJob, movie_extractor
+from fakes import FakeStreamingChatModel
+
+
+class Overloaded(Exception):
+	pass
+
+
+def fake_llm(seed: int = 0, requests_per_second: float = 500):
+	"""Valid JSON for most titles; prose or an error on some first attempts; never valid for 'cursed' titles."""
+	rng = random.Random(seed)
+
+	def respond(prompt_text: str) -> str:
+		title = re.search(r'about "([^"]+)"', prompt_text).group(1)
+		retry = "previous answer was rejected" in prompt_text
+		roll = rng.random()
+		if "cursed" in title:
+			return f"I'm sorry, I don't have reliable information about {title}."
+		if not retry and roll < 0.03:
+			raise Overloaded("429 Too Many Requests")
+		if not retry and roll < 0.15:
+			return f"Sure! {title} is a film by Director {len(title)}, released in 1999."
+		return json.dumps({"title": title, "director": f"Director {len(title)}", "year": 1950 + len(title), "genre": "Drama"})
+
+	return FakeStreamingChatModel(
+		respond=respond, first_token_latency=0.05, token_latency=0.002,
+		rate_limiter=InMemoryRateLimiter(requests_per_second=requests_per_second, check_every_n_seconds=0.01, max_bucket_size=64),
+	)
+
+
+def run_job(input_path: str, output_path: str, concurrency: int, progress=sys.stderr):
+	job = ExtractionJob(movie_extractor(fake_llm(seed=os.getpid())), input_path, output_path,
+						concurrency=concurrency, retry_delay=0.05, checkpoint_seconds=0.5)
+	return asyncio.run(job.run(progress=progress))
+
+
+def read_output(path: str) -> list:
+	with open(path, encoding="utf-8") as f:
+		return [json.loads(line) for line in f]
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--rows", type=int, default=3000)
+	parser.add_argument("--concurrency", type=int, default=64)
+	parser.add_argument("--kill-after", type=float, default=3.0, help="seconds before the first run is killed")
+	parser.add_argument("--run", nargs=2, metavar=("INPUT", "OUTPUT"), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	# Rows that fail every attempt are logged as errors; expected here, keep the progress line readable.
+	logging.disable(logging.ERROR)
+	if args.run:
+		run_job(*args.run, concurrency=args.concurrency, progress=None)
+		return
+
+	workdir = tempfile.mkdtemp(prefix="extraction_job_")
+	try:
+		input_path = os.path.join(workdir, "movies.jsonl")
+		output_path = os.path.join(workdir, "movies.out.jsonl")
+		with open(input_path, "w", encoding="utf-8") as f:
+			for i in range(args.rows):
+				f.write(json.dumps({"title": f"Movie {i}" + (" (cursed)" if i % 200 == 7 else "")}) + "\n")
+
+		child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--concurrency", str(args.concurrency), "--run", input_path, output_path])
+		time.sleep(args.kill_after)
+		child.send_signal(signal.SIGKILL)
+		child.wait()
+		with open(output_path, "rb") as f:
+			written = f.read()
+		torn = not written.endswith(b"\n")
+		before = written.count(b"\n")
+		print(f"Killed after {args.kill_after}s: {before} complete lines in the output{', last line torn' if torn else ''}")
+
+		stats = run_job(input_path, output_path, args.concurrency)
+		records = read_output(output_path)
+		counts = Counter(record["row"] for record in records)
+		duplicates = [row for row, n in counts.items() if n > 1]
+		missing = set(range(args.rows)) - set(counts)
+		failed = [record for record in records if "error" in record]
+
+		print(f"\nResumed: {stats.skipped} rows skipped, {stats.rows} processed in {stats.seconds:.2f}s "
+			  f"({stats.rows / stats.seconds:.0f} rows/s, concurrency {args.concurrency})")
+		print(f"Attempts: {stats.succeeded} ok, {stats.parse_errors} parse errors, {stats.api_errors} API errors, "
+			  f"{stats.retries} retries, error rate {stats.error_rate:.1%}")
+		print(f"Output: {len(records)} lines, {len(failed)} rows failed every attempt "
+			  f"(expected {sum(1 for i in range(args.rows) if i % 200 == 7)})")
+		if duplicates or missing:
+			sys.exit(f"FAILED: {len(duplicates)} duplicate rows, {len(missing)} missing rows")
+		print("Every row is in the output exactly once.")
+	finally:
+		shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+	main()
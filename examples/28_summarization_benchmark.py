@@ -0,0 +1,82 @@
+"""
+Long-document summarization: sequential refine vs. map-reduce, offline.
+
+A synthetic policy document is split into token-sized chunks with the
+streaming splitter, and a fake chat model with simulated latency answers
+every summarization prompt with a shorter text. Three runs:
+
+  refine          one call per chunk, each waiting for the previous summary
+  map-reduce      concurrent map, collapse under the token budget, one reduce
+  edited          map-reduce again after a few sections of the document were
+                  changed, with the summaries of the first run in the cache
+
+python 28_summarization_benchmark.py [--sections 200] [--chunk-tokens 500] [--concurrency 8] [--edits 3]
+"""
+import argparse
+import hashlib
+import random
+import re
+from fakes import FakeStreamingChatModel
+from streaming_splitter import StreamingRecursiveSplitter
+from summarizer import MapReduceSummarizer, SummaryCache, refine_summarize
+from synthetic_data import synthetic_policies
+from tokenizer import count_tokens
+
+
+def respond(prompt_text: str) -> str:
+	"""About 60 words of the text to summarize, so every summary is much shorter than its input."""
+	words = prompt_text.split()[-60:]
+	return f"Summary {hashlib.sha256(prompt_text.encode()).hexdigest()[:8]}: " + " ".join(words)
+
+
+def split(text: str, chunk_tokens: int) -> list:
+	splitter = StreamingRecursiveSplitter(chunk_size=chunk_tokens, chunk_overlap=0, length_function=count_tokens,
+										  separators=["\n\n", ".", " ", ""])
+	return splitter.split_text(text)
+
+
+def edit(text: str, n: int, seed: int = 1) -> str:
+	"""Rewrite one sentence in each of n random sections."""
+	sections = text.split("\n\n")
+	rng = random.Random(seed)
+	for i in rng.sample(range(1, len(sections), 2), n):
+		sections[i] = re.sub(r"Employees \w+", "Contractors must always", sections[i], count=1)
+	return "\n\n".join(sections)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sections", type=int, default=200)
+	parser.add_argument("--chunk-tokens", type=int, default=500)
+	parser.add_argument("--token-budget", type=int, default=3000)
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--edits", type=int, default=3, help="sections changed before the third run")
+	args = parser.parse_args()
+
+	text = synthetic_policies(n_sections=args.sections)
+	chunks = split(text, args.chunk_tokens)
+	print(f"Document: {count_tokens(text)} tokens, {len(chunks)} chunks of at most {args.chunk_tokens} tokens\n")
+
+	llm = FakeStreamingChatModel(respond=respond, first_token_latency=0.1, token_latency=0.002)
+	cache = SummaryCache(":memory:")
+	summarizer = MapReduceSummarizer(llm, token_budget=args.token_budget, max_concurrency=args.concurrency, cache=cache)
+
+	print(f"{'':12} {'seconds':>8} {'LLM calls':>10} {'cache hits':>11} {'levels':>7}")
+	runs = [("refine", lambda: refine_summarize(llm, chunks)), ("map-reduce", lambda: summarizer.summarize(chunks))]
+	edited = split(edit(text, args.edits), args.chunk_tokens)
+	runs.append(("edited", lambda: summarizer.summarize(edited)))
+
+	for name, run in runs:
+		calls_before = llm.calls
+		result = run()
+		# The model's own counter, to make sure nothing bypassed the accounting.
+		assert llm.calls - calls_before == result.llm_calls
+		print(f"{name:12} {result.seconds:8.2f} {result.llm_calls:10} {result.cache_hits:11} {result.levels:7}")
+
+	changed = len(set(edited) - set(chunks))
+	print(f"\n{changed} chunks changed by the edit; refine would need {len(edited)} calls again.")
+	cache.close()
+
+
+if __name__ == "__main__":
+	main()
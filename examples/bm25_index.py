@@ -0,0 +1,144 @@
+"""
+A small, persistent BM25 keyword index over the same chunks as Chroma.
+
+Dense retrieval is good at meaning but often misses exact policy terms, form
+numbers and names. BM25 ranks chunks by the query terms they contain, weighted
+by how rare each term is. The index is an inverted index (term -> {chunk id:
+term frequency}) that is updated chunk by chunk: the IncrementalIndexer adds
+new chunks and removes stale ones at ingest, and the index is saved as JSON
+next to the Chroma storage.
+
+`query` returns a dict shaped like Chroma's, with the negated BM25 score as
+the distance, so it can be fused with vector results or fed to build_context.
+"""
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+	"a an and are as at be by can do does for from has have how i if in is it its me my no not of on or our "
+	"should so that the their them there they this to was we what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+	"""Lowercased word tokens without stopwords."""
+	return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def bm25_path_for(storage_path: str, collection_name: str) -> str:
+	"""Where the keyword index of a collection lives, right next to the Chroma files."""
+	return os.path.join(storage_path, f"{collection_name}.bm25.json")
+
+
+class BM25Index:
+	"""Inverted index with Okapi BM25 scoring, updated incrementally."""
+
+	def __init__(self, path: str = None, k1: float = 1.5, b: float = 0.75):
+		# path=None keeps the index in memory only.
+		self.path = path
+		self.k1 = k1
+		self.b = b
+		self.documents = {}  # id -> [text, metadata]
+		self.lengths = {}  # id -> number of tokens
+		self.postings = defaultdict(dict)  # term -> {id: term frequency}
+		self.total_length = 0
+		if path and os.path.isfile(path):
+			self._load()
+
+	def __len__(self) -> int:
+		return len(self.documents)
+
+	def __contains__(self, doc_id: str) -> bool:
+		return doc_id in self.documents
+
+	def _load(self):
+		with open(self.path, "r", encoding="utf-8") as fh:
+			data = json.load(fh)
+		self.documents = data["documents"]
+		self.lengths = data["lengths"]
+		self.postings = defaultdict(dict, data["postings"])
+		self.total_length = sum(self.lengths.values())
+
+	def save(self):
+		if not self.path:
+			return
+		os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+		# Write to a temporary file first so a crash never leaves half an index.
+		tmp_path = f"{self.path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as fh:
+			json.dump({"documents": self.documents, "lengths": self.lengths, "postings": self.postings}, fh)
+		os.replace(tmp_path, self.path)
+
+	def add(self, ids: list, documents: list, metadatas: list = None):
+		"""Index chunks; an id that is already indexed is replaced."""
+		metadatas = metadatas or [{}] * len(ids)
+		for doc_id, text, metadata in zip(ids, documents, metadatas):
+			if doc_id in self.documents:
+				self.remove([doc_id])
+			counts = Counter(tokenize(text))
+			for term, tf in counts.items():
+				self.postings[term][doc_id] = tf
+			self.documents[doc_id] = [text, metadata or {}]
+			self.lengths[doc_id] = sum(counts.values())
+			self.total_length += self.lengths[doc_id]
+
+	def metadata(self, doc_id: str) -> dict:
+		return self.documents[doc_id][1]
+
+	def update_metadata(self, ids: list, metadatas: list):
+		"""Replace the metadata of indexed chunks; their text and postings stay as they are."""
+		for doc_id, metadata in zip(ids, metadatas):
+			self.documents[doc_id][1] = metadata or {}
+
+	def remove(self, ids: list):
+		for doc_id in ids:
+			if doc_id not in self.documents:
+				continue
+			text, _ = self.documents.pop(doc_id)
+			for term in set(tokenize(text)):
+				postings = self.postings.get(term)
+				if postings is not None:
+					postings.pop(doc_id, None)
+					if not postings:
+						del self.postings[term]
+			self.total_length -= self.lengths.pop(doc_id)
+
+	def search(self, query: str, k: int = 10) -> list:
+		"""Top k (id, score) pairs for a query, best first."""
+		n_docs = len(self.documents)
+		if not n_docs:
+			return []
+		avg_length = self.total_length / n_docs or 1.0
+		scores = defaultdict(float)
+		for term in set(tokenize(query)):
+			postings = self.postings.get(term)
+			if not postings:
+				continue
+			# Rare terms weigh more; the +1 keeps the weight positive for common terms.
+			idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+			for doc_id, tf in postings.items():
+				norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avg_length)
+				scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+		return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+	def query(self, query_texts: list, n_results: int = 10, where: dict = None, include: list = ("documents", "metadatas", "distances")) -> dict:
+		"""Chroma-style query by text; `where` supports equality on metadata fields."""
+		results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+		for text in query_texts:
+			# Ask for extra hits when filtering, the filter is applied after scoring.
+			hits = self.search(text, n_results if not where else len(self.documents))
+			if where:
+				hits = [(doc_id, score) for doc_id, score in hits
+						if all(self.documents[doc_id][1].get(key) == value for key, value in where.items())][:n_results]
+			results["ids"].append([doc_id for doc_id, _ in hits])
+			results["documents"].append([self.documents[doc_id][0] for doc_id, _ in hits])
+			results["metadatas"].append([self.documents[doc_id][1] for doc_id, _ in hits])
+			results["distances"].append([-score for _, score in hits])
+		return {key: value for key, value in results.items() if key == "ids" or key in include}
@@ -0,0 +1,80 @@
+"""
+Turn raw Chroma query results into a compact, cited context block.
+
+Stringifying the whole `collection.query` dict wastes prompt tokens on nested
+lists, metadata and the text that consecutive chunks share (the splitters use
+`chunk_overlap=100`). The context builder:
+
+1. drops duplicate chunks,
+2. merges overlapping or adjacent chunks from the same source into one passage
+   (using the `start_index` the splitter adds with `add_start_index=True`),
+3. keeps the most relevant passages that fit in a token budget,
+4. formats them as numbered passages with their source, e.g. "[1] file.txt".
+"""
+from tokenizer import count_tokens
+
+
+def _merge_passages(hits: list, max_gap: int) -> list:
+	"""Merge hits of one source whose character spans overlap or touch."""
+	positioned = [hit for hit in hits if hit["start"] is not None]
+	passages = [dict(hit) for hit in hits if hit["start"] is None]
+
+	current = None
+	for hit in sorted(positioned, key=lambda h: h["start"]):
+		end = hit["start"] + len(hit["text"])
+		if current is not None and hit["start"] <= current["end"] + max_gap:
+			if end > current["end"]:
+				if hit["start"] < current["end"]:
+					# Both texts are slices of the same source: skip the shared part.
+					current["text"] += hit["text"][current["end"] - hit["start"]:]
+				else:
+					# Only whitespace (stripped by the splitter) lies between them.
+					current["text"] += " " + hit["text"]
+				current["end"] = end
+			current["rank"] = min(current["rank"], hit["rank"])
+			continue
+		current = dict(hit, end=end)
+		passages.append(current)
+
+	return passages
+
+
+def build_context(results: dict, max_tokens: int = 1500, length_function=count_tokens, max_gap: int = 3) -> str:
+	"""Compact context string from a Chroma result dict (single query)."""
+	documents = results["documents"][0]
+	metadatas = (results.get("metadatas") or [[{}] * len(documents)])[0]
+
+	by_source = {}
+	seen = set()
+	for rank, (text, metadata) in enumerate(zip(documents, metadatas)):
+		metadata = metadata or {}
+		if text in seen:
+			continue
+		seen.add(text)
+		source = metadata.get("source", "unknown")
+		by_source.setdefault(source, []).append({
+			"rank": rank,
+			"source": source,
+			"start": metadata.get("start_index"),
+			"text": text,
+		})
+
+	passages = []
+	for hits in by_source.values():
+		passages.extend(_merge_passages(hits, max_gap))
+
+	# Most relevant first, as long as they fit in the budget.
+	selected = []
+	budget = max_tokens
+	for passage in sorted(passages, key=lambda p: p["rank"]):
+		tokens = length_function(passage["text"])
+		if tokens > budget:
+			if selected:
+				continue
+			# Never return an empty context: trim the best passage to the budget.
+			passage["text"] = passage["text"][:int(len(passage["text"]) * budget / tokens)]
+			tokens = budget
+		selected.append(passage)
+		budget -= tokens
+
+	return "\n\n".join(f"[{i}] {p['source']}\n{p['text']}" for i, p in enumerate(selected, start=1))
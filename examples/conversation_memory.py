@@ -0,0 +1,214 @@
+"""
+Per-session conversation memory with a bounded prompt.
+
+Sending the whole history with every turn makes prompts, cost and latency
+grow with the length of the conversation. Here each session keeps:
+
+- a sliding window of the most recent turns, sent verbatim;
+- a rolling summary of everything older. Turns that fall out of the window are
+  folded into it on a background thread, so no request waits for a summary;
+- a token cap on summary plus window. If a summary is still pending, or the
+  turns are long, the oldest turns are left out of the prompt until it fits.
+
+Sessions live in an LRU map: the least recently used session is dropped when
+there are more than `max_sessions`, and sessions idle for longer than
+`idle_seconds` are dropped on the next access.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from tokenizer import count_tokens
+
+
+SUMMARY_PROMPT = """Update the summary of a conversation between a user and an AI assistant.
+Keep facts, names, numbers and open questions; drop small talk. Answer with the
+new summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+
+def format_turns(turns) -> str:
+	return "\n".join(f"Human: {human}\nAI: {ai}" for human, ai in turns)
+
+
+def llm_summarizer(llm, max_words: int = 150):
+	"""summarize(summary, turns) -> new summary, with one LLM call."""
+	from langchain_core.prompts import PromptTemplate
+	from langchain_core.output_parsers import StrOutputParser
+
+	chain = PromptTemplate.from_template(SUMMARY_PROMPT) | llm | StrOutputParser()
+
+	def summarize(summary: str, turns: list) -> str:
+		return chain.invoke({"max_words": max_words, "summary": summary or "(empty)", "turns": format_turns(turns)})
+
+	return summarize
+
+
+@dataclass
+class Session:
+	summary: str = ""
+	window: deque = field(default_factory=deque)   # recent (human, ai) turns, sent verbatim
+	pending: list = field(default_factory=list)    # turns out of the window, not summarized yet
+	summarizing: bool = False
+	last_used: float = field(default_factory=time.monotonic)
+
+
+class ConversationMemory:
+	"""Sliding window + background rolling summary per session, with LRU eviction of sessions."""
+
+	def __init__(self, summarizer=None, window_turns: int = 4, max_tokens: int = 1500, max_sessions: int = 1000,
+				 idle_seconds: float = 3600, length_function=count_tokens, max_workers: int = 2):
+		# summarizer(summary, turns) -> summary; None keeps only the window.
+		self.summarizer = summarizer
+		self.window_turns = window_turns
+		self.max_tokens = max_tokens
+		self.max_sessions = max_sessions
+		self.idle_seconds = idle_seconds
+		self.length_function = length_function
+
+		self._sessions = OrderedDict()
+		self._lock = threading.Lock()
+		self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+
+		self.evictions = 0
+		self.summaries = 0
+		self.summary_failures = 0
+		self.dropped_turns = 0  # turns left out of a prompt to stay under max_tokens
+
+	def _session(self, session_id: str) -> Session:
+		# Called with the lock held.
+		now = time.monotonic()
+		while self._sessions:
+			oldest_id, oldest = next(iter(self._sessions.items()))
+			if oldest_id == session_id or now - oldest.last_used <= self.idle_seconds:
+				break
+			del self._sessions[oldest_id]
+			self.evictions += 1
+
+		session = self._sessions.get(session_id)
+		if session is None:
+			session = self._sessions[session_id] = Session()
+			if len(self._sessions) > self.max_sessions:
+				self._sessions.popitem(last=False)
+				self.evictions += 1
+		self._sessions.move_to_end(session_id)
+		session.last_used = now
+		return session
+
+	def has_history(self, session_id: str) -> bool:
+		with self._lock:
+			session = self._sessions.get(session_id)
+			return session is not None and bool(session.summary or session.window or session.pending)
+
+	def history(self, session_id: str) -> list:
+		"""Messages to put before the new question: summary first, then recent turns, within max_tokens."""
+		with self._lock:
+			session = self._session(session_id)
+			summary = session.summary
+			turns = list(session.pending) + list(session.window)
+
+		budget = self.max_tokens
+		messages = []
+		if summary:
+			# A summary that came back too long gets at most half the budget.
+			cost = self.length_function(summary)
+			if cost > self.max_tokens // 2:
+				words = summary.split()
+				summary = " ".join(words[:len(words) * (self.max_tokens // 2) // cost])
+			summary_message = ("system", f"Summary of the earlier conversation: {summary}")
+			budget -= self.length_function(summary_message[1])
+
+		kept = []
+		for human, ai in reversed(turns):
+			cost = self.length_function(human) + self.length_function(ai)
+			if cost > budget:
+				break
+			budget -= cost
+			kept.append((human, ai))
+		if len(kept) < len(turns):
+			with self._lock:
+				self.dropped_turns += len(turns) - len(kept)
+
+		if summary:
+			messages.append(summary_message)
+		for human, ai in reversed(kept):
+			messages.extend([("human", human), ("ai", ai)])
+		return messages
+
+	def history_text(self, session_id: str) -> str:
+		"""history() as plain text, for string prompt templates."""
+		labels = {"system": "", "human": "Human: ", "ai": "AI: "}
+		return "\n".join(labels[role] + text for role, text in self.history(session_id))
+
+	def add_turn(self, session_id: str, human: str, ai: str):
+		"""Record a finished turn; turns that leave the window are summarized in the background."""
+		with self._lock:
+			session = self._session(session_id)
+			session.window.append((human, ai))
+			while len(session.window) > self.window_turns:
+				session.pending.append(session.window.popleft())
+			if self.summarizer is None:
+				session.pending.clear()
+			elif session.pending and not session.summarizing:
+				session.summarizing = True
+				self._pool.submit(self._summarize, session)
+
+	def _summarize(self, session: Session):
+		while True:
+			with self._lock:
+				turns = list(session.pending)
+				summary = session.summary
+				if not turns:
+					session.summarizing = False
+					return
+			try:
+				new_summary = self.summarizer(summary, turns)
+			except Exception as e:
+				# Keep the turns pending; the next add_turn tries again.
+				logging.error(f"Summarizing conversation failed: {e}")
+				with self._lock:
+					self.summary_failures += 1
+					session.summarizing = False
+				return
+			with self._lock:
+				session.summary = new_summary
+				del session.pending[:len(turns)]
+				self.summaries += 1
+
+	def clear(self, session_id: str):
+		with self._lock:
+			self._sessions.pop(session_id, None)
+
+	def wait(self, timeout: float = None) -> bool:
+		"""Block until no summary is pending (for scripts and benchmarks), True if none is."""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		while True:
+			with self._lock:
+				busy = any(session.summarizing for session in self._sessions.values())
+			if not busy:
+				return True
+			if deadline is not None and time.monotonic() > deadline:
+				return False
+			time.sleep(0.01)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"sessions": len(self._sessions),
+				"evictions": self.evictions,
+				"summaries": self.summaries,
+				"summary_failures": self.summary_failures,
+				"pending_turns": sum(len(session.pending) for session in self._sessions.values()),
+				"dropped_turns": self.dropped_turns,
+			}
+
+	def close(self):
+		self._pool.shutdown(wait=False, cancel_futures=True)
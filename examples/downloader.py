@@ -0,0 +1,183 @@
+"""
+Pooled, resumable downloads with conditional requests.
+
+The Downloader keeps one requests.Session whose connection pool is shared by
+every fetch, so repeated downloads from the same host reuse their TCP/TLS
+connections. On top of that it:
+
+- fetches many URLs in parallel on a bounded thread pool,
+- writes to "<file>.part" and resumes an interrupted download with an HTTP
+  Range request (If-Range makes the server send the whole file again if it
+  changed in the meantime),
+- remembers the ETag / Last-Modified of every file in "<file>.meta.json" and
+  sends If-None-Match / If-Modified-Since, so unchanged files cost one 304,
+- streams text through an incremental decoder instead of joining all bytes.
+
+Errors raise DownloadError instead of being logged and ignored.
+"""
+import codecs
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+	'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+	'Accept': '*/*',
+	# Byte ranges only make sense on the raw (not gzip-encoded) body.
+	'Accept-Encoding': 'identity',
+}
+
+
+class DownloadError(Exception):
+	pass
+
+
+@dataclass
+class DownloadResult:
+	url: str
+	path: str
+	status: str  # "downloaded", "resumed", "not_modified" or "failed"
+	bytes: int = 0  # bytes transferred by this call
+	seconds: float = 0.0
+	error: str = None
+
+
+def _read_meta(path: str) -> dict:
+	try:
+		with open(path, encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _write_meta(path: str, meta: dict):
+	tmp_path = f"{path}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(meta, f)
+	os.replace(tmp_path, path)
+
+
+class Downloader:
+	"""Download files over one pooled HTTP session."""
+
+	def __init__(self, max_workers: int = 4, timeout: float = 30, chunk_size: int = 64 * 1024,
+				 max_retries: int = 3, headers: dict = None):
+		self.max_workers = max_workers
+		self.timeout = timeout
+		self.chunk_size = chunk_size
+		self.session = requests.Session()
+		self.session.headers.update(headers or DEFAULT_HEADERS)
+		# Connection errors and 429/5xx responses are retried with exponential backoff.
+		retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+		adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+
+	def _request_headers(self, file_path: str, part_path: str, meta: dict) -> dict:
+		if os.path.isfile(file_path) and meta.get("complete"):
+			headers = {}
+			if meta.get("etag"):
+				headers["If-None-Match"] = meta["etag"]
+			if meta.get("last_modified"):
+				headers["If-Modified-Since"] = meta["last_modified"]
+			return headers
+		if os.path.isfile(part_path) and (meta.get("etag") or meta.get("last_modified")):
+			return {
+				"Range": f"bytes={os.path.getsize(part_path)}-",
+				"If-Range": meta.get("etag") or meta["last_modified"],
+			}
+		return {}
+
+	def fetch(self, url: str, file_path: str) -> DownloadResult:
+		"""Download `url` to `file_path`, skipping it if unchanged and resuming it if partial."""
+		start = time.perf_counter()
+		part_path = f"{file_path}.part"
+		meta_path = f"{file_path}.meta.json"
+		meta = _read_meta(meta_path)
+		headers = self._request_headers(file_path, part_path, meta)
+
+		try:
+			with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+				if response.status_code == 304:
+					return DownloadResult(url, file_path, "not_modified", seconds=time.perf_counter() - start)
+				if response.status_code == 416:
+					# Our partial file doesn't match the server's file: start over.
+					os.remove(part_path)
+					return self.fetch(url, file_path)
+				response.raise_for_status()
+
+				resumed = response.status_code == 206
+				meta = {
+					"url": url,
+					"etag": response.headers.get("ETag"),
+					"last_modified": response.headers.get("Last-Modified"),
+					"complete": False,
+				}
+				os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+				_write_meta(meta_path, meta)
+
+				written = 0
+				with open(part_path, "ab" if resumed else "wb") as fh:
+					for chunk in response.iter_content(chunk_size=self.chunk_size):
+						fh.write(chunk)
+						written += len(chunk)
+		except (requests.exceptions.RequestException, OSError) as e:
+			raise DownloadError(f"Error downloading {url}: {e}") from e
+
+		os.replace(part_path, file_path)
+		meta["complete"] = True
+		_write_meta(meta_path, meta)
+		return DownloadResult(url, file_path, "resumed" if resumed else "downloaded", written, time.perf_counter() - start)
+
+	def fetch_all(self, items) -> list[DownloadResult]:
+		"""
+		Download (url, file_path) pairs in parallel, at most `max_workers` at a time.
+
+		Results keep the input order; a failed download gets status "failed" and
+		its error message instead of stopping the others.
+		"""
+		def fetch_one(item):
+			url, file_path = item
+			try:
+				return self.fetch(url, file_path)
+			except DownloadError as e:
+				logger.error(str(e))
+				return DownloadResult(url, file_path, "failed", error=str(e))
+
+		with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+			return list(pool.map(fetch_one, items))
+
+	def iter_text(self, url: str, encoding: str = "utf-8"):
+		"""Yield the decoded text of `url` chunk by chunk, without buffering the body."""
+		try:
+			with self.session.get(url, stream=True, timeout=self.timeout) as response:
+				response.raise_for_status()
+				# The incremental decoder holds back multi-byte characters split across chunks.
+				decoder = codecs.getincrementaldecoder(encoding)()
+				for chunk in response.iter_content(chunk_size=self.chunk_size):
+					text = decoder.decode(chunk)
+					if text:
+						yield text
+				text = decoder.decode(b"", final=True)
+				if text:
+					yield text
+		except requests.exceptions.RequestException as e:
+			raise DownloadError(f"Error downloading {url}: {e}") from e
+
+	def close(self):
+		self.session.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
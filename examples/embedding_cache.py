@@ -0,0 +1,163 @@
+"""
+A persistent, size-bounded cache in front of an embedding model.
+
+Vectors are stored as float32 blobs in a small SQLite file, keyed by the model
+name and a hash of the normalized text. Texts we have seen before never go back
+to the provider. When the cache grows past `max_entries` the least recently
+used vectors are evicted.
+
+Set FAKE_EMBEDDINGS=1 to use a local deterministic embedder instead of OpenAI,
+which makes everything runnable offline.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from langchain_core.embeddings import Embeddings, DeterministicFakeEmbedding
+
+
+DEFAULT_CACHE_PATH = "./embedding_cache.sqlite3"
+
+
+def normalize_text(text: str) -> str:
+	"""Unicode-normalize and collapse whitespace so trivial differences share a key."""
+	return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+	"""Wraps any LangChain embeddings object with an on-disk LRU cache."""
+
+	def __init__(self, underlying: Embeddings, cache_path: str = DEFAULT_CACHE_PATH, max_entries: int = 100_000, model: str = None):
+		self.underlying = underlying
+		self.model = model or getattr(underlying, "model", type(underlying).__name__)
+		self.cache_path = cache_path
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+
+		# LangChain runs the async methods in a thread pool, so the connection is
+		# shared between threads and guarded by a lock.
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS embeddings ("
+			"key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+		)
+		self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+		self._conn.commit()
+
+	def _key(self, text: str) -> str:
+		payload = f"{self.model}\x00{normalize_text(text)}".encode("utf-8")
+		return hashlib.sha256(payload).hexdigest()
+
+	def _lookup(self, keys: list) -> dict:
+		found = {}
+		unique_keys = list(dict.fromkeys(keys))
+		# SQLite limits the number of parameters per statement, so query in slices.
+		for i in range(0, len(unique_keys), 500):
+			batch = unique_keys[i:i + 500]
+			placeholders = ",".join("?" * len(batch))
+			rows = self._conn.execute(
+				f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+			).fetchall()
+			for key, blob in rows:
+				found[key] = array("f", blob).tolist()
+		if found:
+			now = time.time()
+			self._conn.executemany(
+				"UPDATE embeddings SET last_used = ? WHERE key = ?",
+				[(now, key) for key in found]
+			)
+		return found
+
+	def _store(self, items: dict):
+		now = time.time()
+		self._conn.executemany(
+			"INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+			[(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+		)
+		self._evict()
+
+	def _evict(self):
+		count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+		overflow = count - self.max_entries
+		if overflow > 0:
+			self._conn.execute(
+				"DELETE FROM embeddings WHERE key IN "
+				"(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+				(overflow,)
+			)
+
+	def embed_documents(self, texts: list[str]) -> list[list[float]]:
+		keys = [self._key(text) for text in texts]
+
+		with self._lock:
+			cached = self._lookup(keys)
+			self._conn.commit()
+			# Counted under the lock: stream_ingest calls this from several threads.
+			hits = sum(1 for key in keys if key in cached)
+			self.hits += hits
+			self.misses += len(keys) - hits
+
+		# Only texts we have never seen are sent to the provider (once each).
+		missing = {}
+		for key, text in zip(keys, texts):
+			if key not in cached and key not in missing:
+				missing[key] = text
+
+		if missing:
+			vectors = self.underlying.embed_documents(list(missing.values()))
+			# Round through float32 so a vector looks the same whether it was cached or not.
+			fresh = {key: array("f", vector).tolist() for key, vector in zip(missing.keys(), vectors)}
+			with self._lock:
+				self._store(fresh)
+				self._conn.commit()
+			cached.update(fresh)
+
+		return [cached[key] for key in keys]
+
+	def embed_query(self, text: str) -> list[float]:
+		key = self._key(text)
+		with self._lock:
+			cached = self._lookup([key])
+			self._conn.commit()
+			if key in cached:
+				self.hits += 1
+			else:
+				self.misses += 1
+		if key in cached:
+			return cached[key]
+
+		vector = array("f", self.underlying.embed_query(text)).tolist()
+		with self._lock:
+			self._store({key: vector})
+			self._conn.commit()
+		return vector
+
+	def stats(self) -> dict:
+		total = self.hits + self.misses
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hits / total if total else 0.0,
+		}
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
+
+
+def get_embeddings(model: str = "text-embedding-3-small", cache_path: str = DEFAULT_CACHE_PATH, max_entries: int = 100_000) -> CachedEmbeddings:
+	"""The embeddings every example should use: OpenAI (or a local fake) behind the cache."""
+	if os.getenv("FAKE_EMBEDDINGS"):
+		underlying = DeterministicFakeEmbedding(size=1536)
+		# Keep fake vectors apart from real ones in the same cache file.
+		model = f"fake-{model}"
+	else:
+		from langchain_openai import OpenAIEmbeddings
+		underlying = OpenAIEmbeddings(model=model)
+
+	return CachedEmbeddings(underlying, cache_path=cache_path, max_entries=max_entries, model=model)
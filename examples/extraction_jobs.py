@@ -0,0 +1,356 @@
+"""
+Resumable bulk extraction: millions of rows through an LLM, one JSON object each.
+
+    python extraction_jobs.py movies.csv movies.out.jsonl --column title --concurrency 32 --rps 20
+
+Rows are read lazily from a JSONL or CSV file and processed by a fixed number
+of async workers, so memory does not grow with the size of the input; the
+model's rate limiter keeps requests under the provider limit. Each result is
+appended to the output file as one JSON line, {"row": n, "output": {...}} or
+{"row": n, "error": "..."} for rows that failed every attempt.
+
+Crash safety: the output file is the record of what is done. Every few seconds
+it is flushed and a checkpoint (the highest row below which everything is
+done, the done rows above it, and the output size at that moment) is written
+next to it. A restarted job loads the checkpoint, reads only the output lines
+written after it and skips every row that is already there.
+
+Rows whose answer doesn't parse or doesn't match the schema go to a separate
+retry queue. Its workers use a stricter few-shot prompt that also quotes the
+previous error, and the queue has its own concurrency, so retries never hold
+up the main stream.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, asdict
+
+
+RETRY_TEMPLATE = """
+Generate information about "{movie_name}" in JSON format.
+
+Example 1:
+Movie: "Jaws"
+{{"title": "Jaws", "director": "Steven Spielberg", "year": 1975, "genre": "Thriller"}}
+
+Example 2:
+Movie: "Spirited Away"
+{{"title": "Spirited Away", "director": "Hayao Miyazaki", "year": 2001, "genre": "Animation"}}
+
+Example 3:
+Movie: "An unknown film"
+{{"title": "An unknown film", "director": "N/A", "year": "N/A", "genre": "N/A"}}
+
+Your previous answer was rejected: {error}
+Answer with the JSON object only: the keys title, director, year (a number) and genre, nothing before or after it.
+Movie: "{movie_name}"
+"""
+
+
+def iter_rows(path: str):
+	"""(row number, dict) for every record of a .jsonl or .csv file, streamed. Blank JSONL lines are skipped."""
+	with open(path, newline="", encoding="utf-8") as f:
+		if path.endswith(".csv"):
+			yield from enumerate(csv.DictReader(f))
+		else:
+			# Rows are numbered by record, not by line, so the resume watermark doesn't stop at a blank line.
+			yield from enumerate(json.loads(line) for line in f if line.strip())
+
+
+def count_rows(path: str) -> int:
+	"""Number of records, counted from newlines (blank lines and CSV fields with line breaks make it an estimate)."""
+	count, last = 0, b"\n"
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			count += block.count(b"\n")
+			last = block[-1:]
+	if last != b"\n":
+		count += 1  # last line without a newline
+	return count - 1 if path.endswith(".csv") else count
+
+
+def checkpoint_path_for(output_path: str) -> str:
+	return output_path + ".checkpoint.json"
+
+
+class ExtractionFailed(Exception):
+	"""The answer could not be parsed into a valid object; the row goes to the retry queue."""
+
+
+@dataclass
+class JobStats:
+	rows: int = 0           # rows finished in this run
+	skipped: int = 0        # rows already in the output when the run started
+	succeeded: int = 0
+	failed: int = 0         # rows that failed every attempt
+	retries: int = 0
+	parse_errors: int = 0
+	api_errors: int = 0
+	seconds: float = 0.0
+
+	@property
+	def error_rate(self) -> float:
+		attempts = self.succeeded + self.parse_errors + self.api_errors
+		return (self.parse_errors + self.api_errors) / attempts if attempts else 0.0
+
+
+class ExtractionJob:
+	"""Runs extract(row, attempt, last_error) over every input row, appending results and checkpointing."""
+
+	def __init__(self, extract, input_path: str, output_path: str, concurrency: int = 16, retry_concurrency: int = None,
+				 max_attempts: int = 3, retry_delay: float = 0.5, checkpoint_seconds: float = 5.0, progress_seconds: float = 1.0,
+				 total: int = None):
+		# extract is async: (row dict, attempt number, previous error or None) -> dict,
+		# raising ExtractionFailed for a bad answer; any other exception counts as an API error.
+		self.extract = extract
+		self.input_path = input_path
+		self.output_path = output_path
+		self.checkpoint_path = checkpoint_path_for(output_path)
+		self.concurrency = concurrency
+		self.retry_concurrency = retry_concurrency or max(1, concurrency // 4)
+		self.max_attempts = max_attempts
+		self.retry_delay = retry_delay
+		self.checkpoint_seconds = checkpoint_seconds
+		self.progress_seconds = progress_seconds
+		self.total = total
+
+		self.stats = JobStats()
+		self._watermark = 0   # every row below this is done
+		self._done = set()    # done rows at or above the watermark
+		self._output = None
+		self._in_flight = 0
+		self._saving = None   # checkpoint being written by _report's thread
+
+	# Resume state
+
+	def _mark_done(self, row: int):
+		if row < self._watermark:
+			return
+		self._done.add(row)
+		while self._watermark in self._done:
+			self._done.remove(self._watermark)
+			self._watermark += 1
+
+	def is_done(self, row: int) -> bool:
+		return row < self._watermark or row in self._done
+
+	def _load_progress(self):
+		offset = 0
+		if os.path.isfile(self.checkpoint_path):
+			with open(self.checkpoint_path, encoding="utf-8") as f:
+				checkpoint = json.load(f)
+			if os.path.abspath(checkpoint["input"]) != os.path.abspath(self.input_path):
+				raise ValueError(f"{self.output_path} belongs to a job over {checkpoint['input']}, not {self.input_path}")
+			self._watermark = checkpoint["watermark"]
+			self._done = set(checkpoint["done"])
+			offset = checkpoint["output_bytes"]
+		if not os.path.isfile(self.output_path):
+			return
+
+		# Lines appended after the last checkpoint; a torn last line (crash mid-write) is cut off.
+		with open(self.output_path, "rb+") as f:
+			f.seek(offset)
+			for line in f:
+				if not line.endswith(b"\n"):
+					f.truncate(offset)
+					break
+				self._mark_done(json.loads(line)["row"])
+				offset += len(line)
+
+	def _checkpoint_state(self) -> dict:
+		# Taken on the event loop, so output_bytes, watermark and done all describe the same rows.
+		self._output.flush()
+		return {
+			"input": self.input_path,
+			"watermark": self._watermark,
+			"done": sorted(self._done),
+			"output_bytes": self._output.tell(),
+			"stats": asdict(self.stats),
+			"written_at": time.time(),
+		}
+
+	def _save_checkpoint(self, checkpoint: dict):
+		# fsync covers every line flushed before the state was taken, which is all the checkpoint counts.
+		os.fsync(self._output.fileno())
+		tmp_path = self.checkpoint_path + ".tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(checkpoint, f)
+		os.replace(tmp_path, self.checkpoint_path)
+
+	def _write_checkpoint(self):
+		self._save_checkpoint(self._checkpoint_state())
+
+	# Workers
+
+	def _finish(self, row: int, record: dict):
+		# No await between the write and the bookkeeping: each line is written whole.
+		self._output.write(json.dumps({"row": row, **record}, ensure_ascii=False) + "\n")
+		self._mark_done(row)
+		self.stats.rows += 1
+
+	async def _attempt(self, row: int, data: dict, attempt: int, last_error: str, retry_queue: asyncio.Queue):
+		self._in_flight += 1
+		try:
+			output = await self.extract(data, attempt, last_error)
+		except ExtractionFailed as e:
+			self.stats.parse_errors += 1
+			error = str(e)
+		except Exception as e:
+			self.stats.api_errors += 1
+			error = f"{type(e).__name__}: {e}"
+		else:
+			self.stats.succeeded += 1
+			self._finish(row, {"output": output})
+			return
+		finally:
+			self._in_flight -= 1
+
+		if attempt < self.max_attempts:
+			self.stats.retries += 1
+			await retry_queue.put((row, data, attempt + 1, error))
+		else:
+			logging.error(f"Row {row} failed after {attempt} attempts: {error}")
+			self.stats.failed += 1
+			self._finish(row, {"error": error, "attempts": attempt})
+
+	async def _worker(self, queue: asyncio.Queue, retry_queue: asyncio.Queue):
+		while True:
+			row, data, attempt, last_error = await queue.get()
+			try:
+				if attempt > 1:
+					# Exponential backoff, in case the error was an overloaded provider.
+					await asyncio.sleep(self.retry_delay * 2 ** (attempt - 2))
+				await self._attempt(row, data, attempt, last_error, retry_queue)
+			finally:
+				queue.task_done()
+
+	async def _produce(self, queue: asyncio.Queue):
+		for row, data in iter_rows(self.input_path):
+			if self.is_done(row):
+				self.stats.skipped += 1
+				continue
+			await queue.put((row, data, 1, None))
+
+	# Reporting
+
+	def progress_line(self, elapsed: float) -> str:
+		stats = self.stats
+		rate = stats.rows / elapsed if elapsed else 0.0
+		done = stats.rows + stats.skipped
+		if self.total:
+			eta = (self.total - done) / rate if rate else float("inf")
+			position = f"{done}/{self.total} rows ({done / self.total:.1%})"
+			eta_text = f"ETA {eta:.0f}s" if eta != float("inf") else "ETA ?"
+		else:
+			position, eta_text = f"{done} rows", "ETA ?"
+		return (f"{position} | {rate:.1f} rows/s | errors {stats.error_rate:.1%} | "
+				f"retries {stats.retries} | failed {stats.failed} | in flight {self._in_flight} | {eta_text}")
+
+	async def _report(self, start: float, out):
+		last_checkpoint = time.monotonic()
+		while True:
+			await asyncio.sleep(self.progress_seconds)
+			if out is not None:
+				print(f"\r{self.progress_line(time.perf_counter() - start)}", end="", file=out, flush=True)
+			if time.monotonic() - last_checkpoint >= self.checkpoint_seconds:
+				# The disk writes run in a thread, so the workers aren't stalled by fsync; shielded
+				# so that cancelling the reporter never leaves a write behind the final checkpoint.
+				self._saving = asyncio.ensure_future(asyncio.to_thread(self._save_checkpoint, self._checkpoint_state()))
+				await asyncio.shield(self._saving)
+				last_checkpoint = time.monotonic()
+
+	async def run(self, progress=sys.stderr) -> JobStats:
+		"""Process every row not yet in the output. Safe to call again after a crash or Ctrl+C."""
+		self._load_progress()
+		if self.total is None:
+			self.total = count_rows(self.input_path)
+
+		start = time.perf_counter()
+		queue = asyncio.Queue(maxsize=self.concurrency * 2)
+		retry_queue = asyncio.Queue()
+		self._output = open(self.output_path, "a", encoding="utf-8")
+		tasks = [asyncio.create_task(self._worker(queue, retry_queue)) for _ in range(self.concurrency)]
+		tasks += [asyncio.create_task(self._worker(retry_queue, retry_queue)) for _ in range(self.retry_concurrency)]
+		reporter = asyncio.create_task(self._report(start, progress))
+		try:
+			await self._produce(queue)
+			await queue.join()
+			# A retry can fail again and re-queue itself, join() waits for those too.
+			await retry_queue.join()
+		finally:
+			for task in tasks + [reporter]:
+				task.cancel()
+			await asyncio.gather(*tasks, reporter, return_exceptions=True)
+			if self._saving is not None:
+				await asyncio.gather(self._saving, return_exceptions=True)
+			# Also on cancellation: rows finished so far are not redone on resume.
+			self._write_checkpoint()
+			self._output.close()
+			self.stats.seconds = time.perf_counter() - start
+			if progress is not None:
+				print(f"\r{self.progress_line(self.stats.seconds)}", file=progress, flush=True)
+		return self.stats
+
+
+def movie_extractor(llm, column: str = "title", max_chars: int = 2000):
+	"""extract() for ExtractionJob: the 03_output_parsers.py prompt, streamed and validated; few-shot on retries."""
+	from langchain_core.prompts import PromptTemplate
+	from streaming_json import MOVIE_SCHEMA, MOVIE_TEMPLATE, aextract
+
+	chain = PromptTemplate.from_template(MOVIE_TEMPLATE) | llm
+	retry_chain = PromptTemplate.from_template(RETRY_TEMPLATE) | llm.bind(temperature=0)
+
+	async def extract(row: dict, attempt: int, last_error: str) -> dict:
+		if attempt == 1:
+			result = await aextract(chain, {"movie_name": row[column]}, MOVIE_SCHEMA, max_chars)
+		else:
+			result = await aextract(retry_chain, {"movie_name": row[column], "error": last_error}, MOVIE_SCHEMA, max_chars)
+		if not result.ok:
+			raise ExtractionFailed(result.error)
+		return result.data
+
+	return extract
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("input", help=".jsonl or .csv")
+	parser.add_argument("output", help="results, one JSON line per row (appended to)")
+	parser.add_argument("--column", default="title", help="the field with the movie title")
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--rps", type=float, default=5, help="requests per second")
+	parser.add_argument("--max-attempts", type=int, default=3)
+	args = parser.parse_args()
+
+	logging.basicConfig(level=logging.ERROR, filename="test.log", filemode="a", format="%(asctime)s from %(name)s: %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+	from dotenv import load_dotenv
+	from langchain_openai import ChatOpenAI
+	from prompt_suite import rate_limiter_for
+
+	_ = load_dotenv(dotenv_path=os.path.join(os.getcwd(), "config", ".env"))
+
+	llm = ChatOpenAI(
+		model="gpt-4.1-mini",
+		temperature=0.3,
+		top_p=0.9,
+		rate_limiter=rate_limiter_for("openai", requests_per_second=args.rps, max_bucket_size=args.concurrency),
+	)
+
+	job = ExtractionJob(movie_extractor(llm, args.column), args.input, args.output,
+						concurrency=args.concurrency, max_attempts=args.max_attempts)
+	try:
+		stats = asyncio.run(job.run())
+	except KeyboardInterrupt:
+		sys.exit("\nInterrupted, run the same command again to resume.")
+	print(f"{stats.succeeded} extracted, {stats.failed} failed, {stats.skipped} already done, "
+		  f"{stats.retries} retries in {stats.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+	main()
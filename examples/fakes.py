@@ -0,0 +1,109 @@
+"""
+Deterministic fake models for offline experiments and benchmarks.
+
+The fake chat model behaves like a real chat model as far as LangChain is
+concerned (invoke, stream, batch and their async versions all work) but
+answers from a fixed list of responses, or from a function of the prompt, and
+simulates network latency: a delay before the first token plus a delay per
+token. The fake embeddings return the same vector for the same text, after a
+simulated delay per call.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Callable, Optional
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+def _split_tokens(text: str) -> list:
+	"""Very rough tokenizer: words with their trailing whitespace."""
+	return re.findall(r"\s*\S+\s*", text) or [text]
+
+
+class FakeStreamingChatModel(BaseChatModel):
+	"""Fake chat model with configurable latency and token-by-token streaming."""
+
+	responses: list[str] = ["This is a fake response."]
+	respond: Optional[Callable[[str], str]] = None  # takes the prompt text, overrides `responses`
+	first_token_latency: float = 0.0
+	token_latency: float = 0.0
+	calls: int = 0
+
+	@property
+	def _llm_type(self) -> str:
+		return "fake-streaming-chat-model"
+
+	def _prompt_text(self, messages) -> str:
+		return "\n".join(str(message.content) for message in messages)
+
+	def _next_response(self, messages) -> str:
+		self.calls += 1
+		if self.respond is not None:
+			return self.respond(self._prompt_text(messages))
+		return self.responses[(self.calls - 1) % len(self.responses)]
+
+	def _usage(self, messages, tokens: list) -> dict:
+		input_tokens = len(_split_tokens(self._prompt_text(messages)))
+		# Shaped like ChatOpenAI's usage_metadata, nested token details included.
+		return {
+			"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens),
+			"input_token_details": {"audio": 0, "cache_read": 0}, "output_token_details": {"audio": 0, "reasoning": 0},
+		}
+
+	def _result(self, messages, text: str, tokens: list) -> ChatResult:
+		message = AIMessage(content=text, usage_metadata=self._usage(messages, tokens))
+		return ChatResult(generations=[ChatGeneration(message=message)])
+
+	def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+		text = self._next_response(messages)
+		tokens = _split_tokens(text)
+		time.sleep(self.first_token_latency + self.token_latency * len(tokens))
+		return self._result(messages, text, tokens)
+
+	async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+		text = self._next_response(messages)
+		tokens = _split_tokens(text)
+		await asyncio.sleep(self.first_token_latency + self.token_latency * len(tokens))
+		return self._result(messages, text, tokens)
+
+	def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+		tokens = _split_tokens(self._next_response(messages))
+		time.sleep(self.first_token_latency)
+		for i, token in enumerate(tokens):
+			if i:
+				time.sleep(self.token_latency)
+			chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+			if run_manager:
+				run_manager.on_llm_new_token(token, chunk=chunk)
+			yield chunk
+		# Like OpenAI, report token usage in a final empty chunk.
+		yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens)))
+
+	async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+		tokens = _split_tokens(self._next_response(messages))
+		await asyncio.sleep(self.first_token_latency)
+		for i, token in enumerate(tokens):
+			if i:
+				await asyncio.sleep(self.token_latency)
+			chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+			if run_manager:
+				await run_manager.on_llm_new_token(token, chunk=chunk)
+			yield chunk
+		yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens)))
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+	"""DeterministicFakeEmbedding with a simulated latency per request."""
+
+	latency: float = 0.0
+
+	def embed_documents(self, texts: list) -> list:
+		time.sleep(self.latency)
+		return super().embed_documents(texts)
+
+	def embed_query(self, text: str) -> list:
+		time.sleep(self.latency)
+		return super().embed_query(text)
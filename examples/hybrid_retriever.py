@@ -0,0 +1,65 @@
+"""
+Hybrid retrieval: BM25 and vector search in parallel, fused by rank.
+
+The keyword index and the vector search each return their best candidates,
+the vector search on a worker thread (embedding the query is a network call)
+while BM25 runs on the calling thread. Reciprocal-rank fusion then scores
+every chunk by 1 / (rrf_k + rank) summed over both lists. Because it only
+uses ranks, the BM25 scores and cosine distances never need to be put on the
+same scale. Chunks that both retrievers like rise to the top, so a small k
+covers both exact terms and paraphrases.
+
+How many candidates each side contributes matters: with long lists, chunks
+that are mediocre in both (e.g. they only share the topic words) add up and
+can push out the best hit of one retriever. By default each side contributes
+only its own top k; in 21_hybrid_retrieval_eval.py that keeps BM25's exact
+hits (99.5% recall@4), while 20 candidates per side, the usual RRF setting,
+drops to 44.5%. Re-run the eval before changing it.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+def reciprocal_rank_fusion(results: list, n_results: int = 10, rrf_k: int = 60) -> dict:
+	"""Fuse Chroma-style result dicts (single query each) into one, by reciprocal rank."""
+	scores = {}
+	hits = {}
+	for result in results:
+		ids = result["ids"][0]
+		documents = result["documents"][0]
+		metadatas = (result.get("metadatas") or [[{}] * len(ids)])[0]
+		for rank, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas)):
+			scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+			hits.setdefault(doc_id, (document, metadata))
+
+	top = sorted(scores, key=scores.get, reverse=True)[:n_results]
+	return {
+		"ids": [top],
+		"documents": [[hits[doc_id][0] for doc_id in top]],
+		"metadatas": [[hits[doc_id][1] for doc_id in top]],
+		"distances": [[-scores[doc_id] for doc_id in top]],
+	}
+
+
+class HybridRetriever:
+	"""Query a vector search and a BM25 index at the same time and fuse the results."""
+
+	def __init__(self, vector_search, keyword_index, candidates: int = None, rrf_k: int = 60):
+		# vector_search(query, k) returns a Chroma-style result dict;
+		# candidates=None asks each side for as many results as the query's k.
+		self.vector_search = vector_search
+		self.keyword_index = keyword_index
+		self.candidates = candidates
+		self.rrf_k = rrf_k
+		self._pool = ThreadPoolExecutor(max_workers=4)
+
+	def query(self, query: str, k: int = 4) -> dict:
+		candidates = self.candidates or k
+		# Run in a copy of the caller's context so tracing spans keep their parent.
+		vector_future = self._pool.submit(contextvars.copy_context().run, self.vector_search, query, candidates)
+		keyword_results = self.keyword_index.query([query], n_results=candidates)
+		return reciprocal_rank_fusion([vector_future.result(), keyword_results], n_results=k, rrf_k=self.rrf_k)
+
+	def close(self):
+		"""Stop the vector search threads; query() can't be called afterwards."""
+		self._pool.shutdown()
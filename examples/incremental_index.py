@@ -0,0 +1,191 @@
+"""
+Incremental indexing for a Chroma collection.
+
+Every chunk gets a deterministic id built from its source and a hash of its
+content, so the same chunk always maps to the same id. A small JSON manifest
+next to the Chroma storage remembers which ids each source has in the
+collection. On every run we only embed the chunks that are new or changed and
+delete the ones that disappeared, so restarting with an unchanged corpus makes
+zero embedding calls.
+
+An optional keyword index (see bm25_index.py) is kept in sync with the same
+chunks: it gets the new chunks and loses the stale ones at the same time.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from ingest_pipeline import stream_ingest
+
+
+def manifest_path_for(storage_path: str, collection_name: str) -> str:
+	"""Where the manifest of a collection lives, right next to the Chroma files."""
+	return os.path.join(storage_path, f"{collection_name}.manifest.json")
+
+
+def manifest_fingerprint(manifest: dict) -> str:
+	"""Short hash of a manifest; changes whenever the indexed content changes."""
+	payload = json.dumps(manifest["sources"], sort_keys=True)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_fingerprint(manifest_path: str) -> str:
+	"""Fingerprint of the manifest on disk, or None if nothing was indexed yet."""
+	if not os.path.isfile(manifest_path):
+		return None
+	with open(manifest_path, "r", encoding="utf-8") as fh:
+		return manifest_fingerprint(json.load(fh))
+
+
+# Where a chunk sits in its source. An edit near the top shifts these for every
+# later chunk, so they are left out of the id and refreshed without re-embedding.
+POSITIONAL_KEYS = frozenset({"start_index"})
+
+
+def chunk_id(source: str, content: str, metadata: dict = None) -> str:
+	"""Deterministic id for a chunk: same source + same content -> same id."""
+	digest = hashlib.sha256()
+	digest.update(content.encode("utf-8"))
+	# Metadata is part of the hash so a metadata change re-indexes the chunk.
+	metadata = {key: value for key, value in (metadata or {}).items() if key not in POSITIONAL_KEYS}
+	if metadata:
+		digest.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+	return f"{source}:{digest.hexdigest()[:32]}"
+
+
+class IncrementalIndexer:
+	"""Keeps a Chroma collection in sync with a list of chunks, source by source."""
+
+	def __init__(self, collection, embeddings, manifest_path: str, ingest_options: dict = None, keyword_index=None):
+		self.collection = collection
+		self.embeddings = embeddings
+		self.manifest_path = manifest_path
+		# Batch size, concurrency and backpressure settings for stream_ingest.
+		self.ingest_options = ingest_options or {}
+		self.keyword_index = keyword_index
+		self.manifest = self._load_manifest()
+
+	def _load_manifest(self) -> dict:
+		if not os.path.isfile(self.manifest_path):
+			return {"collection": self.collection.name, "sources": {}}
+		with open(self.manifest_path, "r", encoding="utf-8") as fh:
+			return json.load(fh)
+
+	def _save_manifest(self):
+		os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+		# Write to a temporary file first so a crash never leaves half a manifest.
+		tmp_path = f"{self.manifest_path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as fh:
+			json.dump(self.manifest, fh, indent=1, sort_keys=True)
+		os.replace(tmp_path, self.manifest_path)
+
+	def _save(self, keywords_changed: bool):
+		"""Persist the keyword index, then the manifest, after each source.
+
+		In this order a crash in between leaves a manifest that lags behind, and
+		the next run removes the stale keyword entries it still lists.
+		"""
+		if keywords_changed:
+			self.keyword_index.save()
+		self._save_manifest()
+
+	def _ids_in_collection(self, source: str) -> set:
+		"""Ask Chroma which ids it really holds for a source (no embeddings involved)."""
+		results = self.collection.get(where={"source": source}, include=[])
+		return set(results["ids"])
+
+	def _sync_keyword_index(self, current: dict, stale_ids: set) -> bool:
+		"""Add missing chunks to the keyword index and drop stale ones, True if it changed."""
+		if self.keyword_index is None:
+			return False
+		# Missing ids also covers a keyword index created after the collection.
+		missing = [cid for cid in current if cid not in self.keyword_index]
+		stale = [cid for cid in stale_ids if cid in self.keyword_index]
+		moved = [cid for cid in current if cid in self.keyword_index and self.keyword_index.metadata(cid) != current[cid].metadata]
+		if missing:
+			self.keyword_index.add(
+				missing,
+				[current[cid].page_content for cid in missing],
+				[current[cid].metadata for cid in missing]
+			)
+		if stale:
+			self.keyword_index.remove(stale)
+		if moved:
+			self.keyword_index.update_metadata(moved, [current[cid].metadata for cid in moved])
+		return bool(missing or stale or moved)
+
+	def fingerprint(self) -> str:
+		return manifest_fingerprint(self.manifest)
+
+	def index(self, chunks, remove_missing_sources: bool = True) -> dict:
+		"""Embed and upsert new or changed chunks, delete stale ones, return counts.
+
+		`chunks` is the whole corpus: sources in the manifest that no longer
+		have any chunk are removed from the collection. Pass
+		remove_missing_sources=False to index a corpus a few sources at a time.
+		"""
+		by_source = defaultdict(dict)
+		for chunk in chunks:
+			source = chunk.metadata.get("source", "unknown")
+			cid = chunk_id(source, chunk.page_content, chunk.metadata)
+			# Identical chunks inside one source collapse into a single entry.
+			by_source[source][cid] = chunk
+
+		stats = {"added": 0, "removed": 0, "unchanged": 0, "seconds": 0.0}
+		manifest_sources = self.manifest["sources"]
+
+		for source, current in by_source.items():
+			current_ids = set(current)
+			known_ids = set(manifest_sources.get(source, []))
+
+			if known_ids == current_ids:
+				# Fast path: the manifest says nothing changed. Double check that the
+				# collection still has the ids (e.g. the storage folder was wiped).
+				present = set(self.collection.get(ids=sorted(current_ids), include=[])["ids"])
+				if present == current_ids:
+					stats["unchanged"] += len(current_ids)
+					if self._sync_keyword_index(current, set()):
+						self.keyword_index.save()
+					continue
+
+			# Chroma is the source of truth here; this also catches legacy chunks
+			# that were stored with random ids before the manifest existed.
+			present = self._ids_in_collection(source)
+			new_ids = sorted(current_ids - present)
+			stale_ids = sorted(present - current_ids)
+
+			if new_ids:
+				ingest_stats = stream_ingest(
+					((cid, current[cid]) for cid in new_ids),
+					self.collection,
+					self.embeddings,
+					**self.ingest_options
+				)
+				stats["seconds"] += ingest_stats["seconds"]
+			if stale_ids:
+				self.collection.delete(ids=stale_ids)
+			kept_ids = sorted(current_ids & present)
+			if kept_ids:
+				# Same content, possibly at a new offset: metadata only, no embedding calls.
+				self.collection.update(ids=kept_ids, metadatas=[current[cid].metadata for cid in kept_ids])
+			keywords_changed = self._sync_keyword_index(current, set(stale_ids) | (known_ids - current_ids))
+
+			stats["added"] += len(new_ids)
+			stats["removed"] += len(stale_ids)
+			stats["unchanged"] += len(current_ids) - len(new_ids)
+
+			manifest_sources[source] = sorted(current_ids)
+			self._save(keywords_changed)
+
+		# Sources that were deleted altogether.
+		for source in sorted(set(manifest_sources) - set(by_source) if remove_missing_sources else ()):
+			stale_ids = sorted(set(manifest_sources[source]) | self._ids_in_collection(source))
+			if stale_ids:
+				self.collection.delete(ids=stale_ids)
+			keywords_changed = self._sync_keyword_index({}, set(stale_ids))
+			stats["removed"] += len(stale_ids)
+			del manifest_sources[source]
+			self._save(keywords_changed)
+
+		stats["chunks_per_sec"] = stats["added"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+		return stats
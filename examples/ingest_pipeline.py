@@ -0,0 +1,95 @@
+"""
+Streaming ingest: embed chunks in token-bounded batches and upsert as we go.
+
+Instead of embedding the whole corpus in one call and holding every vector in
+memory, chunks are grouped into batches that stay under a token budget. A small
+thread pool embeds the batches concurrently, each batch is upserted as soon as
+its vectors arrive, and at most `max_in_flight` batches exist at any time. That
+last rule is the backpressure: reading new chunks waits for the pool, so peak
+memory stays flat no matter how big the corpus is.
+"""
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from tokenizer import count_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+def token_batches(items, max_tokens: int = 8000, max_items: int = 256, length_function=count_tokens):
+	"""Group (id, chunk) pairs into batches that stay under a token budget."""
+	batch = []
+	batch_tokens = 0
+	for cid, chunk in items:
+		tokens = length_function(chunk.page_content)
+		if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+			yield batch
+			batch = []
+			batch_tokens = 0
+		# A single oversized chunk still gets its own batch.
+		batch.append((cid, chunk))
+		batch_tokens += tokens
+	if batch:
+		yield batch
+
+
+def embed_with_retry(embeddings, texts: list, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0) -> list:
+	"""Call embed_documents, retrying failures with exponential backoff and full jitter."""
+	for attempt in range(max_retries + 1):
+		try:
+			return embeddings.embed_documents(texts)
+		except Exception as e:
+			if attempt == max_retries:
+				raise
+			# Random delays keep parallel workers from retrying in lockstep.
+			delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+			logger.warning(f"Embedding batch failed ({e}), retrying in {delay:.2f}s")
+			time.sleep(delay)
+
+
+def stream_ingest(items, collection, embeddings, max_tokens: int = 8000, max_items: int = 256,
+				  max_workers: int = 4, max_in_flight: int = 8, length_function=count_tokens,
+				  progress_every: int = 0) -> dict:
+	"""
+	Embed and upsert an iterable of (id, chunk) pairs batch by batch.
+
+	Returns the number of chunks and batches written, the elapsed time and the
+	throughput in chunks/sec.
+	"""
+	stats = {"chunks": 0, "batches": 0}
+	start = time.perf_counter()
+
+	def upsert(batch, vectors):
+		collection.upsert(
+			documents=[chunk.page_content for _, chunk in batch],
+			embeddings=vectors,
+			metadatas=[chunk.metadata for _, chunk in batch],
+			ids=[cid for cid, _ in batch]
+		)
+		stats["chunks"] += len(batch)
+		stats["batches"] += 1
+		if progress_every and stats["batches"] % progress_every == 0:
+			elapsed = time.perf_counter() - start
+			print(f"Ingested {stats['chunks']} chunks ({stats['chunks'] / elapsed:.1f} chunks/sec)")
+
+	def drain(pending, return_when):
+		done, _ = wait(pending, return_when=return_when)
+		for future in done:
+			# Upserts happen on this thread, only embedding runs in the pool.
+			upsert(pending.pop(future), future.result())
+
+	with ThreadPoolExecutor(max_workers=max_workers) as pool:
+		pending = {}
+		for batch in token_batches(items, max_tokens, max_items, length_function):
+			while len(pending) >= max_in_flight:
+				drain(pending, FIRST_COMPLETED)
+			texts = [chunk.page_content for _, chunk in batch]
+			pending[pool.submit(embed_with_retry, embeddings, texts)] = batch
+		while pending:
+			drain(pending, FIRST_COMPLETED)
+
+	stats["seconds"] = time.perf_counter() - start
+	stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+	return stats
@@ -0,0 +1,69 @@
+"""
+A local http.server stand-in for a remote web server, used by the benchmarks.
+
+SimpleHTTPRequestHandler only knows Last-Modified. RangeRequestHandler adds
+ETags (If-None-Match), Range requests (with If-Range), keep-alive connections
+and a fixed delay per request to simulate network latency.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+	latency = 0.0
+
+	def log_message(self, *args):
+		pass
+
+	def do_GET(self):
+		time.sleep(self.latency)
+		path = self.translate_path(self.path)
+		if not os.path.isfile(path):
+			self.send_error(404)
+			return
+		with open(path, "rb") as f:
+			body = f.read()
+		etag = f'"{hashlib.md5(body).hexdigest()}"'
+		last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+
+		if self.headers.get("If-None-Match") == etag:
+			self.send_response(304)
+			self.send_header("ETag", etag)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+			return
+
+		status, start = 200, 0
+		range_header = self.headers.get("Range")
+		if range_header and self.headers.get("If-Range", etag) in (etag, last_modified):
+			start = int(range_header.split("=")[1].split("-")[0])
+			if start >= len(body):
+				self.send_error(416)
+				return
+			status = 206
+
+		content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+		self.send_response(status)
+		self.send_header("ETag", etag)
+		self.send_header("Last-Modified", last_modified)
+		self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+		self.send_header("Content-Length", str(len(body) - start))
+		if status == 206:
+			self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+		self.end_headers()
+		self.wfile.write(body[start:])
+
+
+def serve_directory(directory: str, latency: float = 0.0):
+	"""Serve `directory` on a free local port in a background thread, returns (server, base url)."""
+	handler = type("Handler", (RangeRequestHandler,), {"latency": latency})
+	server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory))
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server, f"http://127.0.0.1:{server.server_port}"
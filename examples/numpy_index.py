@@ -0,0 +1,111 @@
+"""
+An in-process vector index built on NumPy, a drop-in for `collection.query`.
+
+For small and medium collections, a Chroma query spends most of its time in
+client overhead rather than in the math. This index keeps all vectors in one
+contiguous float32 matrix (optionally memory-mapped from disk), with every row
+normalized up front, so a batch of queries is a single matrix product followed
+by `argpartition` to find the top k. Metadata filters (`where={"source": ...}`)
+are answered with boolean masks that are computed once and reused.
+
+It is loaded from the same ids, documents and metadatas we upsert into Chroma,
+and `query` returns a dict shaped like Chroma's, so `build_context` and the
+retrievers work unchanged. Distances are cosine distances (1 - similarity).
+"""
+import json
+import os
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+	norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+	norms[norms == 0] = 1.0
+	return matrix / norms
+
+
+class NumpyVectorIndex:
+	"""Brute-force cosine similarity search over a float32 matrix."""
+
+	def __init__(self, ids: list, documents: list, metadatas: list, vectors: np.ndarray, normalized: bool = False):
+		if not normalized:
+			vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+		self.ids = list(ids)
+		self.documents = list(documents)
+		self.metadatas = [metadata or {} for metadata in metadatas]
+		self.vectors = vectors
+		self._masks = {}
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	@classmethod
+	def from_chroma(cls, collection, batch_size: int = 5000) -> "NumpyVectorIndex":
+		"""Copy everything out of a Chroma collection, page by page."""
+		ids, documents, metadatas, vectors = [], [], [], []
+		total = collection.count()
+		for offset in range(0, total, batch_size):
+			page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+			ids.extend(page["ids"])
+			documents.extend(page["documents"])
+			metadatas.extend(page["metadatas"])
+			vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+		matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+		return cls(ids, documents, metadatas, matrix)
+
+	def save(self, directory: str):
+		"""Write the matrix as .npy (memory-mappable) and the rest as JSON."""
+		os.makedirs(directory, exist_ok=True)
+		np.save(os.path.join(directory, "vectors.npy"), np.ascontiguousarray(self.vectors, dtype=np.float32))
+		with open(os.path.join(directory, "records.json"), "w", encoding="utf-8") as fh:
+			json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, fh)
+
+	@classmethod
+	def load(cls, directory: str, mmap: bool = True) -> "NumpyVectorIndex":
+		"""Load a saved index; with mmap the OS pages the vectors in on demand."""
+		vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+		with open(os.path.join(directory, "records.json"), "r", encoding="utf-8") as fh:
+			records = json.load(fh)
+		return cls(records["ids"], records["documents"], records["metadatas"], vectors, normalized=True)
+
+	def _mask(self, where: dict) -> np.ndarray:
+		"""Boolean row mask for equality filters, e.g. {"source": "a.txt"}."""
+		mask = np.ones(len(self.ids), dtype=bool)
+		for key, value in where.items():
+			if isinstance(value, dict):
+				value = value["$eq"]
+			cache_key = (key, json.dumps(value, sort_keys=True))
+			if cache_key not in self._masks:
+				self._masks[cache_key] = np.fromiter(
+					(metadata.get(key) == value for metadata in self.metadatas),
+					dtype=bool,
+					count=len(self.metadatas)
+				)
+			mask &= self._masks[cache_key]
+		return mask
+
+	def query(self, query_embeddings: list, n_results: int = 10, where: dict = None, include: list = ("documents", "metadatas", "distances")) -> dict:
+		"""Top-k search for a batch of query vectors, returned like Chroma's query()."""
+		queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+		results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+		mask = self._mask(where) if where else None
+		available = int(mask.sum()) if mask is not None else len(self.ids)
+		k = min(n_results, available)
+
+		if k == 0:
+			for key in results:
+				results[key] = [[] for _ in range(len(queries))]
+		else:
+			similarities = queries @ self.vectors.T
+			if mask is not None:
+				similarities[:, ~mask] = -np.inf
+			# argpartition finds the k best in linear time, then only those k are sorted.
+			top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+			for row, candidates in enumerate(top):
+				order = candidates[np.argsort(-similarities[row, candidates])]
+				results["ids"].append([self.ids[i] for i in order])
+				results["documents"].append([self.documents[i] for i in order])
+				results["metadatas"].append([self.metadatas[i] for i in order])
+				results["distances"].append((1.0 - similarities[row, order]).tolist())
+
+		return {key: value for key, value in results.items() if key == "ids" or key in include}
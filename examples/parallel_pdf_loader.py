@@ -0,0 +1,144 @@
+"""
+Parse a PDF across a process pool and yield its pages lazily, in page order.
+
+PyPDFLoader and UnstructuredPDFLoader parse the whole file in one process
+before returning anything, and unstructured's table inference is especially
+CPU heavy. ParallelPDFLoader splits the pages into small ranges, parses the
+ranges in worker processes and yields one Document per page as soon as all
+earlier pages are done, so splitting and embedding can start while later pages
+are still being parsed. Only a few ranges are in flight at a time, which keeps
+memory bounded for very long PDFs.
+
+Parsed pages are cached on disk under the SHA-256 of the file, so loading the
+same PDF again skips parsing entirely.
+
+pip install pypdf                      # mode="pypdf"
+pip install "unstructured[pdf]"        # mode="unstructured"
+"""
+import hashlib
+import json
+import os
+import tempfile
+from langchain_core.documents import Document
+from parse_pool import in_order, start_parse_pool
+
+
+def file_hash(file_path: str) -> str:
+	digest = hashlib.sha256()
+	with open(file_path, "rb") as fh:
+		for block in iter(lambda: fh.read(1 << 20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+# Each worker process opens a file once and reuses the reader for later ranges.
+# Keyed by content digest too, so a file edited in place is never read through
+# an old reader (and its stale pages never cached under the new digest).
+_readers = {}
+
+
+def _reader(file_path: str, digest: str):
+	from pypdf import PdfReader
+	if (file_path, digest) not in _readers:
+		_readers[file_path, digest] = PdfReader(file_path)
+	return _readers[file_path, digest]
+
+
+def _parse_pypdf(file_path: str, digest: str, start: int, end: int) -> list:
+	"""Text of pages [start, end), numbered from 0 like PyPDFLoader."""
+	reader = _reader(file_path, digest)
+	return [{"page": i, "text": reader.pages[i].extract_text().strip()} for i in range(start, end)]
+
+
+def _parse_unstructured(file_path: str, digest: str, start: int, end: int) -> list:
+	"""Elements of pages [start, end) joined per page, numbered from 1 like unstructured."""
+	from pypdf import PdfWriter
+	from langchain_community.document_loaders import UnstructuredPDFLoader
+
+	# Unstructured always parses whole files, so hand it just our pages.
+	writer = PdfWriter()
+	reader = _reader(file_path, digest)
+	for i in range(start, end):
+		writer.add_page(reader.pages[i])
+
+	with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+		writer.write(tmp)
+	try:
+		elements = UnstructuredPDFLoader(file_path=tmp.name, mode="elements", infer_table_structure=True).load()
+	finally:
+		os.remove(tmp.name)
+
+	pages = {page: [] for page in range(start + 1, end + 1)}
+	for el in elements:
+		page = start + el.metadata.get("page_number", 1)
+		pages[page].append(el.page_content.strip())
+	return [{"page": page, "text": "\n\n".join(texts)} for page, texts in pages.items()]
+
+
+PARSERS = {"pypdf": _parse_pypdf, "unstructured": _parse_unstructured}
+
+
+def _write_cache(path: str, pages: list):
+	if not path:
+		return
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as fh:
+		json.dump(pages, fh)
+	os.replace(tmp_path, path)
+
+
+def _parse_and_cache(mode: str, file_path: str, digest: str, start: int, end: int, cache_path: str) -> list:
+	"""Runs in a worker: parse pages [start, end) and store them in the cache."""
+	pages = PARSERS[mode](file_path, digest, start, end)
+	_write_cache(cache_path, pages)
+	return pages
+
+
+class ParallelPDFLoader:
+	"""Lazy, page-ordered PDF loader backed by a process pool and a disk cache."""
+
+	def __init__(self, file_path: str, mode: str = "pypdf", max_workers: int = None, pages_per_task: int = 4, cache_dir: str = "./.pdf_cache"):
+		# cache_dir=None disables the on-disk page cache.
+		if mode not in PARSERS:
+			raise ValueError(f"Unknown mode: {mode}, pick one of {', '.join(PARSERS)}")
+		self.file_path = file_path
+		self.mode = mode
+		self.max_workers = max_workers or os.cpu_count() or 1
+		self.pages_per_task = pages_per_task
+		self.cache_dir = cache_dir
+
+	def _cache_path(self, digest: str, start: int, end: int) -> str:
+		if not self.cache_dir:
+			return None
+		return os.path.join(self.cache_dir, digest, self.mode, f"{start}-{end}.json")
+
+	def _read_cache(self, path: str):
+		if path and os.path.isfile(path):
+			with open(path, "r", encoding="utf-8") as fh:
+				return json.load(fh)
+		return None
+
+	def _documents(self, pages: list):
+		for page in pages:
+			yield Document(page_content=page["text"], metadata={"source": self.file_path, "page": page["page"]})
+
+	def lazy_load(self):
+		digest = file_hash(self.file_path)
+		n_pages = len(_reader(self.file_path, digest).pages)
+		ranges = [(start, min(start + self.pages_per_task, n_pages)) for start in range(0, n_pages, self.pages_per_task)]
+
+		with start_parse_pool(self.max_workers) as pool:
+			# The workers were forked with the reader, this process no longer needs it.
+			_readers.pop((self.file_path, digest), None)
+
+			def submit(page_range):
+				path = self._cache_path(digest, *page_range)
+				cached = self._read_cache(path)
+				return cached if cached is not None else pool.submit(_parse_and_cache, self.mode, self.file_path, digest, *page_range, path)
+
+			for pages in in_order(submit, ranges, self.max_workers * 2):
+				yield from self._documents(pages)
+
+	def load(self) -> list:
+		return list(self.lazy_load())
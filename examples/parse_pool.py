@@ -0,0 +1,48 @@
+"""
+Shared plumbing for the loaders that parse in worker processes.
+
+ParallelPDFLoader and ConcurrentWebLoader both hand CPU-bound parsing to a
+process pool and yield the results in input order, with a bound on how much
+work is in flight.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+def _ready() -> bool:
+	return True
+
+
+def start_parse_pool(max_workers: int) -> ProcessPoolExecutor:
+	"""A process pool whose workers are all running when this returns."""
+	# Fork keeps the examples' module-level code from running again in every
+	# worker; platforms without fork fall back to the default start method.
+	context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+	pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+	# With fork, the first task starts every worker. Do it now, from this thread:
+	# forking later, while other threads (e.g. HTTP fetchers) hold locks, can
+	# leave a child deadlocked on a lock that nobody will ever release.
+	pool.submit(_ready).result()
+	return pool
+
+
+def in_order(submit, items, max_in_flight: int):
+	"""
+	Yield the result of submit(item) for every item, in item order.
+
+	submit returns a Future, or the result itself (e.g. from a cache). At most
+	`max_in_flight` items are submitted ahead of what the consumer has taken.
+	"""
+	in_flight = deque()
+	for item in items:
+		# Backpressure: don't work far ahead of what the consumer has taken.
+		while len(in_flight) >= max_in_flight:
+			yield _result(in_flight.popleft())
+		in_flight.append(submit(item))
+	while in_flight:
+		yield _result(in_flight.popleft())
+
+
+def _result(pending):
+	return pending.result() if isinstance(pending, Future) else pending
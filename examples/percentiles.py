@@ -0,0 +1,15 @@
+"""
+Percentiles for the latency reports, with no dependencies so that the
+benchmarks and the trace summary CLI can use them without importing a
+retrieval stack.
+"""
+import math
+
+
+def percentile(values: list, q: float) -> float:
+	"""Nearest-rank percentile, q between 0 and 100."""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+	return ordered[index]
@@ -0,0 +1,238 @@
+"""
+The company-policies RAG pipeline behind 09_summarization_rag.py and rag_worker.py.
+
+ingest() downloads, splits, embeds and upserts the policy text. PolicyRag
+opens what ingest() left on disk and answers questions. Nothing runs when the
+module is imported, and the heavy packages (langchain_openai, chromadb, ...)
+are imported inside the functions that need them, so a CLI that only parses
+its arguments or talks to a running worker never pays for them.
+"""
+import logging
+import os
+
+
+URL = 'https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/6JDbUb_L3egv_eOkouY71A.txt'
+FILE_NAME = "company_policies.txt"
+STORAGE_PATH = "./chroma_test_storage"
+COLLECTION_NAME = "company_policies"
+
+TEMPLATE = """You are an AI assistant.
+
+Your task is to interpret the query and use this context to factually answer the next question. Let the user know if you do not have enough information or context to answer a specific question.
+
+If you don't have enough information to answer the question do not try to make up an answer.
+
+Cite the passages you use by their number, e.g. [1].
+"""
+
+
+def policy_embeddings():
+	"""Shared, disk-cached embeddings: repeated queries never go back to OpenAI."""
+	from embedding_cache import get_embeddings
+	from tracing import get_tracer
+
+	# TRACE_EXPORT=jsonl (or otlp) records a span per pipeline step, see tracing.py.
+	return get_tracer().wrap_embeddings(get_embeddings(model="text-embedding-3-small"))
+
+
+def download_policies(file_path: str):
+	from downloader import Downloader, DownloadError
+
+	# Pooled session, conditional requests: an unchanged file costs one 304 response.
+	with Downloader() as downloader:
+		try:
+			result = downloader.fetch(URL, file_path)
+			print(f"{FILE_NAME}: {result.status} ({result.bytes} bytes in {result.seconds:.2f}s)")
+		except DownloadError as e:
+			# Offline or server down: carry on with the copy we already have, if any.
+			if not os.path.isfile(file_path):
+				raise
+			logging.error(e)
+
+
+def text_loader(file_name: str, title: str):
+	from langchain_community.document_loaders import TextLoader
+
+	file_path = os.path.join(os.getcwd(), "data", file_name)
+	loader = TextLoader(file_path)
+	documents = loader.load()
+
+	for doc in documents:
+		doc.metadata.update({'source': file_name, 'title': title})
+		doc.metadata = {k: v for k, v in doc.metadata.items() if k in ["source", "title"]}
+
+	return documents
+
+
+def make_splitter():
+	from streaming_splitter import StreamingRecursiveSplitter
+	from tokenizer import count_tokens
+
+	# SPLIT_BY=tokens measures chunks in model tokens instead of characters,
+	# 200 tokens is roughly the same amount of English text as 800 characters.
+	split_by_tokens = os.getenv("SPLIT_BY", "chars") == "tokens"
+
+	return StreamingRecursiveSplitter(
+		chunk_size=200 if split_by_tokens else 800,
+		chunk_overlap=25 if split_by_tokens else 100,
+		length_function=count_tokens if split_by_tokens else len,  # token counts are cached per fragment
+		separators=[
+			r"(?<=[.?!])\s+(?=[A-Z])",
+			"\n\n",
+			"\n",
+			" ",
+			""
+		],
+		is_separator_regex=True,
+		keep_separator=True,
+		strip_whitespace=True,
+		add_start_index=True  # lets the context builder merge neighbouring chunks
+	)
+
+
+def ingest(storage_path: str = STORAGE_PATH, collection_name: str = COLLECTION_NAME, embeddings=None) -> dict:
+	"""Download the policies and bring the Chroma collection and BM25 index up to date."""
+	import chromadb
+	from bm25_index import BM25Index, bm25_path_for
+	from incremental_index import IncrementalIndexer, manifest_path_for
+	from tracing import get_tracer
+
+	file_path = os.path.join(os.getcwd(), "data", FILE_NAME)
+	download_policies(file_path)
+	docs = text_loader(FILE_NAME, "Company Policies")
+
+	# Chunks stream straight into the indexer instead of being collected in a list first.
+	text_chunks = get_tracer().iterate(make_splitter().lazy_split_documents(docs), "split_documents", kind="splitter")
+
+	policy_collection = chromadb.PersistentClient(path=storage_path).get_or_create_collection(name=collection_name)
+
+	# Only new or changed chunks are embedded, chunks that disappeared are deleted.
+	indexer = IncrementalIndexer(
+		policy_collection,
+		embeddings or policy_embeddings(),
+		manifest_path=manifest_path_for(storage_path, collection_name),
+		# Embed in batches of at most ~8k tokens, 4 at a time, with at most 8 batches in memory.
+		ingest_options={"max_tokens": 8000, "max_workers": 4, "max_in_flight": 8},
+		# Keyword (BM25) index over the same chunks, saved next to the Chroma files.
+		keyword_index=BM25Index(bm25_path_for(storage_path, collection_name))
+	)
+
+	index_stats = indexer.index(text_chunks)
+	print(f"Indexed chunks: {index_stats['added']} added, {index_stats['removed']} removed, {index_stats['unchanged']} unchanged")
+	if index_stats["added"]:
+		print(f"Ingest throughput: {index_stats['chunks_per_sec']:.1f} chunks/sec")
+	return index_stats
+
+
+class PolicyRag:
+	"""Opens an ingested collection once and answers questions with hybrid retrieval and an answer cache."""
+
+	def __init__(self, storage_path: str = STORAGE_PATH, collection_name: str = COLLECTION_NAME, embeddings=None):
+		import chromadb
+		from langchain_openai import ChatOpenAI
+		from langchain_core.prompts import ChatPromptTemplate
+		from langchain_core.output_parsers import StrOutputParser
+		from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+		from prompt_layout import PrefixStablePrompt
+		from bm25_index import BM25Index, bm25_path_for
+		from context_builder import build_context
+		from hybrid_retriever import HybridRetriever
+		from incremental_index import manifest_path_for, read_fingerprint
+		from semantic_cache import SemanticCache
+		from tracing import get_tracer
+
+		self.tracer = get_tracer()
+		self.embeddings = embeddings or policy_embeddings()
+		self.manifest_path = manifest_path_for(storage_path, collection_name)
+
+		try:
+			self.policy_collection = chromadb.PersistentClient(path=storage_path).get_collection(collection_name)
+		except Exception as e:
+			raise ValueError(f"Collection '{collection_name}' not found in {storage_path}, run 09_summarization_rag.py --ingest first") from e
+
+		self.vector_index = self._load_vector_index()
+
+		@self.tracer.traced("chroma_retriever", kind="retriever")
+		def chroma_retriever(query: str, k: int=10):
+			query_vector = self.embeddings.embed_query(query)
+
+			results = self.vector_index.query(
+				query_embeddings=[query_vector],
+				n_results=k,
+				include=["documents", "metadatas"]
+			)
+
+			return results
+
+		# BM25 catches exact policy terms the embeddings miss; fused with the vector
+		# results by rank, so a small k can cover both exact terms and paraphrases.
+		self.bm25_path = bm25_path_for(storage_path, collection_name)
+		self.hybrid_retriever = HybridRetriever(chroma_retriever, BM25Index(self.bm25_path))
+
+		def hybrid_search(query: str, k: int=4):
+			return self.hybrid_retriever.query(query, k=k)
+
+		llm = ChatOpenAI(
+			model="gpt-4.1-mini",
+			temperature=0.3,
+			top_p=0.9,
+		)
+
+		# The instructions are a static system message, the retrieved context comes
+		# after them: the instructions stay a cacheable prefix for the provider.
+		prompt = PrefixStablePrompt(ChatPromptTemplate.from_messages(
+			[
+				("system", TEMPLATE),
+				("system", "Context: {context}"),
+				("human", "{question}")
+			]
+		), name="policy_rag")
+
+		self.rag_chain = (
+			{"context": RunnableLambda(hybrid_search) | build_context, "question": RunnablePassthrough()}
+			| prompt
+			| llm
+			| StrOutputParser()
+		)
+
+		# Near-identical questions are answered from the cache without calling the LLM.
+		# The version ties cached answers to the indexed content: re-indexing drops them.
+		self.answer_cache = SemanticCache(self.embeddings, threshold=0.92, ttl_seconds=3600, max_entries=1000, version=read_fingerprint(self.manifest_path))
+
+	def _load_vector_index(self):
+		from numpy_index import NumpyVectorIndex
+
+		# RETRIEVER_BACKEND=numpy answers queries from an in-process copy of the
+		# collection, which skips the Chroma client overhead for small collections.
+		if os.getenv("RETRIEVER_BACKEND", "chroma") == "numpy":
+			return NumpyVectorIndex.from_chroma(self.policy_collection)
+		return self.policy_collection
+
+	def _check_version(self):
+		"""Pick up an ingest made by another process (e.g. while rag_worker.py keeps running)."""
+		from bm25_index import BM25Index
+		from incremental_index import read_fingerprint
+
+		version = read_fingerprint(self.manifest_path)
+		if version != self.answer_cache.version:
+			# Both sides of the hybrid search, so keyword and vector hits come from the same ingest.
+			self.vector_index = self._load_vector_index()
+			self.hybrid_retriever.keyword_index = BM25Index(self.bm25_path)
+			self.answer_cache.set_version(version)
+
+	def ask(self, question: str) -> str:
+		self._check_version()
+		with self.tracer.span("cached_rag", kind="handler"):
+			answer = self.answer_cache.lookup(question)
+			if answer is None:
+				answer = self.rag_chain.invoke(question, config={"callbacks": self.tracer.callbacks()})
+				self.answer_cache.store(question, answer)
+			return answer
+
+	def close(self):
+		self.hybrid_retriever.close()
+
+	def stats(self) -> dict:
+		from prompt_layout import prefix_stats
+
+		return {"answer_cache": self.answer_cache.stats(), "embedding_cache": self.embeddings.stats(), "prompt_prefix": prefix_stats()}
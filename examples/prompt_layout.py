@@ -0,0 +1,140 @@
+"""
+Prefix-stable prompts: static text first, rendered once, with a cacheable-prefix metric.
+
+Providers cache the longest prompt prefix they have seen before (OpenAI does
+this automatically for prompts over 1024 tokens), so every token before the
+first variable is cheaper and faster on the next call. This only works when
+nothing that varies per call comes first, so it is worth checking:
+
+- `PrefixStablePrompt` wraps a ChatPromptTemplate or PromptTemplate. Leading
+  messages without variables are rendered once and reused. The first message
+  with a variable is split into its static head and the variable tail, e.g. a
+  system message "...instructions... Context: {context}" becomes the
+  instructions plus a separate "{context}" message with the same role. The
+  rest is compiled once and formatted per call. Joined together the output is
+  the same text as the wrapped prompt's.
+- Per-prompt counters record what fraction of each rendered prompt's tokens
+  is the static prefix (`prefix_stats()`).
+
+Wording that puts a variable first ("Take on the role of {role} and answer")
+can't be reordered automatically, so change the template itself.
+25_prompt_layout_check.py shows the prefix ratio before and after. It also
+checks that the output text did not change.
+"""
+import threading
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import ChatPromptValue, StringPromptValue
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.runnables import Runnable
+from tokenizer import count_tokens
+
+
+def split_template(template: str) -> tuple:
+	"""(static head, rest) of an f-string template, split before the first variable."""
+	i = 0
+	while i < len(template):
+		if template.startswith(("{{", "}}"), i):
+			i += 2
+		elif template[i] == "{":
+			break
+		else:
+			i += 1
+	return template[:i], template[i:]
+
+
+def _unescape(text: str) -> str:
+	return text.replace("{{", "{").replace("}}", "}")
+
+
+class PrefixStats:
+	"""Running totals of static-prefix and total prompt tokens for one prompt."""
+
+	def __init__(self, static_tokens: int):
+		self.static_tokens = static_tokens
+		self.calls = 0
+		self.total_tokens = 0
+		self._lock = threading.Lock()
+
+	def record(self, total_tokens: int):
+		with self._lock:
+			self.calls += 1
+			self.total_tokens += total_tokens
+
+	def as_dict(self) -> dict:
+		with self._lock:
+			mean_total = self.total_tokens / self.calls if self.calls else 0.0
+			return {
+				"calls": self.calls,
+				"static_prefix_tokens": self.static_tokens,
+				"mean_prompt_tokens": round(mean_total, 1),
+				"cacheable_prefix_ratio": round(self.static_tokens / mean_total, 3) if mean_total else 0.0,
+			}
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def prefix_stats() -> dict:
+	"""{prompt name: calls, static prefix tokens, mean prompt tokens, cacheable prefix ratio}."""
+	with _stats_lock:
+		return {name: stats.as_dict() for name, stats in _stats.items()}
+
+
+class PrefixStablePrompt(Runnable):
+	"""Drop-in replacement for a prompt in a chain: static prefix rendered once, the rest per call."""
+
+	def __init__(self, prompt, name: str):
+		if prompt.partial_variables:
+			raise ValueError("Partial variables are not supported, format them into the template")
+		self.prompt = prompt
+		self.name = name
+		self.input_variables = prompt.input_variables
+
+		if isinstance(prompt, ChatPromptTemplate):
+			self._init_chat(prompt)
+			static_tokens = sum(count_tokens(message.content) for message in self.static_messages)
+		elif isinstance(prompt, PromptTemplate) and prompt.template_format == "f-string":
+			head, tail = split_template(prompt.template)
+			self.static_text = _unescape(head)
+			self.variable_prompt = PromptTemplate.from_template(tail) if tail else None
+			static_tokens = count_tokens(self.static_text) if self.static_text else 0
+		else:
+			raise TypeError(f"Unsupported prompt: {type(prompt).__name__}")
+
+		with _stats_lock:
+			self.stats = _stats[name] = PrefixStats(static_tokens)
+
+	def _init_chat(self, prompt: ChatPromptTemplate):
+		self.static_messages = []
+		variable_messages = []
+		for message in prompt.messages:
+			if variable_messages:
+				variable_messages.append(message)
+			elif isinstance(message, BaseMessage):
+				self.static_messages.append(message)
+			elif isinstance(getattr(message, "prompt", None), PromptTemplate) and message.prompt.template_format == "f-string":
+				head, tail = split_template(message.prompt.template)
+				if not tail:
+					self.static_messages.extend(message.format_messages())
+					continue
+				if head:
+					self.static_messages.extend(type(message)(prompt=PromptTemplate.from_template(head)).format_messages())
+				variable_messages.append(type(message)(prompt=PromptTemplate.from_template(tail)))
+			else:
+				# MessagesPlaceholder, image or mustache templates: formatted per call from here on.
+				variable_messages.append(message)
+		self.variable_prompt = ChatPromptTemplate(variable_messages) if variable_messages else None
+
+	def _format(self, inputs: dict):
+		if isinstance(self.prompt, ChatPromptTemplate):
+			variable = self.variable_prompt.format_messages(**inputs) if self.variable_prompt else []
+			messages = self.static_messages + variable
+			self.stats.record(sum(count_tokens(message.content) for message in messages))
+			return ChatPromptValue(messages=messages)
+		text = self.static_text + (self.variable_prompt.format(**inputs) if self.variable_prompt else "")
+		self.stats.record(count_tokens(text))
+		return StringPromptValue(text=text)
+
+	def invoke(self, input: dict, config=None, **kwargs):
+		return self._call_with_config(self._format, input, config, run_type="prompt")
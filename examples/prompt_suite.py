@@ -0,0 +1,78 @@
+"""
+Run a suite of prompts concurrently with `batch`, keeping the original order.
+
+Calling `llm.invoke` in a loop makes the total time the sum of every round
+trip. `run_prompt_suite` sends the prompts through `Runnable.batch` with a
+bounded `max_concurrency`, so a suite of hundreds of prompts takes roughly as
+long as its slowest few calls. A rate limiter shared per provider keeps us
+under the provider's request limits, and every result records its own latency
+and token usage.
+"""
+import time
+from dataclasses import dataclass, field
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableLambda
+
+
+_rate_limiters = {}  # provider -> (settings, limiter)
+
+
+def rate_limiter_for(provider: str, requests_per_second: float = 5, max_bucket_size: int = 10) -> InMemoryRateLimiter:
+	"""One rate limiter per provider, shared by every model of that provider; asking again with other settings is an error."""
+	settings = (requests_per_second, max_bucket_size)
+	if provider not in _rate_limiters:
+		limiter = InMemoryRateLimiter(
+			requests_per_second=requests_per_second,
+			check_every_n_seconds=0.05,
+			max_bucket_size=max_bucket_size,
+		)
+		_rate_limiters[provider] = (settings, limiter)
+	existing, limiter = _rate_limiters[provider]
+	if existing != settings:
+		raise ValueError(f"The {provider} rate limiter already exists with requests_per_second={existing[0]}, "
+						 f"max_bucket_size={existing[1]}")
+	return limiter
+
+
+@dataclass
+class PromptResult:
+	name: str
+	content: str
+	latency: float  # seconds for this prompt's round trip
+	usage: dict = field(default_factory=dict)  # input/output/total tokens, if reported
+
+
+def _suite_runner(llm) -> RunnableLambda:
+	def run_one(item):
+		name, prompt = item
+		start = time.perf_counter()
+		response = llm.invoke(prompt)
+		return PromptResult(name, response.content, time.perf_counter() - start, response.usage_metadata or {})
+
+	async def arun_one(item):
+		name, prompt = item
+		start = time.perf_counter()
+		response = await llm.ainvoke(prompt)
+		return PromptResult(name, response.content, time.perf_counter() - start, response.usage_metadata or {})
+
+	return RunnableLambda(run_one, afunc=arun_one)
+
+
+def run_prompt_suite(llm, prompts: dict, max_concurrency: int = 8) -> list[PromptResult]:
+	"""Run every prompt, at most `max_concurrency` at a time; results keep the dict order."""
+	return _suite_runner(llm).batch(list(prompts.items()), config={"max_concurrency": max_concurrency})
+
+
+async def arun_prompt_suite(llm, prompts: dict, max_concurrency: int = 8) -> list[PromptResult]:
+	"""Async version of `run_prompt_suite`."""
+	return await _suite_runner(llm).abatch(list(prompts.items()), config={"max_concurrency": max_concurrency})
+
+
+def print_suite_summary(results: list[PromptResult], wall_time: float):
+	if not results:
+		print(f"0 prompts in {wall_time:.2f}s")
+		return
+	latencies = sorted(result.latency for result in results)
+	tokens = sum(result.usage.get("total_tokens", 0) for result in results)
+	print(f"{len(results)} prompts in {wall_time:.2f}s "
+		  f"(sum of latencies {sum(latencies):.2f}s, slowest {latencies[-1]:.2f}s), {tokens} tokens")
@@ -0,0 +1,86 @@
+"""
+Thin client for rag_worker.py: sends one question over a local socket and prints the answer.
+
+python rag_client.py "Can I eat in the company car?"
+python rag_client.py --ingest        # the worker re-ingests and reloads
+python rag_client.py --stats
+
+Only the standard library is imported, so a question costs a Python start-up
+and one round trip instead of loading LangChain, OpenAI and Chroma.
+
+The worker address is a Unix socket path, or host:port for TCP (the only
+option on Windows). RAG_WORKER_ADDRESS overrides the default for both sides.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+DEFAULT_ADDRESS = "./.rag_worker.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+
+
+class WorkerError(Exception):
+	pass
+
+
+def worker_address() -> str:
+	return os.getenv("RAG_WORKER_ADDRESS", DEFAULT_ADDRESS)
+
+
+def parse_address(address: str):
+	"""(family, address) for socket.socket and connect/bind."""
+	host, sep, port = address.rpartition(":")
+	if sep and port.isdigit() and "/" not in address:
+		return socket.AF_INET, (host or "127.0.0.1", int(port))
+	if not hasattr(socket, "AF_UNIX"):
+		raise ValueError(f"{address} is not host:port, and Unix sockets are not available on this platform")
+	return socket.AF_UNIX, address
+
+
+def request(payload: dict, address: str = None, timeout: float = 300) -> dict:
+	"""Send one JSON request line to the worker and return its JSON reply."""
+	family, target = parse_address(address or worker_address())
+	try:
+		with socket.socket(family, socket.SOCK_STREAM) as sock:
+			sock.settimeout(timeout)
+			sock.connect(target)
+			sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+			with sock.makefile("rb") as reply:
+				line = reply.readline()
+	except (FileNotFoundError, ConnectionRefusedError) as e:
+		raise WorkerError(f"No RAG worker at {address or worker_address()}, start one with: python rag_worker.py") from e
+	if not line:
+		raise WorkerError("The RAG worker closed the connection without replying")
+	response = json.loads(line)
+	if not response.get("ok"):
+		raise WorkerError(response.get("error", "unknown error"))
+	return response
+
+
+def ask(question: str, address: str = None) -> str:
+	return request({"op": "ask", "question": question}, address)["answer"]
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("questions", nargs="*")
+	parser.add_argument("--ingest", action="store_true")
+	parser.add_argument("--stats", action="store_true")
+	parser.add_argument("--address", default=None)
+	args = parser.parse_args()
+
+	try:
+		if args.ingest:
+			print(f"Indexed chunks: {request({'op': 'ingest'}, args.address)['stats']}")
+		for question in args.questions:
+			print(ask(question, args.address))
+		if args.stats:
+			print(json.dumps(request({"op": "stats"}, args.address)["stats"], indent=2))
+	except WorkerError as e:
+		sys.exit(str(e))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,157 @@
+"""
+Persistent RAG worker: loads the pipeline once and answers rag_client.py over a local socket.
+
+python rag_worker.py [--address ./.rag_worker.sock] [--ingest]
+
+Models, the Chroma collection, the BM25 index and the caches stay warm between
+questions, so a client only pays for the retrieval and the LLM call. Requests
+are one JSON object per line:
+
+	{"op": "ask", "question": "..."}   -> {"ok": true, "answer": "..."}
+	{"op": "ingest"}                   -> {"ok": true, "stats": {...}}
+	{"op": "stats"}                    -> {"ok": true, "stats": {...}}
+
+Connections are served on threads; an ingest builds a fresh pipeline and swaps
+it in, so questions keep being answered by the old one until it is ready. The
+old one is closed once the last question it was answering is done.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from rag_client import parse_address, worker_address
+
+
+class RagRequestHandler(socketserver.StreamRequestHandler):
+
+	def handle(self):
+		for line in self.rfile:
+			if not line.strip():
+				continue
+			try:
+				response = {"ok": True, **self.server.dispatch(json.loads(line))}
+			except Exception as e:
+				logging.exception("RAG worker request failed")
+				response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+			self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+			self.wfile.flush()
+
+
+class RagServer(socketserver.ThreadingMixIn):
+	"""The shared part of the Unix socket and TCP servers: one warm pipeline, swapped on ingest."""
+	daemon_threads = True
+
+	def __init__(self, target, make_rag, ingest):
+		super().__init__(target, RagRequestHandler)
+		self._make_rag = make_rag
+		self._ingest = ingest
+		self._ingest_lock = threading.Lock()
+		self._rag_lock = threading.Lock()
+		self._users = {}      # pipeline -> questions it is answering right now
+		self._retired = set()  # swapped out, closed when its last question is done
+		self.started = time.time()
+		self.served = 0
+		self.rag = make_rag()
+
+	def _checkout(self):
+		with self._rag_lock:
+			self.served += 1
+			rag = self.rag
+			self._users[rag] = self._users.get(rag, 0) + 1
+			return rag
+
+	def _checkin(self, rag):
+		with self._rag_lock:
+			self._users[rag] -= 1
+			if self._users[rag]:
+				return
+			del self._users[rag]
+			if rag not in self._retired:
+				return
+			self._retired.remove(rag)
+		rag.close()
+
+	def _swap(self, rag):
+		with self._rag_lock:
+			old, self.rag = self.rag, rag
+			if old in self._users:
+				self._retired.add(old)
+				return
+		old.close()
+
+	def dispatch(self, request: dict) -> dict:
+		op = request.get("op")
+		if op == "ask":
+			rag = self._checkout()
+			try:
+				return {"answer": rag.ask(request["question"])}
+			finally:
+				self._checkin(rag)
+		if op == "ingest":
+			with self._ingest_lock:
+				stats = self._ingest()
+				self._swap(self._make_rag())
+			return {"stats": {k: stats[k] for k in ("added", "removed", "unchanged")}}
+		if op == "stats":
+			return {"stats": {"served": self.served, "uptime_seconds": round(time.time() - self.started, 1), **self.rag.stats()}}
+		raise ValueError(f"Unknown op: {op}")
+
+
+class TcpRagServer(RagServer, socketserver.TCPServer):
+	allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+	class UnixRagServer(RagServer, socketserver.UnixStreamServer):
+		pass
+
+
+def serve(address: str = None, ingest_first: bool = False):
+	from dotenv import load_dotenv
+	from policy_rag import PolicyRag, ingest, policy_embeddings
+
+	_ = load_dotenv(dotenv_path=os.path.join(os.getcwd(), "config", ".env"))
+
+	address = address or worker_address()
+	family, target = parse_address(address)
+	if isinstance(target, str) and os.path.exists(target):
+		os.remove(target)  # stale socket left by a worker that was killed
+
+	start = time.perf_counter()
+	embeddings = policy_embeddings()
+	if ingest_first:
+		ingest(embeddings=embeddings)
+
+	server_class = TcpRagServer if family == socket.AF_INET else UnixRagServer
+	server = server_class(
+		target,
+		make_rag=lambda: PolicyRag(embeddings=embeddings),
+		ingest=lambda: ingest(embeddings=embeddings)
+	)
+	print(f"RAG worker ready in {time.perf_counter() - start:.2f}s, listening on {address}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		if isinstance(target, str) and os.path.exists(target):
+			os.remove(target)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--address", default=None, help="Unix socket path or host:port")
+	parser.add_argument("--ingest", action="store_true", help="bring the collection up to date before serving")
+	args = parser.parse_args()
+
+	logging.basicConfig(level=logging.ERROR, filename="test.log", filemode="a", format="%(asctime)s from %(name)s: %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+	serve(args.address, ingest_first=args.ingest)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,91 @@
+"""
+A long-lived retrieval service over the persisted company_policies collection.
+
+Ingest (download, split, embed, upsert) is done by 09_summarization_rag.py --ingest.
+This service only opens what is already on disk: it connects to Chroma once,
+keeps the collection handle and the embedding client warm, and answers queries.
+Cold start and per-query latency are measured so we can see where time goes.
+"""
+import os
+import time
+from collections import deque
+import chromadb
+from context_builder import build_context
+from embedding_cache import get_embeddings
+from incremental_index import manifest_path_for, read_fingerprint
+from numpy_index import NumpyVectorIndex
+from percentiles import percentile
+
+
+class RetrievalService:
+	"""Opens the Chroma collection once and serves similarity queries against it."""
+
+	def __init__(self, storage_path: str = "./chroma_test_storage", collection_name: str = "company_policies", embeddings=None, backend: str = "chroma", latency_window: int = 10_000):
+		start = time.perf_counter()
+
+		self.embeddings = embeddings or get_embeddings(model="text-embedding-3-small")
+		self.client = chromadb.PersistentClient(path=storage_path)
+		try:
+			self.collection = self.client.get_collection(collection_name)
+		except Exception as e:
+			raise ValueError(f"Collection '{collection_name}' not found in {storage_path}, run 09_summarization_rag.py --ingest first") from e
+
+		# "numpy" copies the collection into an in-process index once at startup
+		# and answers queries from it, skipping the Chroma client on every query.
+		if backend == "numpy":
+			self.index = NumpyVectorIndex.from_chroma(self.collection)
+		elif backend == "chroma":
+			self.index = self.collection
+		else:
+			raise ValueError(f"Unknown retrieval backend: {backend}")
+
+		self.manifest_path = manifest_path_for(storage_path, collection_name)
+		self._fingerprint = (None, None)  # (manifest mtime, fingerprint)
+
+		# Latencies of the most recent queries only, so a long-running service stays bounded.
+		self.query_latencies = deque(maxlen=latency_window)
+		self.queries = 0
+		self._warm_up()
+		self.cold_start_seconds = time.perf_counter() - start
+
+	def _warm_up(self):
+		# The first query loads the vector index into memory and opens the HTTP
+		# connection to the embedding provider; pay for that now, not on a user query.
+		self.index.query(
+			query_embeddings=[self.embeddings.embed_query("warm up")],
+			n_results=1,
+			include=[]
+		)
+
+	def fingerprint(self) -> str:
+		"""Changes whenever 09_summarization_rag.py re-indexes the collection."""
+		mtime = os.path.getmtime(self.manifest_path) if os.path.isfile(self.manifest_path) else None
+		if mtime != self._fingerprint[0]:
+			self._fingerprint = (mtime, read_fingerprint(self.manifest_path))
+		return self._fingerprint[1]
+
+	def query(self, query: str, k: int = 10) -> dict:
+		"""Raw Chroma results (documents and metadatas) for the k closest chunks."""
+		start = time.perf_counter()
+		query_vector = self.embeddings.embed_query(query)
+		results = self.index.query(
+			query_embeddings=[query_vector],
+			n_results=k,
+			include=["documents", "metadatas"]
+		)
+		self.query_latencies.append(time.perf_counter() - start)
+		self.queries += 1
+		return results
+
+	def context(self, query: str, k: int = 10) -> str:
+		"""The retrieved chunks as a compact, cited context block for a prompt."""
+		return build_context(self.query(query, k))
+
+	def latency_stats(self) -> dict:
+		"""Cold start and per-query latency in milliseconds."""
+		return {
+			"cold_start_ms": self.cold_start_seconds * 1000,
+			"queries": self.queries,
+			"p50_ms": percentile(self.query_latencies, 50) * 1000,
+			"p95_ms": percentile(self.query_latencies, 95) * 1000,
+		}
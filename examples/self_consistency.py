@@ -0,0 +1,91 @@
+"""
+Self-consistency: many short samples, one majority vote.
+
+Asking one completion for "three independent calculations" gives a long,
+slow answer whose three attempts are not independent at all: each one sees
+the ones before it. Here we fire `n_samples` short completions concurrently at
+a temperature above zero, pull the final answer out of each, and vote. As soon
+as one answer has `threshold` votes it can no longer lose, so the samples
+still running are cancelled.
+"""
+import asyncio
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+SAMPLE_PROMPT = """{question}
+
+Reason step by step, briefly. End with the final answer on its own line as "Answer: <answer>"."""
+
+_ANSWER_LINE = re.compile(r"answer\s*[:=]\s*(.+)", re.IGNORECASE)
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+def extract_answer(text: str):
+	"""The final answer of a sample: the "Answer:" line if there is one, else the last number."""
+	matches = _ANSWER_LINE.findall(text)
+	if matches:
+		answer = matches[-1].strip().rstrip(".")
+		numbers = _NUMBER.findall(answer)
+		# "Answer: Tom has 10 apples" and "Answer: 10" should count as the same vote.
+		return numbers[0].replace(",", "") if len(numbers) == 1 else answer.lower()
+	numbers = _NUMBER.findall(text)
+	return numbers[-1].replace(",", "") if numbers else None
+
+
+@dataclass
+class VoteResult:
+	answer: object  # None when no sample produced an answer
+	votes: Counter
+	completed: int  # samples that finished
+	cancelled: int  # samples stopped early once the vote was decided
+	latency: float
+	usage: dict = field(default_factory=dict)  # summed over the completed samples
+
+	@property
+	def agreement(self) -> float:
+		return self.votes[self.answer] / self.completed if self.completed else 0.0
+
+
+async def self_consistency(llm, question: str, n_samples: int = 5, threshold: int = None,
+						   temperature: float = 0.7, extract=extract_answer, prompt: str = SAMPLE_PROMPT) -> VoteResult:
+	"""
+	Sample `n_samples` answers to `question` concurrently and majority-vote.
+
+	`threshold` is the number of agreeing samples that decides the vote early
+	(default: a strict majority of `n_samples`). Set it to `n_samples` to
+	always wait for every sample.
+	"""
+	threshold = threshold or n_samples // 2 + 1
+	sampler = llm.bind(temperature=temperature)
+	text = prompt.format(question=question)
+
+	start = time.perf_counter()
+	tasks = [asyncio.create_task(sampler.ainvoke(text)) for _ in range(n_samples)]
+	votes = Counter()
+	usage = Counter()
+	completed = 0
+	try:
+		for next_done in asyncio.as_completed(tasks):
+			response = await next_done
+			completed += 1
+			# Only the counts: input_token_details / output_token_details are nested dicts.
+			usage.update({key: value for key, value in (response.usage_metadata or {}).items() if isinstance(value, int)})
+			answer = extract(response.content)
+			if answer is None:
+				continue
+			votes[answer] += 1
+			if votes[answer] >= threshold:
+				break
+	finally:
+		cancelled = 0
+		for task in tasks:
+			if not task.done():
+				task.cancel()
+				cancelled += 1
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+	answer = votes.most_common(1)[0][0] if votes else None
+	return VoteResult(answer, votes, completed, cancelled, time.perf_counter() - start, dict(usage))
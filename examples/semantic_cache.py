@@ -0,0 +1,112 @@
+"""
+A semantic cache for LLM answers.
+
+Users keep asking near-identical questions ("Can I eat in the company car?",
+"Am I allowed to eat in the company car?"). Instead of paying for retrieval and
+a completion every time, we embed the question and look for a previous
+question whose embedding is close enough (cosine similarity above a
+threshold). If there is one, its answer is returned without calling the LLM.
+
+Entries expire after `ttl_seconds`, the cache holds at most `max_entries`
+answers (least recently used are evicted), and changing the `version` (for
+example the fingerprint of the indexed collection) drops every answer that was
+based on the old data.
+"""
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class SemanticCache:
+	"""In-memory nearest-neighbour cache from questions to answers."""
+
+	def __init__(self, embeddings, threshold: float = 0.92, ttl_seconds: float = 3600, max_entries: int = 1000, version: str = None):
+		self.embeddings = embeddings
+		self.threshold = threshold
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self.version = version
+
+		self._entries = OrderedDict()  # key -> {"query", "answer", "created"}, in LRU order
+		self._keys = []                # row order of self._matrix
+		self._matrix = None            # normalized question vectors, one row per entry
+		self._next_key = 0
+		self._lock = threading.Lock()
+
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.invalidations = 0
+
+	def _embed(self, query: str) -> np.ndarray:
+		vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+		norm = np.linalg.norm(vector)
+		return vector / norm if norm else vector
+
+	def _remove(self, key):
+		self._entries.pop(key)
+		row = self._keys.index(key)
+		self._keys.pop(row)
+		self._matrix = np.delete(self._matrix, row, axis=0)
+
+	def invalidate(self):
+		"""Forget every cached answer."""
+		with self._lock:
+			self._entries.clear()
+			self._keys = []
+			self._matrix = None
+			self.invalidations += 1
+
+	def set_version(self, version: str):
+		"""Invalidate the cache if the data behind the answers has changed."""
+		if version != self.version:
+			self.invalidate()
+			self.version = version
+
+	def lookup(self, query: str):
+		"""Cached answer for a similar enough question, or None."""
+		vector = self._embed(query)
+		with self._lock:
+			now = time.time()
+			expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]
+			for key in expired:
+				self._remove(key)
+
+			if self._matrix is not None and len(self._keys):
+				similarities = self._matrix @ vector
+				best = int(np.argmax(similarities))
+				if similarities[best] >= self.threshold:
+					key = self._keys[best]
+					self._entries.move_to_end(key)
+					self.hits += 1
+					return self._entries[key]["answer"]
+
+			self.misses += 1
+			return None
+
+	def store(self, query: str, answer: str):
+		vector = self._embed(query)
+		with self._lock:
+			key = self._next_key
+			self._next_key += 1
+			self._entries[key] = {"query": query, "answer": answer, "created": time.time()}
+			self._keys.append(key)
+			row = vector[np.newaxis, :]
+			self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+
+			while len(self._entries) > self.max_entries:
+				oldest = next(iter(self._entries))
+				self._remove(oldest)
+				self.evictions += 1
+
+	def stats(self) -> dict:
+		total = self.hits + self.misses
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hits / total if total else 0.0,
+			"size": len(self._entries),
+			"evictions": self.evictions,
+			"invalidations": self.invalidations,
+		}
@@ -0,0 +1,54 @@
+"""
+Helpers for streaming chain output into a UI while timing it.
+
+With streaming, the latency a user perceives is the time to first token (TTFT),
+not the time the whole completion takes. `stream_text` yields the growing
+answer after every chunk so Gradio can update the Textbox as tokens arrive,
+and reports TTFT and total latency once the stream is done.
+"""
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class StreamTimings:
+	ttft: float  # seconds until the first non-empty chunk arrived
+	total: float  # seconds until the stream finished
+	chars: int
+
+
+def print_timings(timings: StreamTimings):
+	ttft = f"{timings.ttft:.3f}s" if timings.ttft is not None else "n/a"
+	print(f"TTFT: {ttft} | total: {timings.total:.3f}s | {timings.chars} chars")
+
+
+def stream_text(chain, inputs, on_complete=print_timings, config=None):
+	"""Yield the accumulated text of `chain.stream(inputs, config=config)` after every chunk."""
+	start = time.perf_counter()
+	ttft = None
+	text = ""
+
+	for chunk in chain.stream(inputs, config=config):
+		if ttft is None and chunk:
+			ttft = time.perf_counter() - start
+		text += chunk
+		yield text
+
+	if on_complete:
+		on_complete(StreamTimings(ttft=ttft, total=time.perf_counter() - start, chars=len(text)))
+
+
+async def astream_text(chain, inputs, on_complete=print_timings, config=None):
+	"""Async version of `stream_text`: the event loop stays free while tokens arrive."""
+	start = time.perf_counter()
+	ttft = None
+	text = ""
+
+	async for chunk in chain.astream(inputs, config=config):
+		if ttft is None and chunk:
+			ttft = time.perf_counter() - start
+		text += chunk
+		yield text
+
+	if on_complete:
+		on_complete(StreamTimings(ttft=ttft, total=time.perf_counter() - start, chars=len(text)))
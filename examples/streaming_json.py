@@ -0,0 +1,298 @@
+"""
+Incremental JSON parsing and schema validation for streamed structured output.
+
+`prompt | llm | JsonOutputParser()` waits for the whole completion, and its
+streaming mode re-parses the entire partial text on every chunk. Here every
+character is looked at once: a small state machine reads one flat JSON
+object, hands each field to a schema as soon as its value is complete, and
+stops reading when the closing brace arrives. The schema rejects an unknown
+key, a value of the wrong type or a missing field the moment it shows up.
+When the object is closed or found invalid, the stream is closed, which
+cancels the rest of the generation (trailing chatter, or a malformed answer
+that would run to max_tokens).
+
+aextract() handles one input, aextract_many() runs many concurrently. Pass a
+chain that ends with the chat model (prompt | llm): closing a synchronous
+stream that ends in StrOutputParser first drains the rest of the generation.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+
+class StreamingJsonError(ValueError):
+	"""The streamed text is not (or can no longer become) a valid object for the schema."""
+
+
+class ObjectSchema:
+	"""Flat object schema: field name -> Python type. Any field may also be `missing_value` (e.g. "N/A")."""
+
+	def __init__(self, fields: dict, missing_value: str = "N/A"):
+		self.fields = fields
+		self.missing_value = missing_value
+
+	def check_key(self, key: str, seen: dict):
+		if key not in self.fields:
+			raise StreamingJsonError(f"unexpected key {key!r}")
+		if key in seen:
+			raise StreamingJsonError(f"duplicate key {key!r}")
+
+	def check_value_start(self, key: str, kind: type):
+		# Strings are always allowed, they may turn out to be the missing value.
+		if kind is not str and self.fields[key] is str:
+			raise StreamingJsonError(f"{key!r} must be str")
+
+	def check_partial_string(self, key: str, buffer: list):
+		if self.fields[key] is not str and not self.missing_value.startswith("".join(buffer)):
+			raise StreamingJsonError(f"{key!r} must be {self.fields[key].__name__} or {self.missing_value!r}")
+
+	def check_value(self, key: str, value):
+		expected = self.fields[key]
+		if value == self.missing_value or (isinstance(value, expected) and not isinstance(value, bool)):
+			return
+		raise StreamingJsonError(f"{key!r} must be {expected.__name__}, got {value!r}")
+
+	def check_complete(self, seen: dict):
+		missing = [key for key in self.fields if key not in seen]
+		if missing:
+			raise StreamingJsonError(f"missing keys {missing}")
+
+
+# The prompt of 03_output_parsers.py, and the schema its answers must follow.
+MOVIE_TEMPLATE = """
+You are a film scholar and expert in movies.
+
+Generate information about "{movie_name}" in JSON format.
+
+Return ONLY a JSON object with no text before or after. The JSON must have these keys:
+
+Output valid JSON in exactly this format:
+{{
+	"title": "movie title",
+  	"director": "director name",
+  	"year": year as number,
+  	"genre": "movie genre"
+}}
+
+If any field doesn't apply or lacks sufficient information, use "N/A"
+
+Your entire response must be valid JSON. Do not include any text outside the JSON object in your response.
+"""
+
+MOVIE_SCHEMA = ObjectSchema({"title": str, "director": str, "year": int, "genre": str})
+
+_SCALAR_CHARS = set("0123456789+-.eEtruefalsn")
+
+
+class IncrementalJsonParser:
+	"""Feed text chunks, get completed (key, value) fields back; `done` once the object has closed."""
+
+	def __init__(self, schema: ObjectSchema = None, max_chars: int = 2000):
+		self.schema = schema
+		self.max_chars = max_chars
+		self.fields = {}
+		self.done = False
+		self.consumed = 0
+		self._state = "start"
+		self._key = None
+		self._buffer = []
+		self._escape = False
+		self._after_comma = False
+
+	def _fail(self, message: str):
+		raise StreamingJsonError(f"{message} at character {self.consumed}")
+
+	def _read_string(self, ch: str) -> bool:
+		"""Add ch to the string being read; True when ch is the closing quote."""
+		if self._escape:
+			self._escape = False
+		elif ch == "\\":
+			self._escape = True
+		elif ch == '"':
+			return True
+		elif ch < " ":
+			self._fail("control character in string")
+		self._buffer.append(ch)
+		return False
+
+	def _decode_string(self) -> str:
+		try:
+			return json.loads('"' + "".join(self._buffer) + '"')
+		except ValueError:
+			self._fail("invalid string escape")
+
+	def _complete(self, value, completed: list):
+		if self.schema is not None:
+			self.schema.check_value(self._key, value)
+		self.fields[self._key] = value
+		completed.append((self._key, value))
+		self._state = "after_value"
+
+	def _close(self):
+		if self._after_comma:
+			self._fail("trailing comma")
+		if self.schema is not None:
+			self.schema.check_complete(self.fields)
+		self.done = True
+
+	def feed(self, text: str) -> list:
+		"""Consume a chunk; returns the fields completed in it. Raises StreamingJsonError."""
+		completed = []
+		for ch in text:
+			if self.done:
+				break
+			self.consumed += 1
+			if self.consumed > self.max_chars:
+				self._fail("object too long")
+			state = self._state
+
+			if state == "string":
+				if self._read_string(ch):
+					self._complete(self._decode_string(), completed)
+				elif self.schema is not None:
+					self.schema.check_partial_string(self._key, self._buffer)
+				continue
+			if state == "key":
+				if self._read_string(ch):
+					self._key = self._decode_string()
+					if self.schema is not None:
+						self.schema.check_key(self._key, self.fields)
+					self._state = "colon"
+				continue
+			if state == "scalar":
+				if ch in _SCALAR_CHARS:
+					self._buffer.append(ch)
+					continue
+				try:
+					value = json.loads("".join(self._buffer))
+				except ValueError:
+					self._fail(f"invalid value {''.join(self._buffer)!r}")
+				self._complete(value, completed)
+				state = "after_value"  # ch (',', '}' or whitespace) belongs to what follows the value
+
+			if ch.isspace():
+				continue
+			if state == "start":
+				if ch == "{":
+					self._state = "key_or_end"
+				elif ch == "`":
+					self._state = "fence"  # ```json ... on its own line before the object
+				else:
+					self._fail(f"expected '{{', got {ch!r}")
+			elif state == "fence":
+				if ch == "{":
+					self._state = "key_or_end"
+				elif ch not in "`json":
+					self._fail(f"expected '{{', got {ch!r}")
+			elif state == "key_or_end":
+				if ch == '"':
+					self._state, self._buffer, self._after_comma = "key", [], False
+				elif ch == "}":
+					self._close()
+				else:
+					self._fail(f"expected a key, got {ch!r}")
+			elif state == "colon":
+				if ch != ":":
+					self._fail(f"expected ':', got {ch!r}")
+				self._state = "value"
+			elif state == "value":
+				if ch == '"':
+					kind, self._state = str, "string"
+					self._buffer = []
+				elif ch in "-0123456789tfn":
+					kind, self._state = (bool if ch in "tf" else type(None) if ch == "n" else int), "scalar"
+					self._buffer = [ch]
+				else:
+					self._fail(f"expected a string, number or literal, got {ch!r}")
+				if self.schema is not None:
+					self.schema.check_value_start(self._key, kind)
+			elif state == "after_value":
+				if ch == ",":
+					self._state, self._after_comma = "key_or_end", True
+				elif ch == "}":
+					self._close()
+				else:
+					self._fail(f"expected ',' or '}}', got {ch!r}")
+		return completed
+
+
+@dataclass
+class ExtractionResult:
+	inputs: dict
+	data: dict = None
+	error: str = None
+	seconds: float = 0.0
+	first_field_seconds: float = None
+	chunks: int = 0
+	closed_early: bool = False  # we stopped reading before the stream's end; the model may or may not have had more to say
+	fields: dict = field(default_factory=dict)  # whatever was complete, even if data is None
+
+	@property
+	def ok(self) -> bool:
+		return self.data is not None
+
+
+def _text(chunk) -> str:
+	return chunk if isinstance(chunk, str) else chunk.content
+
+
+def stream_fields(chain, inputs: dict, schema: ObjectSchema = MOVIE_SCHEMA, max_chars: int = 2000):
+	"""Yield (key, value) as each field completes; stops the generation once the object closes."""
+	parser = IncrementalJsonParser(schema, max_chars)
+	stream = chain.stream(inputs)
+	try:
+		for chunk in stream:
+			yield from parser.feed(_text(chunk))
+			if parser.done:
+				return
+		raise StreamingJsonError("stream ended before the object closed")
+	finally:
+		stream.close()
+
+
+async def aextract(chain, inputs: dict, schema: ObjectSchema = MOVIE_SCHEMA, max_chars: int = 2000) -> ExtractionResult:
+	"""Stream one object out of `chain` (prompt | llm), validating it on the way."""
+	result = ExtractionResult(inputs=inputs)
+	parser = IncrementalJsonParser(schema, max_chars)
+	start = time.perf_counter()
+	stream = chain.astream(inputs)
+	ended = False
+	try:
+		async for chunk in stream:
+			result.chunks += 1
+			if parser.feed(_text(chunk)) and result.first_field_seconds is None:
+				result.first_field_seconds = time.perf_counter() - start
+			if parser.done:
+				break
+		else:
+			ended = True
+			raise StreamingJsonError("stream ended before the object closed")
+		result.data = dict(parser.fields)
+	except StreamingJsonError as e:
+		result.error = str(e)
+	finally:
+		result.closed_early = not ended
+		# Closing the stream stops the generation, the rest of the tokens are never produced.
+		await stream.aclose()
+		result.fields = dict(parser.fields)
+		result.seconds = time.perf_counter() - start
+	return result
+
+
+async def aextract_many(chain, inputs_list: list, max_concurrency: int = 16, schema: ObjectSchema = MOVIE_SCHEMA, on_result=None) -> list:
+	"""aextract() over many inputs, at most max_concurrency streams at a time, results in input order."""
+	semaphore = asyncio.Semaphore(max_concurrency)
+
+	async def run(inputs: dict) -> ExtractionResult:
+		async with semaphore:
+			try:
+				result = await aextract(chain, inputs, schema)
+			except Exception as e:
+				# Provider errors are recorded like parse errors, the batch keeps going.
+				result = ExtractionResult(inputs=inputs, error=f"{type(e).__name__}: {e}")
+		if on_result is not None:
+			on_result(result)
+		return result
+
+	return await asyncio.gather(*(run(inputs) for inputs in inputs_list))
@@ -0,0 +1,146 @@
+"""
+A generator-based drop-in for RecursiveCharacterTextSplitter.
+
+`split_documents` builds the full list of chunks before returning anything. The
+StreamingRecursiveSplitter produces exactly the same chunks (same chunk_size,
+chunk_overlap, separators, keep_separator and strip_whitespace semantics) but
+yields each one as soon as it is final, so the next stage can start right away.
+
+It is also cheaper per chunk:
+
+- separator patterns are compiled once instead of on every recursive call,
+- the length of every piece is measured once and carried along,
+- the merge window is a deque, so dropping pieces from the front of the overlap
+  doesn't copy the remaining list each time.
+
+As with the base class, add_start_index=True records each chunk's offset in the
+source text as `start_index` metadata.
+"""
+import copy
+import logging
+import re
+from collections import deque
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingRecursiveSplitter(RecursiveCharacterTextSplitter):
+	"""RecursiveCharacterTextSplitter that streams its chunks."""
+
+	def __init__(self, **kwargs):
+		super().__init__(**kwargs)
+		self._compiled = {}
+
+	def _patterns(self, separator: str) -> tuple:
+		"""(search pattern, split pattern) for a separator, compiled once."""
+		if separator not in self._compiled:
+			pattern = separator if self._is_separator_regex else re.escape(separator)
+			search = re.compile(pattern)
+			# The parentheses keep the delimiters in the result of split().
+			split = re.compile(f"({pattern})") if self._keep_separator else search
+			self._compiled[separator] = (search, split)
+		return self._compiled[separator]
+
+	def _split_with_regex(self, text: str, separator: str) -> list:
+		if not separator:
+			return list(text)
+		splits_ = self._patterns(separator)[1].split(text)
+		if not self._keep_separator:
+			return [s for s in splits_ if s]
+		if self._keep_separator == "end":
+			splits = [splits_[i] + splits_[i + 1] for i in range(0, len(splits_) - 1, 2)]
+		else:
+			splits = [splits_[i] + splits_[i + 1] for i in range(1, len(splits_), 2)]
+		if len(splits_) % 2 == 0:
+			splits += splits_[-1:]
+		splits = [*splits, splits_[-1]] if self._keep_separator == "end" else [splits_[0], *splits]
+		return [s for s in splits if s]
+
+	def _iter_merge(self, pieces: list, separator: str):
+		"""Merge (text, length) pieces into chunks, yielding each chunk when it is full."""
+		separator_len = self._length_function(separator)
+		current = deque()
+		total = 0
+		for piece, piece_len in pieces:
+			if total + piece_len + (separator_len if current else 0) > self._chunk_size:
+				if total > self._chunk_size:
+					logger.warning(f"Created a chunk of size {total}, which is longer than the specified {self._chunk_size}")
+				if current:
+					chunk = self._join_docs([text for text, _ in current], separator)
+					if chunk is not None:
+						yield chunk
+					# Drop pieces from the front until what is left fits as overlap.
+					while total > self._chunk_overlap or (
+						total + piece_len + (separator_len if current else 0) > self._chunk_size and total > 0
+					):
+						total -= current[0][1] + (separator_len if len(current) > 1 else 0)
+						current.popleft()
+			current.append((piece, piece_len))
+			total += piece_len + (separator_len if len(current) > 1 else 0)
+		chunk = self._join_docs([text for text, _ in current], separator)
+		if chunk is not None:
+			yield chunk
+
+	def _iter_split(self, text: str, separators: list):
+		# Use the first separator that occurs in the text, recurse with the rest.
+		separator = separators[-1]
+		new_separators = []
+		for i, s in enumerate(separators):
+			if not s:
+				separator = s
+				break
+			if self._patterns(s)[0].search(text):
+				separator = s
+				new_separators = separators[i + 1:]
+				break
+
+		merge_separator = "" if self._keep_separator else separator
+		good = []
+		for piece in self._split_with_regex(text, separator):
+			piece_len = self._length_function(piece)
+			if piece_len < self._chunk_size:
+				good.append((piece, piece_len))
+				continue
+			if good:
+				yield from self._iter_merge(good, merge_separator)
+				good = []
+			if not new_separators:
+				yield piece
+			else:
+				yield from self._iter_split(piece, new_separators)
+		if good:
+			yield from self._iter_merge(good, merge_separator)
+
+	def lazy_split_text(self, text: str):
+		"""Yield the chunks of one text as soon as each is final."""
+		return self._iter_split(text, self._separators)
+
+	def split_text(self, text: str) -> list[str]:
+		return list(self.lazy_split_text(text))
+
+	def lazy_split_documents(self, documents):
+		"""Yield chunk Documents for an iterable (or generator) of Documents."""
+		for doc in documents:
+			text = doc.page_content
+			index = 0
+			previous_chunk_len = 0
+			for chunk in self.lazy_split_text(text):
+				metadata = copy.deepcopy(doc.metadata)
+				if self._add_start_index:
+					if self._length_function is len:
+						# Same offset search as LangChain, starting just before the overlap.
+						offset = index + previous_chunk_len - self._chunk_overlap
+					else:
+						# The overlap isn't measured in characters (e.g. tokens), so only
+						# assume the chunk starts after the previous one.
+						offset = index + 1 if previous_chunk_len else 0
+					index = text.find(chunk, max(0, offset))
+					metadata["start_index"] = index
+					previous_chunk_len = len(chunk)
+				yield Document(page_content=chunk, metadata=metadata)
+
+	def split_documents(self, documents) -> list[Document]:
+		return list(self.lazy_split_documents(documents))
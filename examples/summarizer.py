@@ -0,0 +1,227 @@
+"""
+Map-reduce summarization for documents that don't fit in one prompt.
+
+The naive way to summarize a long document is to refine: summarize the first
+chunk, then ask the model to update that summary with the next chunk, and so
+on. That is one LLM call after another, and each prompt carries the whole
+running summary. Here it happens in stages:
+
+- map: every chunk (from the existing splitters) is summarized on its own,
+  many at a time;
+- collapse: the partial summaries are packed, in document order, into groups
+  that fit `token_budget`, and each group is summarized again, concurrently.
+  This repeats until everything fits in one prompt;
+- reduce: one last call turns what is left into the final summary.
+
+Every summary is memoized in a small SQLite file under a hash of the model,
+the stage and the normalized input text. Summarizing an edited document again
+only sends the changed chunks to the model, plus the collapse groups and the
+reduce they end up in.
+"""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from embedding_cache import normalize_text
+from tokenizer import count_tokens
+
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = """Summarize the following part of a longer document in at most {max_words} words.
+Keep names, numbers, definitions and conclusions; leave out examples and repetition.
+Answer with the summary only.
+
+{text}
+"""
+
+COLLAPSE_PROMPT = """The following are summaries of consecutive parts of one document.
+Combine them into one summary of at most {max_words} words that keeps the order of
+the document and every important point. Answer with the summary only.
+
+{text}
+"""
+
+REDUCE_PROMPT = """The following are summaries of consecutive parts of one document.
+Write the final summary of the whole document in at most {max_words} words: start
+with its main point, then the key points in the order they appear.
+
+{text}
+"""
+
+REFINE_PROMPT = """Here is a summary of a document so far:
+
+{summary}
+
+Update it with the next part of the document, in at most {max_words} words.
+Answer with the updated summary only.
+
+{text}
+"""
+
+DEFAULT_CACHE_PATH = "./summary_cache.sqlite3"
+
+SEPARATOR = "\n\n"
+
+
+class SummaryCache:
+	"""Summaries on disk, keyed by model, stage and a hash of the normalized text. path=":memory:" for a throwaway cache."""
+
+	def __init__(self, path: str = DEFAULT_CACHE_PATH):
+		self.path = path
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+		self._conn.commit()
+
+	@staticmethod
+	def key(model: str, stage: str, text: str) -> str:
+		payload = f"{model}\x00{stage}\x00{normalize_text(text)}".encode("utf-8")
+		return hashlib.sha256(payload).hexdigest()
+
+	def get(self, key: str):
+		with self._lock:
+			row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+		return row[0] if row else None
+
+	def put(self, key: str, summary: str):
+		with self._lock:
+			self._conn.execute("INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", (key, summary))
+			self._conn.commit()
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
+
+
+@dataclass
+class SummaryResult:
+	summary: str
+	chunks: int = 0
+	levels: int = 0        # collapse rounds between map and reduce
+	llm_calls: int = 0
+	cache_hits: int = 0
+	seconds: float = 0.0
+
+
+def pack(texts: list, token_budget: int, length_function=count_tokens) -> list:
+	"""Split texts, in order, into groups whose joined length stays within token_budget (a longer text gets a group of its own)."""
+	groups, current, size = [], [], 0
+	for text in texts:
+		length = length_function(text)
+		if current and size + length > token_budget:
+			groups.append(current)
+			current, size = [], 0
+		current.append(text)
+		size += length
+	if current:
+		groups.append(current)
+	return groups
+
+
+def _text(chunk) -> str:
+	return getattr(chunk, "page_content", chunk)
+
+
+class MapReduceSummarizer:
+	"""Summarize a list of chunks (Documents or strings) with concurrent map, hierarchical collapse and a final reduce."""
+
+	def __init__(self, llm, token_budget: int = 3000, max_concurrency: int = 8, max_words: int = 150, final_words: int = 300,
+				 cache: SummaryCache = None, length_function=count_tokens, max_levels: int = 5):
+		from langchain_core.prompts import PromptTemplate
+		from langchain_core.output_parsers import StrOutputParser
+
+		self.token_budget = token_budget
+		self.max_concurrency = max_concurrency
+		self.max_words = max_words
+		self.final_words = final_words
+		self.cache = cache if cache is not None else SummaryCache()
+		self.length_function = length_function
+		self.max_levels = max_levels
+		self.model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+		self.chains = {
+			stage: PromptTemplate.from_template(template) | llm | StrOutputParser()
+			for stage, template in (("map", MAP_PROMPT), ("collapse", COLLAPSE_PROMPT), ("reduce", REDUCE_PROMPT))
+		}
+
+	async def _summarize(self, stage: str, text: str, max_words: int, result: SummaryResult) -> str:
+		key = self.cache.key(self.model, f"{stage}:{max_words}", text)
+		summary = self.cache.get(key)
+		if summary is not None:
+			result.cache_hits += 1
+			return summary
+		result.llm_calls += 1
+		summary = (await self.chains[stage].ainvoke({"text": text, "max_words": max_words})).strip()
+		self.cache.put(key, summary)
+		return summary
+
+	async def _gather(self, stage: str, texts: list, result: SummaryResult) -> list:
+		semaphore = asyncio.Semaphore(self.max_concurrency)
+
+		async def run(text: str) -> str:
+			async with semaphore:
+				return await self._summarize(stage, text, self.max_words, result)
+
+		# Repeated chunks (headers, boilerplate) are summarized once.
+		unique = list(dict.fromkeys(texts))
+		summaries = dict(zip(unique, await asyncio.gather(*(run(text) for text in unique))))
+		return [summaries[text] for text in texts]
+
+	async def asummarize(self, chunks: list) -> SummaryResult:
+		result = SummaryResult(summary="", chunks=len(chunks))
+		if not chunks:
+			return result
+		start = time.perf_counter()
+
+		summaries = await self._gather("map", [_text(chunk) for chunk in chunks], result)
+		while (tokens := self.length_function(SEPARATOR.join(summaries))) > self.token_budget:
+			if result.levels == self.max_levels:
+				logger.warning(f"Summaries still have {tokens} tokens after {result.levels} collapse levels "
+							   f"(budget {self.token_budget}), the reduce prompt will be over budget")
+				break
+			groups = pack(summaries, self.token_budget, self.length_function)
+			summaries = await self._gather("collapse", [SEPARATOR.join(group) for group in groups], result)
+			result.levels += 1
+
+		result.summary = await self._summarize("reduce", SEPARATOR.join(summaries), self.final_words, result)
+		result.seconds = time.perf_counter() - start
+		return result
+
+	def summarize(self, chunks: list) -> SummaryResult:
+		return asyncio.run(self.asummarize(chunks))
+
+
+def load_chunks(file_path: str, chunk_tokens: int = 1000, chunk_overlap: int = 50) -> list:
+	"""A PDF (parsed in parallel, see parallel_pdf_loader.py) or a text file, split into chunks of at most chunk_tokens."""
+	from langchain_core.documents import Document
+	from streaming_splitter import StreamingRecursiveSplitter
+
+	if file_path.lower().endswith(".pdf"):
+		from parallel_pdf_loader import ParallelPDFLoader
+		docs = ParallelPDFLoader(file_path).lazy_load()
+	else:
+		with open(file_path, encoding="utf-8") as f:
+			docs = [Document(page_content=f.read(), metadata={"source": file_path})]
+	splitter = StreamingRecursiveSplitter(chunk_size=chunk_tokens, chunk_overlap=chunk_overlap, length_function=count_tokens,
+										  separators=["\n\n\n", "\n\n", ".", "!", "?", " ", ""])
+	return list(splitter.lazy_split_documents(docs))
+
+
+def refine_summarize(llm, chunks: list, max_words: int = 300) -> SummaryResult:
+	"""The sequential baseline: one call per chunk, each updating the running summary."""
+	from langchain_core.prompts import PromptTemplate
+	from langchain_core.output_parsers import StrOutputParser
+
+	start = time.perf_counter()
+	first = PromptTemplate.from_template(MAP_PROMPT) | llm | StrOutputParser()
+	refine = PromptTemplate.from_template(REFINE_PROMPT) | llm | StrOutputParser()
+	summary = ""
+	for i, chunk in enumerate(chunks):
+		if i == 0:
+			summary = first.invoke({"text": _text(chunk), "max_words": max_words}).strip()
+		else:
+			summary = refine.invoke({"summary": summary, "text": _text(chunk), "max_words": max_words}).strip()
+	return SummaryResult(summary=summary, chunks=len(chunks), llm_calls=len(chunks), seconds=time.perf_counter() - start)
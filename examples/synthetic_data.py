@@ -0,0 +1,21 @@
+"""
+Synthetic, policy-like text for offline benchmarks.
+
+Lets the benchmarks run without downloading company_policies.txt, at any size.
+"""
+import random
+
+
+def synthetic_policies(n_sections: int = 40, seed: int = 0) -> str:
+	"""Policy-like text so the benchmark also runs without the downloaded file."""
+	rng = random.Random(seed)
+	topics = ["company car", "remote work", "expenses", "vacation", "security", "travel", "equipment", "overtime"]
+	verbs = ["must", "should", "may", "must not"]
+	actions = ["report incidents to their manager", "keep receipts for all purchases", "eat or drink in the vehicle",
+			   "share passwords with colleagues", "book travel through the portal", "take leave with two weeks notice"]
+	sections = []
+	for i in range(n_sections):
+		topic = rng.choice(topics)
+		sentences = [f"Employees {rng.choice(verbs)} {rng.choice(actions)} when it comes to the {topic} policy." for _ in range(rng.randint(6, 14))]
+		sections.append(f"{i + 1}. {topic.title()} Policy\n\n" + " ".join(sentences))
+	return "\n\n".join(sections)
@@ -0,0 +1,17 @@
+from tokenizer import TokenCounter, approx_token_count, count_tokens
+
+
+def test_empty_text_has_no_tokens():
+	assert count_tokens("") == 0
+	assert approx_token_count("") == 0
+
+
+def test_estimate_rounds_up():
+	assert [approx_token_count("x" * n) for n in (1, 4, 5, 8)] == [1, 1, 2, 2]
+
+
+def test_fallback_counter_without_tiktoken():
+	counter = TokenCounter("no-such-encoding")
+	assert not counter.exact
+	assert counter("") == 0
+	assert counter("abcdefgh") == 2
@@ -0,0 +1,67 @@
+"""
+Token counting with a cached tokenizer.
+
+Character counts are a poor proxy for what embedding and chat models actually
+bill and limit: tokens. `count_tokens` measures text with tiktoken's
+cl100k_base encoding (used by text-embedding-3-small) and memoizes the result
+per fragment, because the recursive splitter measures the same separators,
+sentences and merge candidates over and over.
+
+tiktoken downloads its encodings on first use; set TIKTOKEN_CACHE_DIR to a
+folder that already contains them to run fully offline. Without tiktoken, or
+without the encoding files, we fall back to a rough characters/4 estimate.
+
+pip install tiktoken
+"""
+from functools import lru_cache
+
+
+def approx_token_count(text: str) -> int:
+	"""Rough token estimate (about 4 characters per token for English text)."""
+	return (len(text) + 3) // 4  # rounded up, and 0 for ""
+
+
+class TokenCounter:
+	"""Callable token counter with an LRU cache in front of the tokenizer."""
+
+	def __init__(self, encoding_name: str = "cl100k_base", cache_size: int = 1 << 16):
+		self.encoding_name = encoding_name
+		try:
+			import tiktoken
+			self.encoding = tiktoken.get_encoding(encoding_name)
+		except Exception:
+			self.encoding = None
+		self._count = lru_cache(maxsize=cache_size)(self._count_uncached)
+
+	def _count_uncached(self, text: str) -> int:
+		if self.encoding is None:
+			return approx_token_count(text)
+		# Treat special-token strings like "<|endoftext|>" as plain text.
+		return len(self.encoding.encode(text, disallowed_special=()))
+
+	def __call__(self, text: str) -> int:
+		return self._count(text)
+
+	@property
+	def exact(self) -> bool:
+		"""False when counts are estimates because tiktoken is unavailable."""
+		return self.encoding is not None
+
+	def cache_info(self):
+		return self._count.cache_info()
+
+
+_default_counter = None
+
+
+def get_token_counter() -> TokenCounter:
+	"""The shared counter, created on first use so importing stays cheap."""
+	global _default_counter
+	if _default_counter is None:
+		_default_counter = TokenCounter()
+	return _default_counter
+
+
+def count_tokens(text: str) -> int:
+	"""Number of cl100k_base tokens in `text`, memoized."""
+	return get_token_counter()(text)
@@ -0,0 +1,457 @@
+"""
+Lightweight tracing for the RAG pipeline: where did the time go?
+
+Spans record a name, a kind (chain, llm, retriever, embedding, splitter,
+handler), a duration, token counts and payload sizes, and link to their parent
+so one request can be followed from the Gradio handler down to the LLM call.
+
+- LangChain runs (the chain, its steps, the chat model) are traced by a
+  callback handler: pass `config={"callbacks": tracer.callbacks()}`.
+- Everything else uses `tracer.span(...)`, the `@tracer.traced(...)`
+  decorator (functions, coroutines and async generators such as Gradio
+  handlers), `tracer.iterate(...)` for lazy generators like the splitters, and
+  `tracer.wrap_embeddings(...)`.
+
+Tracing is off unless TRACE_EXPORT is set, and then nothing is wrapped, so the
+hot path pays nothing:
+
+TRACE_EXPORT=jsonl  one JSON object per span in TRACE_FILE (default traces/spans.jsonl)
+TRACE_EXPORT=otlp   OpenTelemetry OTLP/JSON, one ResourceSpans object per line, like
+                    the collector's file exporter (default traces/spans.otlp.jsonl)
+
+Summarize a trace file with p50/p95/p99 per stage:
+
+python tracing.py traces/spans.jsonl [--group name|kind]
+"""
+import argparse
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from tokenizer import count_tokens
+
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# OpenTelemetry SpanKind values.
+_OTEL_KINDS = {"handler": 2, "llm": 3, "embedding": 3, "retriever": 3}
+
+
+def _size(payload) -> int:
+	"""Rough payload size in characters."""
+	return len(payload) if isinstance(payload, str) else len(str(payload))
+
+
+class Span:
+	__slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "status", "attributes")
+
+	def __init__(self, name: str, kind: str = "internal", parent: "Span" = None):
+		self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+		self.span_id = uuid.uuid4().hex[:16]
+		self.parent_id = parent.span_id if parent else None
+		self.name = name
+		self.kind = kind
+		self.start_ns = time.time_ns()
+		self.end_ns = None
+		self.status = "ok"
+		self.attributes = {}
+
+	def set(self, **attributes):
+		self.attributes.update(attributes)
+
+	def fail(self, error: BaseException):
+		self.status = "error"
+		self.attributes["error"] = repr(error)
+
+	@property
+	def duration_ms(self) -> float:
+		return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+	def to_record(self) -> dict:
+		return {
+			"trace_id": self.trace_id,
+			"span_id": self.span_id,
+			"parent_id": self.parent_id,
+			"name": self.name,
+			"kind": self.kind,
+			"start_ns": self.start_ns,
+			"end_ns": self.end_ns,
+			"duration_ms": round(self.duration_ms, 3),
+			"status": self.status,
+			"attributes": self.attributes,
+		}
+
+
+class _NoopSpan:
+	def set(self, **attributes):
+		pass
+
+	def fail(self, error):
+		pass
+
+
+class JsonlExporter:
+	"""Appends one JSON object per span to a file."""
+
+	def __init__(self, path: str):
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		self.path = path
+		self._lock = threading.Lock()
+		# Line buffered, so spans are on disk even if the process is killed.
+		self._fh = open(path, "a", encoding="utf-8", buffering=1)
+
+	def _line(self, span: Span) -> str:
+		return json.dumps(span.to_record(), default=str)
+
+	def export(self, span: Span):
+		line = self._line(span)
+		with self._lock:
+			self._fh.write(line + "\n")
+
+	def close(self):
+		self._fh.close()
+
+
+class OtlpJsonExporter(JsonlExporter):
+	"""Writes spans in the OTLP/JSON format, one ResourceSpans object per line."""
+
+	def __init__(self, path: str, service_name: str = "langchain_basics"):
+		super().__init__(path)
+		self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+
+	@staticmethod
+	def _value(value) -> dict:
+		if isinstance(value, bool):
+			return {"boolValue": value}
+		if isinstance(value, int):
+			return {"intValue": str(value)}
+		if isinstance(value, float):
+			return {"doubleValue": value}
+		return {"stringValue": str(value)}
+
+	def _line(self, span: Span) -> str:
+		attributes = [{"key": "span.kind", "value": {"stringValue": span.kind}}]
+		attributes += [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()]
+		otlp_span = {
+			"traceId": span.trace_id,
+			"spanId": span.span_id,
+			"name": span.name,
+			"kind": _OTEL_KINDS.get(span.kind, 1),
+			"startTimeUnixNano": str(span.start_ns),
+			"endTimeUnixNano": str(span.end_ns),
+			"attributes": attributes,
+			"status": {"code": 2 if span.status == "error" else 1},
+		}
+		if span.parent_id:
+			otlp_span["parentSpanId"] = span.parent_id
+		return json.dumps({"resourceSpans": [{
+			"resource": self.resource,
+			"scopeSpans": [{"scope": {"name": "tracing"}, "spans": [otlp_span]}],
+		}]})
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+	"""Turns LangChain chain, chat model and retriever runs into spans."""
+
+	# Called on the thread (or task) of the run itself, so the current span is the parent.
+	run_inline = True
+
+	def __init__(self, tracer: "Tracer"):
+		self.tracer = tracer
+		self._spans = {}
+		self._lock = threading.Lock()
+
+	def _start(self, run_id, parent_run_id, name: str, kind: str, payload):
+		with self._lock:
+			parent = self._spans.get(parent_run_id) if parent_run_id else None
+		span = Span(name, kind, parent=parent or _current_span.get())
+		span.set(input_chars=_size(payload))
+		with self._lock:
+			self._spans[run_id] = span
+
+	def _end(self, run_id, error: BaseException = None, **attributes):
+		with self._lock:
+			span = self._spans.pop(run_id, None)
+		if span is None:
+			return
+		span.set(**attributes)
+		if error is not None:
+			span.fail(error)
+		self.tracer.end(span)
+
+	@staticmethod
+	def _name(serialized, kwargs, default: str) -> str:
+		return kwargs.get("name") or (serialized or {}).get("name") or default
+
+	def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+		self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), "chain", inputs)
+
+	def on_chain_end(self, outputs, *, run_id, **kwargs):
+		self._end(run_id, output_chars=_size(outputs))
+
+	def on_chain_error(self, error, *, run_id, **kwargs):
+		self._end(run_id, error)
+
+	def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+		self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"), "llm",
+					"".join(str(m.content) for batch in messages for m in batch))
+
+	def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+		self._start(run_id, parent_run_id, self._name(serialized, kwargs, "llm"), "llm", "".join(prompts))
+
+	def on_llm_new_token(self, token, *, run_id, **kwargs):
+		span = self._spans.get(run_id)
+		if span is not None and "ttft_ms" not in span.attributes and token:
+			span.set(ttft_ms=round(span.duration_ms, 3))
+
+	def on_llm_end(self, response, *, run_id, **kwargs):
+		usage = {}
+		for generations in response.generations:
+			for generation in generations:
+				message = getattr(generation, "message", None)
+				for key, value in (getattr(message, "usage_metadata", None) or {}).items():
+					if isinstance(value, int):
+						usage[key] = usage.get(key, 0) + value
+		if not usage:
+			token_usage = (response.llm_output or {}).get("token_usage") or {}
+			usage = {"input_tokens": token_usage.get("prompt_tokens"), "output_tokens": token_usage.get("completion_tokens")}
+		text = "".join(g.text for generations in response.generations for g in generations)
+		self._end(run_id, output_chars=len(text), **{k: v for k, v in usage.items() if v is not None})
+
+	def on_llm_error(self, error, *, run_id, **kwargs):
+		self._end(run_id, error)
+
+	def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+		self._start(run_id, parent_run_id, self._name(serialized, kwargs, "retriever"), "retriever", query)
+
+	def on_retriever_end(self, documents, *, run_id, **kwargs):
+		self._end(run_id, documents=len(documents), output_chars=sum(len(d.page_content) for d in documents))
+
+	def on_retriever_error(self, error, *, run_id, **kwargs):
+		self._end(run_id, error)
+
+
+class TracedEmbeddings(Embeddings):
+	"""Wraps an Embeddings object, one span per call; other attributes pass through."""
+
+	def __init__(self, underlying: Embeddings, tracer: "Tracer"):
+		self.underlying = underlying
+		self.tracer = tracer
+
+	def embed_documents(self, texts: list) -> list:
+		with self.tracer.span("embed_documents", kind="embedding", texts=len(texts),
+							  input_chars=sum(len(text) for text in texts), tokens=sum(count_tokens(text) for text in texts)):
+			return self.underlying.embed_documents(texts)
+
+	def embed_query(self, text: str) -> list:
+		with self.tracer.span("embed_query", kind="embedding", input_chars=len(text), tokens=count_tokens(text)):
+			return self.underlying.embed_query(text)
+
+	def __getattr__(self, name):
+		# e.g. stats() and close() of CachedEmbeddings
+		return getattr(self.underlying, name)
+
+
+class Tracer:
+	"""Creates spans and hands finished ones to an exporter; disabled without one."""
+
+	def __init__(self, exporter=None):
+		self.exporter = exporter
+		self._handler = TracingCallbackHandler(self) if exporter else None
+
+	@property
+	def enabled(self) -> bool:
+		return self.exporter is not None
+
+	def end(self, span: Span):
+		span.end_ns = time.time_ns()
+		self.exporter.export(span)
+
+	@contextmanager
+	def span(self, name: str, kind: str = "internal", **attributes):
+		"""Context manager; the span is the parent of everything traced inside it."""
+		if not self.enabled:
+			yield _NoopSpan()
+			return
+		span = Span(name, kind, parent=_current_span.get())
+		span.set(**attributes)
+		token = _current_span.set(span)
+		try:
+			yield span
+		except BaseException as e:
+			span.fail(e)
+			raise
+		finally:
+			_current_span.reset(token)
+			self.end(span)
+
+	def callbacks(self) -> list:
+		"""Callbacks to pass in a runnable's config; empty when tracing is off."""
+		return [self._handler] if self.enabled else []
+
+	def wrap_embeddings(self, embeddings: Embeddings) -> Embeddings:
+		return TracedEmbeddings(embeddings, self) if self.enabled else embeddings
+
+	def iterate(self, iterable, name: str, kind: str = "internal"):
+		"""Trace a lazy iterable from its first to its last item, counting items and characters."""
+		if not self.enabled:
+			return iterable
+		return self._iterate(iterable, name, kind)
+
+	def _iterate(self, iterable, name: str, kind: str):
+		# Not made current: the consumer's work between items isn't part of this span.
+		span = Span(name, kind, parent=_current_span.get())
+		items = chars = 0
+		busy_ns = 0
+		try:
+			iterator = iter(iterable)
+			while True:
+				start = time.perf_counter_ns()
+				try:
+					item = next(iterator)
+				except StopIteration:
+					break
+				finally:
+					busy_ns += time.perf_counter_ns() - start
+				items += 1
+				chars += len(getattr(item, "page_content", item) or "")
+				yield item
+		except Exception as e:
+			span.fail(e)
+			raise
+		finally:
+			# busy_ms is the time spent producing items, without the consumer's share.
+			span.set(items=items, output_chars=chars, busy_ms=round(busy_ns / 1e6, 3))
+			self.end(span)
+
+	def traced(self, name: str = None, kind: str = "internal"):
+		"""Decorator for functions, coroutines and async generators (e.g. Gradio handlers)."""
+		def decorator(fn):
+			if not self.enabled:
+				return fn
+			span_name = name or fn.__name__
+
+			if inspect.isasyncgenfunction(fn):
+				@functools.wraps(fn)
+				async def agen_wrapper(*args, **kwargs):
+					span = Span(span_name, kind, parent=_current_span.get())
+					agen = fn(*args, **kwargs)
+					chunks = 0
+					try:
+						while True:
+							# Current only while the generator runs, each step in its own context.
+							token = _current_span.set(span)
+							try:
+								item = await agen.__anext__()
+							except StopAsyncIteration:
+								break
+							finally:
+								_current_span.reset(token)
+							if not chunks:
+								span.set(first_chunk_ms=round(span.duration_ms, 3))
+							chunks += 1
+							yield item
+					except Exception as e:
+						# Not GeneratorExit: a client that stops reading isn't an error.
+						span.fail(e)
+						raise
+					finally:
+						await agen.aclose()
+						span.set(chunks=chunks)
+						self.end(span)
+				return agen_wrapper
+
+			if inspect.iscoroutinefunction(fn):
+				@functools.wraps(fn)
+				async def async_wrapper(*args, **kwargs):
+					with self.span(span_name, kind):
+						return await fn(*args, **kwargs)
+				return async_wrapper
+
+			@functools.wraps(fn)
+			def wrapper(*args, **kwargs):
+				with self.span(span_name, kind):
+					return fn(*args, **kwargs)
+			return wrapper
+		return decorator
+
+
+def tracer_from_env() -> Tracer:
+	mode = os.getenv("TRACE_EXPORT", "").lower()
+	if mode == "jsonl":
+		return Tracer(JsonlExporter(os.getenv("TRACE_FILE", os.path.join("traces", "spans.jsonl"))))
+	if mode == "otlp":
+		return Tracer(OtlpJsonExporter(os.getenv("TRACE_FILE", os.path.join("traces", "spans.otlp.jsonl"))))
+	return Tracer()
+
+
+_default_tracer = None
+
+
+def get_tracer() -> Tracer:
+	"""The shared tracer, configured from TRACE_EXPORT / TRACE_FILE on first use."""
+	global _default_tracer
+	if _default_tracer is None:
+		_default_tracer = tracer_from_env()
+	return _default_tracer
+
+
+def read_spans(path: str):
+	"""Yield span records from a JSONL or OTLP/JSON trace file."""
+	with open(path, "r", encoding="utf-8") as fh:
+		for line in fh:
+			if not line.strip():
+				continue
+			record = json.loads(line)
+			if "resourceSpans" not in record:
+				yield record
+				continue
+			for resource_spans in record["resourceSpans"]:
+				for scope_spans in resource_spans.get("scopeSpans", []):
+					for span in scope_spans.get("spans", []):
+						attributes = {}
+						for attribute in span.get("attributes", []):
+							value = next(iter(attribute["value"].values()), None)
+							attributes[attribute["key"]] = int(value) if "intValue" in attribute["value"] else value
+						yield {
+							"name": span["name"],
+							"kind": attributes.pop("span.kind", "internal"),
+							"duration_ms": (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6,
+							"status": "error" if span.get("status", {}).get("code") == 2 else "ok",
+							"attributes": attributes,
+						}
+
+
+def summarize(path: str, group: str = "name"):
+	"""Print count, errors, p50/p95/p99 latency and token totals per stage."""
+	from percentiles import percentile
+
+	stages = {}
+	for record in read_spans(path):
+		stage = stages.setdefault(record[group], {"durations": [], "errors": 0, "tokens": 0})
+		stage["durations"].append(record["duration_ms"])
+		stage["errors"] += record["status"] == "error"
+		attributes = record.get("attributes", {})
+		stage["tokens"] += attributes.get("tokens") or (attributes.get("input_tokens", 0) + attributes.get("output_tokens", 0))
+
+	width = max([len(key) for key in stages] + [5])
+	print(f"{group:{width}} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'tokens':>10}")
+	for key, stage in sorted(stages.items(), key=lambda item: -sum(item[1]["durations"])):
+		durations = stage["durations"]
+		print(f"{key:{width}} {len(durations):7d} {stage['errors']:7d} {percentile(durations, 50):10.2f} "
+			  f"{percentile(durations, 95):10.2f} {percentile(durations, 99):10.2f} {stage['tokens']:10d}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Latency percentiles per stage from a trace file.")
+	parser.add_argument("path", nargs="?", default=os.path.join("traces", "spans.jsonl"))
+	parser.add_argument("--group", choices=["name", "kind"], default="name")
+	args = parser.parse_args()
+	summarize(args.path, args.group)